@@ -0,0 +1,332 @@
+"""
+Local Cello server: a long-lived process that keeps the imports, parsed UCFs, and the JVM (py4j) gateway warm between
+design jobs, so a front end does not pay for them on every design.  Jobs run concurrently on a pool of worker
+processes forked from the server (each CELLO3 run configures the global loggers, so jobs cannot share a process); the
+workers inherit the UCFs preloaded by the server, and each keeps its own connection to the JVM.  If a worker dies, its
+job fails, the pool is replaced, and the jobs that were only waiting in the old pool are run again.
+
+HTTP API (JSON; on localhost, or on a Unix socket):
+ - POST /jobs  {"verilog": ..., "ucf": ..., "input", "output", "options", "stream"} (see BatchJob): queues a job;
+   returns {"id": ...}, or with "stream": true, streams its events (as GET /jobs/<id>/events)
+ - GET /jobs/<id>: status and result of a job
+ - GET /jobs/<id>/events: NDJSON stream of the job's events (queued, running, done), ending with its result
+ - GET /jobs: status of all jobs; GET /health: server info
+
+Usage: python -m app.server [--port 8737 | --socket /tmp/cello.sock] [--workers 4] [--preload Eco1C2G2T2 ...]
+
+Class: CelloServer: submit(), job(), events(), close()
+start_server()
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config import VERILOGS_DIR, CONSTRAINTS_DIR, TEMP_OUTPUTS_DIR
+from core_algorithm.utils.batch_runner import BatchJob, run_job
+from core_algorithm.utils.ucf_class import cached_ucf
+
+_events = None  # worker processes: queue of (job id, event) sent back to the server
+
+
+def _init_worker(events):
+    global _events
+    _events = events
+
+
+def _run(job_id: str, job: BatchJob, verilogs_path: str, constraints_path: str, out_path: str) -> dict:
+    """Worker task: runs one job (see run_job), after telling the server it started."""
+    _events.put((job_id, {'event': 'running', 'pid': os.getpid(), 'time': time.time()}))
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):  # NOTE: each job has its own log file
+        return run_job(job, verilogs_path, constraints_path, out_path)
+
+
+class CelloServer:
+    """
+    Jobs and the pool of worker processes running them (the HTTP layer is in Handler).
+
+    Attributes: verilogs_path, constraints_path, out_path, workers, jobs
+    """
+
+    def __init__(self, verilogs_path: str = VERILOGS_DIR, constraints_path: str = CONSTRAINTS_DIR,
+                 out_path: str = TEMP_OUTPUTS_DIR, workers: int = 0, preload: list = ()):
+        """
+        :param verilogs_path: str
+        :param constraints_path: str
+        :param out_path: str: output folder (one subfolder per job, named by its id)
+        :param workers: int: number of worker processes (0: one per CPU core)
+        :param preload: list[str]: UCFs (e.g. 'Eco1C2G2T2') parsed before the workers are started
+        """
+        self.verilogs_path = verilogs_path
+        self.constraints_path = constraints_path
+        self.out_path = out_path
+        self.workers = workers or os.cpu_count() or 1
+        self.jobs = {}
+        """id: {'job': BatchJob, 'status': str, 'events': list[dict], 'result': dict | None}"""
+        self.__changed = threading.Condition()  # NOTE: also guards the replacement of the pool
+        for name in preload:  # NOTE: inherited by the (forked) workers, so each UCF is parsed once for all of them
+            base = name[:-4] if name.endswith('.UCF') else name
+            cached_ucf(constraints_path, base + '.UCF', base + '.input', base + '.output')
+        os.makedirs('logs', exist_ok=True)  # NOTE: each job's log is written to logs/ (see log.config_logger)
+        # NOTE: SimpleQueue.put writes to the pipe at once, so a worker's 'running' event is not lost if it dies
+        self.__events = multiprocessing.get_context().SimpleQueue()
+        self.__flushes = self.__flushed = 0
+        self.__pool = self.__new_pool()
+        self.__listener = threading.Thread(target=self.__listen, daemon=True)
+        self.__listener.start()
+
+    def submit(self, job: BatchJob) -> str:
+        """
+        :param job: BatchJob
+        :return: str: id of the job
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job.name = job_id  # NOTE: output subfolder of the job
+        with self.__changed:
+            self.jobs[job_id] = {'job': job, 'status': 'queued', 'events': [], 'result': None}
+        self.__event(job_id, {'event': 'queued', 'time': time.time()})
+        self.__start(job_id)
+        return job_id
+
+    def job(self, job_id: str) -> dict:
+        """:return: dict: JSON-serializable status of a job (None: unknown id)"""
+        with self.__changed:
+            record = self.jobs.get(job_id)
+            if record is None:
+                return None
+            return {'id': job_id, **asdict(record['job']), 'status': record['status'], 'result': record['result'],
+                    'out_path': os.path.join(self.out_path, job_id)}
+
+    def events(self, job_id: str, timeout: float = None):
+        """
+        Yields the events of a job as they happen (those so far first), until the job is done.
+
+        :param job_id: str
+        :param timeout: float: max seconds to wait for the next event (None: no limit)
+        """
+        sent = 0
+        while True:
+            with self.__changed:
+                record = self.jobs[job_id]
+                if not self.__changed.wait_for(lambda: len(record['events']) > sent, timeout):
+                    return
+                new, done = record['events'][sent:], record['result'] is not None
+            sent += len(new)
+            yield from new
+            if done and sent == len(record['events']):
+                return
+
+    def close(self):
+        """Waits for the jobs in progress, and stops the workers."""
+        self.__pool.shutdown(wait=True)
+        self.__events.put(None)
+        self.__listener.join()
+
+    def __new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(),
+                                   initializer=_init_worker, initargs=(self.__events,))
+
+    def __replace_pool(self, broken: ProcessPoolExecutor):
+        """Replaces the pool if it is still the broken one (a worker died), so that it is replaced only once."""
+        with self.__changed:
+            if self.__pool is broken:
+                self.__pool = self.__new_pool()
+                broken.shutdown(wait=False)
+
+    def __start(self, job_id: str):
+        """Submits a job to the pool (replacing the pool first if it is broken)."""
+        with self.__changed:
+            args = (_run, job_id, self.jobs[job_id]['job'], self.verilogs_path, self.constraints_path, self.out_path)
+            pool = self.__pool
+            try:
+                future = pool.submit(*args)
+            except BrokenProcessPool:
+                self.__replace_pool(pool)
+                pool = self.__pool
+                future = pool.submit(*args)
+        future.add_done_callback(lambda f: self.__done(job_id, f, pool))
+
+    def __event(self, job_id: str, event: dict):
+        with self.__changed:
+            record = self.jobs[job_id]
+            if record['events'] and record['events'][-1]['event'] == 'done':
+                return  # NOTE: a worker's 'running' event may come after the result (they are sent separately)
+            record['events'].append(event)
+            if event['event'] != 'done':
+                record['status'] = event['event']
+            self.__changed.notify_all()
+
+    def __done(self, job_id: str, future, pool: ProcessPoolExecutor):
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:  # NOTE: a worker died: all jobs still in the pool fail with it
+            self.__replace_pool(pool)
+            self.__flush_events()
+            with self.__changed:
+                started = self.jobs[job_id]['status'] != 'queued'
+            if not started:  # NOTE: the job was only waiting in the pool: it is run again
+                return self.__start(job_id)
+            result = {'status': 'FAILED', 'error': repr(e)}
+        except Exception as e:
+            result = {'status': 'FAILED', 'error': repr(e)}
+        with self.__changed:
+            self.jobs[job_id]['result'] = result
+            self.jobs[job_id]['status'] = result['status']
+        self.__event(job_id, {'event': 'done', 'time': time.time(), 'result': result})
+
+    def __flush_events(self, timeout: float = 10):
+        """Waits until the events sent so far (e.g. by a worker that died since) are forwarded by the listener."""
+        with self.__changed:
+            self.__flushes += 1
+            token = self.__flushes
+        self.__events.put(('flush', token))  # NOTE: after the events already in the pipe
+        with self.__changed:
+            self.__changed.wait_for(lambda: self.__flushed >= token, timeout)
+
+    def __listen(self):
+        """Forwards the events sent by the workers."""
+        while (message := self.__events.get()) is not None:
+            if message[0] == 'flush':
+                with self.__changed:
+                    self.__flushed = max(self.__flushed, message[1])
+                    self.__changed.notify_all()
+            else:
+                self.__event(*message)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """HTTP API (see module docstring) of the CelloServer in self.server.cello."""
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        cello = self.server.cello
+        if parts == ['health']:
+            self.__json(200, {'status': 'ok', 'workers': cello.workers, 'jobs': len(cello.jobs)})
+        elif parts == ['jobs']:
+            self.__json(200, [cello.job(job_id) for job_id in list(cello.jobs)])
+        elif len(parts) == 2 and parts[0] == 'jobs' and parts[1] in cello.jobs:
+            self.__json(200, cello.job(parts[1]))
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[1] in cello.jobs and parts[2] == 'events':
+            self.__stream(parts[1])
+        else:
+            self.__json(404, {'error': f'Unknown path: {self.path}'})
+
+    def do_POST(self):
+        if self.path.strip('/') != 'jobs':
+            return self.__json(404, {'error': f'Unknown path: {self.path}'})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            stream = body.pop('stream', False)
+            body.pop('name', None)
+            job = BatchJob(**body)
+        except (ValueError, TypeError) as e:
+            return self.__json(400, {'error': f'Invalid job: {e}'})
+        job_id = self.server.cello.submit(job)
+        if stream:
+            self.__stream(job_id)
+        else:
+            self.__json(202, {'id': job_id})
+
+    def __json(self, code: int, data):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __stream(self, job_id: str):
+        """Streams the events of a job (one JSON object per line), closing the connection once it is done."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        try:
+            for event in self.server.cello.events(job_id):
+                self.wfile.write(json.dumps({'id': job_id, **event}).encode() + b'\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # NOTE: client gone; the job goes on
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else 'unix-socket'
+
+    def log_message(self, format, *args):
+        pass  # NOTE: no access log (each job has its own log file)
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer listening on a Unix socket instead of a TCP port."""
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def start_server(host: str = '127.0.0.1', port: int = 8737, socket_path: str = None, **kwargs):
+    """
+    Starts the server and serves until interrupted.
+
+    :param host: str
+    :param port: int
+    :param socket_path: str: Unix socket to listen on instead of host & port
+    :param kwargs: see CelloServer
+    """
+    cello = CelloServer(**kwargs)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        httpd = UnixHTTPServer(socket_path, Handler)
+    else:
+        httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.cello = cello
+    print(f'Cello server listening on {socket_path or f"http://{host}:{httpd.server_port}"} '
+          f'({cello.workers} workers)...')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print('\nStopping (waiting for the jobs in progress)...')
+    finally:
+        httpd.server_close()
+        cello.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve Cello design jobs over HTTP, keeping UCFs and the JVM warm.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8737)
+    parser.add_argument('--socket', default=None, help='Unix socket to listen on instead of host & port')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (default: one per CPU core)')
+    parser.add_argument('--preload', nargs='*', default=[], help='UCFs to parse at startup (e.g. Eco1C2G2T2)')
+    parser.add_argument('--verilogs', default=VERILOGS_DIR)
+    parser.add_argument('--constraints', default=CONSTRAINTS_DIR)
+    parser.add_argument('--out', default=TEMP_OUTPUTS_DIR)
+    args = parser.parse_args()
+
+    from core_algorithm.utils.py4j_gateway.gateway import start_gateway
+    from py4j.java_gateway import JavaGateway
+    try:  # NOTE: as in run.py; the JVM then stays up for all jobs
+        JavaGateway(eager_load=True).close()
+        print("\nJava Py4J gateway already started")
+    except Exception:
+        print("\nAttempting to start Java Py4J gateway...")
+        try:
+            start_gateway()
+            print("Started Java Py4J gateway")
+        except Exception:
+            print("Failed to start Java Py4J gateway!")
+    start_server(args.host, args.port, args.socket, verilogs_path=args.verilogs, constraints_path=args.constraints,
+                 out_path=args.out, workers=args.workers, preload=args.preload)
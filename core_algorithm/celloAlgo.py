@@ -19,13 +19,32 @@ from threadpoolctl import threadpool_limits, threadpool_info
 import \
     scipy  # Note: 'user_api' for use in thread-limiting with statement around scipy annealing algo
 
+import numpy as np
 import time
 import itertools
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from core_algorithm.utils.gate_assignment import *
+from core_algorithm.utils.batch_scoring import BatchScorer
+from core_algorithm.utils.score_cache import ScoreCache
+from core_algorithm.utils.permutations import PermutationIndexer
+from core_algorithm.utils.parallel_search import *
+from core_algorithm.utils.assignment_moves import *
+from core_algorithm.utils.genetic_search import GeneticOperators
+from core_algorithm.utils.cross_entropy import CrossEntropySampler
+from core_algorithm.utils.tabu_search import TabuSearch
+from core_algorithm.utils.branch_and_bound import BranchAndBound, unsupported_reason
+from core_algorithm.utils.tree_assignment import TreeAssignment
+from core_algorithm.utils.beam_search import BeamSearch
+from core_algorithm.utils.portfolio import PortfolioRace
+from core_algorithm.utils.search_limits import SearchLimits, SearchLimitReached
+from core_algorithm.utils.stage_cache import StageCache, file_digest
+from core_algorithm.utils.stage_graph import StageGraph, PLOT_LOCK
 from core_algorithm.utils.logic_synthesis import *
 from core_algorithm.utils.netlist_class import Netlist
-from core_algorithm.utils.ucf_class import UCF
+from core_algorithm.utils.ucf_class import UCF, cached_ucf
 from core_algorithm.utils.make_eugene_script import *
 from core_algorithm.utils.dna_design import *
 from core_algorithm.utils.sbol_plot import plotter
@@ -49,6 +68,40 @@ def cello_initializer(v_name, ucf_name, in_name, out_name, in_path, out_path, op
         return e.to_dict()
 
 
+async def cello_initializer_async(v_name, ucf_name, in_name, out_name, in_path, out_path, options, executor=None):
+    """
+    As cello_initializer, but without blocking the event loop: YOSYS and dot run as asyncio subprocesses, and the other
+    stages (UCF parsing, gate assignment, miniEugene/Java calls, files & plots) run in the executor (see run_async).
+    NOTE: concurrent runs in one process share its loggers (each run reconfigures them), so their logs are mixed; see
+    app/server.py for runs in separate worker processes.
+
+    :param executor: concurrent.futures.Executor: None: the event loop's default (thread pool) executor
+    """
+    try:
+        start_time = time.time()
+        verilogs_path = os.path.join(in_path, 'verilogs')
+        constraints_path = os.path.join(in_path, 'constraints')
+        loop = asyncio.get_running_loop()
+        process = await loop.run_in_executor(executor, functools.partial(
+            CELLO3, v_name, ucf_name, in_name, out_name, verilogs_path, constraints_path, out_path,
+            {**(options or {}), 'run_stages': False}))
+        await process.run_async(executor)
+        log.cf.info(f'Completion Time: {round(time.time() - start_time, 1)} seconds')
+        print("\nCello completed execution")
+        return {'status': 'SUCCESS', 'msg': 'Cello process executed successfully'}
+    except CelloError as e:
+        return e.to_dict()
+
+
+# Options that may change the result of the gate assignment (part of its stage cache key)
+SEARCH_OPTIONS = ('exhaustive', 'total_iters', 'vectorized', 'batch_size', 'cache_size', 'anneal_starts', 'seed',
+                  'algorithm', 'cooling', 'temperature', 'population', 'elites', 'mutation_rate', 'convergence',
+                  'replicas', 'exchange_interval', 'portfolio', 'beam_width', 'samples', 'elite_fraction', 'smoothing',
+                  'tree_dp', 'tabu_steps', 'tabu_time', 'tabu_tenure', 'time_limit', 'patience')
+# Searches that find the same design(s) on every run, even without a seed
+DETERMINISTIC_ALGORITHMS = ('branch_and_bound', 'beam_search')
+
+
 class CelloError(Exception):
     def __init__(self, error_msg, exception):
         super().__init__(error_msg)
@@ -89,16 +142,50 @@ class CELLO3:
         # NOTE: Initialization
         try:
             # NOTE: SETTINGS (Defaults for specific Cello object; see __main__ at bottom for global program defaults)
-            yosys_cmd_choice = 1  # Set of cmds passed to YOSYS to convert Verilog to netlist & image generation
+            self.yosys_cmd_choice = 1  # Set of cmds passed to YOSYS to convert Verilog to netlist & image generation
             self.verbose = False  # Print more info to console & log. See logging.config to change verbosity
             self.print_iters = False  # Print to console info on *all* tested iters (produces copious amounts of text)
             self.exhaustive = False  # Run *all* possible permutes to find true optimum score (*long* run time)
             self.test_configs = False  # Runs brief tests of all configs, producing logs and a csv summary of all tests
             self.log_overwrite = False  # Removes date/time from file name, allowing overwrite of logs
             self.total_iters = 1_000  # Number of iterations to run Cello for
+            self.vectorized = False  # Score all truth table rows at once with NumPy (score_circuit_vectorized)
+            self.batch_size = 0  # If > 0, exhaustive search scores this many assignments per call (BatchScorer)
+            self.cache_size = 100_000  # Max number of scored assignments remembered (re-visits are not re-scored)
+            self.workers = 1  # Number of processes for exhaustive search & annealing starts (0: one per CPU core)
+            self.anneal_starts = 1  # Number of independent dual annealing runs (sharing the total_iters budget)
+            self.seed = None  # Seed for (multi-start) annealing; None: random (the seeds used are logged)
+            # Search if not exhaustive: 'dual_annealing' | 'discrete_annealing' | 'genetic' | 'replica_exchange' |
+            # 'cross_entropy' | 'beam_search' | 'random' | 'portfolio' (races the strategies listed in 'portfolio')
+            # (or the exact 'branch_and_bound', which replaces the exhaustive search)
+            self.algorithm = 'dual_annealing'
+            self.cooling = 'geometric'  # Discrete annealing schedule: 'geometric' | 'linear' | 'logarithmic'
+            self.temperature = (1.0, 0.01)  # Discrete annealing start & end temperature (in log10 score units)
+            self.population = 128  # Genetic algorithm: individuals per generation (scored as one batch)
+            self.elites = 4  # Genetic algorithm: best individuals carried over unchanged to the next generation
+            self.mutation_rate = 0.3  # Genetic algorithm: probability of mutating each part of a child's assignment
+            self.convergence = 200  # Genetic/cross-entropy: stop after this many generations without a better design
+            self.replicas = 8  # Replica exchange: number of chains (temperatures spaced geometrically, see temperature)
+            self.exchange_interval = 100  # Replica exchange: steps of each chain between exchanges of states
+            self.samples = 2048  # Cross-entropy: assignments sampled (and scored as one batch) per generation
+            self.elite_fraction = 0.1  # Cross-entropy: fraction of best samples the sampling distribution learns from
+            self.smoothing = 0.7  # Cross-entropy: weight of the elite samples in each update of the distribution
+            # Portfolio: searches ('algorithm' values) raced in separate processes, leaders getting more of the budget
+            self.portfolio = ['dual_annealing', 'discrete_annealing', 'genetic', 'cross_entropy', 'random']
+            self.beam_width = 64  # Beam search: partial assignments kept after each gate (run time grows linearly)
+            self.tree_dp = True  # Exact assignment by dynamic programming if the netlist is fanout-free (a tree)
+            self.tabu_steps = 0  # Tabu search after annealing: stop after this many steps without improvement (0: off)
+            self.tabu_time = 10.0  # Tabu search: max wall time (seconds; None: no limit)
+            self.tabu_tenure = 7  # Tabu search: steps during which a node cannot get back its previous group/part
+            self.time_limit = None  # Gate assignment: max wall time (seconds) of the search; None: no limit
+            self.patience = 0  # Gate assignment: stop after this many designs scored without a better one (0: off)
+            self.stage_cache_dir = None  # Folder where stage outputs are cached (reruns reuse them); None: no cache
+            self.stage_workers = 4  # Threads running the post-techmap stages (results, Eugene, plots...); 1: in order
+            self.reuse_ucf = False  # Reuse UCFs already parsed by this process (e.g. batch workers; see cached_ucf)
+            self.run_stages = True  # Run all stages on init (False: call run() or run_async() afterwards)
 
             if 'yosys_cmd_choice' in options:
-                yosys_cmd_choice = options['yosys_cmd_choice']
+                self.yosys_cmd_choice = options['yosys_cmd_choice']
             if 'verbose' in options:
                 self.verbose = options['verbose']
             if 'print_iters' in options:  # NOTE: Never prints to log (some configs have billions of iters)
@@ -112,6 +199,66 @@ class CELLO3:
                 self.exhaustive = options['exhaustive']
             if 'iterations' in options:
                 self.total_iters = options['iterations']
+            if 'vectorized' in options:
+                self.vectorized = options['vectorized']
+            if 'batch_size' in options:
+                self.batch_size = options['batch_size']
+            if 'cache_size' in options:
+                self.cache_size = options['cache_size']
+            if 'workers' in options:
+                self.workers = options['workers']
+            if 'anneal_starts' in options:
+                self.anneal_starts = options['anneal_starts']
+            if 'seed' in options:
+                self.seed = options['seed']
+            if 'algorithm' in options:
+                self.algorithm = options['algorithm']
+            if 'cooling' in options:
+                self.cooling = options['cooling']
+            if 'temperature' in options:
+                self.temperature = tuple(options['temperature'])
+            if 'population' in options:
+                self.population = options['population']
+            if 'elites' in options:
+                self.elites = options['elites']
+            if 'mutation_rate' in options:
+                self.mutation_rate = options['mutation_rate']
+            if 'convergence' in options:
+                self.convergence = options['convergence']
+            if 'replicas' in options:
+                self.replicas = options['replicas']
+            if 'exchange_interval' in options:
+                self.exchange_interval = options['exchange_interval']
+            if 'portfolio' in options:
+                self.portfolio = options['portfolio']
+            if 'beam_width' in options:
+                self.beam_width = options['beam_width']
+            if 'samples' in options:
+                self.samples = options['samples']
+            if 'elite_fraction' in options:
+                self.elite_fraction = options['elite_fraction']
+            if 'smoothing' in options:
+                self.smoothing = options['smoothing']
+            if 'tree_dp' in options:
+                self.tree_dp = options['tree_dp']
+            if 'tabu_steps' in options:
+                self.tabu_steps = options['tabu_steps']
+            if 'tabu_time' in options:
+                self.tabu_time = options['tabu_time']
+            if 'tabu_tenure' in options:
+                self.tabu_tenure = options['tabu_tenure']
+            if 'time_limit' in options:
+                self.time_limit = options['time_limit']
+            if 'patience' in options:
+                self.patience = options['patience']
+            if 'stage_cache_dir' in options:
+                self.stage_cache_dir = options['stage_cache_dir']
+            if 'stage_workers' in options:
+                self.stage_workers = options['stage_workers']
+            if 'reuse_ucf' in options:
+                self.reuse_ucf = options['reuse_ucf']
+            if 'run_stages' in options:
+                self.run_stages = options['run_stages']
 
             self.verilogs_path = os.path.abspath(verilogs_path)
             self.constraints_path = os.path.abspath(constraints_path)
@@ -123,10 +270,16 @@ class CELLO3:
             self.iter_count = 0
             self.best_score = 0
             self.best_graphs = []
+            self.start_design = None  # (i_perm, o_perm, g_perm) names a search starts from (e.g. in a portfolio race)
+            self.score_cache = ScoreCache(self.cache_size)
             self.units = 'Unknown_Units'
             self.conversions = {}
             self.filepath = os.path.join(out_path, self.verilog_name,
                                          f'{self.verilog_name}_{self.ucf_name[:-4]}')
+            self.stages = StageCache(self.stage_cache_dir, os.path.join(self.out_path, self.verilog_name)) \
+                if self.stage_cache_dir else None
+            self.stage_keys = {}  # stage: key (None if not cached), and the key of the design found
+            self.ucf_digest = None
             # Loggers
             log.config_logger(self.verilog_name, self.ucf_name, self.log_overwrite)
             log.reset_logs()
@@ -136,29 +289,146 @@ class CELLO3:
         except Exception as e:
             raise CelloError("Error with initialization", e)
 
-        # NOTE: Logic Synthesis (YOSYS)
-        try:
-            # yosys cmd set 1 seems best after trial & error
-            cont = call_YOSYS(self.verilogs_path, self.out_path, self.verilog_name,
-                              self.ucf_name[:-4], yosys_cmd_choice)
+        if self.run_stages:
+            self.run()
+
+    def run(self):
+        """
+        Runs all stages (each through the stage cache, if any; see 'stage_cache_dir' option).
+        """
+        self.run_logic_synthesis()
+        self.load_ucf()
+        iter_ = self.run_condition_check()
+        best_result = self.run_gate_assignment(iter_)
+        self.post_techmap_stages(best_result).run(self.stage_workers)
+        self.write_zipfile()  # NOTE: only once all the other output files are written
+        if self.stages is not None:
+            log.cf.info(f'Stages restored from cache: {self.stages.hits}; run: {self.stages.misses}')
+
+    async def run_async(self, executor=None):
+        """
+        As run(), as a coroutine: YOSYS and dot are awaited as asyncio subprocesses, and the other (blocking) stages are
+        run in the executor, so the event loop can serve other requests meanwhile.
+
+        :param executor: concurrent.futures.Executor: None: the event loop's default (thread pool) executor
+        """
+        loop = asyncio.get_running_loop()
+        await self.run_logic_synthesis_async()
+        await loop.run_in_executor(executor, self.load_ucf)
+        iter_ = await loop.run_in_executor(executor, self.run_condition_check)
+        best_result = await loop.run_in_executor(executor, self.run_gate_assignment, iter_)
+        await self.post_techmap_stages(best_result, asynchronous=True).run_async(executor)
+        await loop.run_in_executor(executor, self.write_zipfile)
+        if self.stages is not None:
+            log.cf.info(f'Stages restored from cache: {self.stages.hits}; run: {self.stages.misses}')
+
+    def post_techmap_stages(self, best_result, asynchronous: bool = False) -> StageGraph:
+        """
+        Stages following the gate assignment, and their dependencies: the Eugene > DNA design > SBOL branch (which
+        waits on miniEugene) runs alongside the results, truth table, and response plots.
+
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels) of the best design
+        :param asynchronous: bool: for StageGraph.run_async (the techmap diagram is then drawn by asyncio subprocesses)
+        :return: StageGraph
+        """
+        stages = StageGraph()
+        stages.add('results', functools.partial(self.write_design_results_async, best_result) if asynchronous
+                   else lambda: self.write_design_results(best_result))
+        stages.add('truth_table', lambda: self.write_truth_table(best_result))
+        stages.add('circuit_score', self.write_circuit_score)
+        stages.add('eugene', lambda: self.write_eugene_file(best_result))
+        stages.add('dna', self.write_dna_design, after=('eugene',))
+        stages.add('sbol', self.write_sbol_diagram, after=('dna', 'eugene'))
+        stages.add('plots', lambda tb: self.write_response_plots(best_result, tb), after=('truth_table',))
+        return stages
+
+    def __stage(self, stage: str, key, func, outputs: tuple = None):
+        """
+        Runs a stage, through the stage cache if there is one (see StageCache.run).
+
+        :param stage: str
+        :param key: str | None: key of the stage (None: not cached)
+        :param func: callable(): runs the stage and returns its result
+        :param outputs: tuple[str]: patterns of the files the stage writes (needed for stages run concurrently)
+        :return: result of the stage
+        """
+        self.stage_keys[stage] = key
+        return func() if self.stages is None else self.stages.run(stage, key, func, outputs)
 
-            print_centered('End of Logic Synthesis')
-            if not cont:
-                # raise an error
-                # break if run into problem with yosys, call_YOSYS() will show the error.
-                raise CelloError('Error with logic synthesis')
+    async def __stage_async(self, stage: str, key, func, outputs: tuple = None):
+        """
+        As __stage, for a stage run by a coroutine function (see StageCache.run_async).
+        """
+        self.stage_keys[stage] = key
+        return await (func() if self.stages is None else self.stages.run_async(stage, key, func, outputs))
 
-            # initialize RG from netlist JSON output from Yosys
-            self.rnl = self.__load_netlist()
+    def run_logic_synthesis(self):
+        """
+        Logic synthesis (YOSYS): Verilog to netlist (self.rnl) and circuit diagram.
+        Stage key: Verilog file contents & YOSYS command set.
+        """
+        try:
+            # yosys cmd set 1 seems best after trial & error
+            cont = self.__stage('yosys', self.__yosys_key(),
+                                lambda: call_YOSYS(self.verilogs_path, self.out_path, self.verilog_name,
+                                                   self.ucf_name[:-4], self.yosys_cmd_choice))
+            self.__load_synthesis(cont)
+        except Exception as e:
+            raise CelloError('Error with logic synthesis', e)
 
-            if not self.rnl:
-                raise CelloError('Error with logic synthesis')
+    async def run_logic_synthesis_async(self):
+        """
+        As run_logic_synthesis, with YOSYS run as an asyncio subprocess.
+        """
+        try:
+            cont = await self.__stage_async('yosys', self.__yosys_key(),
+                                            lambda: call_YOSYS_async(self.verilogs_path, self.out_path,
+                                                                     self.verilog_name, self.ucf_name[:-4],
+                                                                     self.yosys_cmd_choice))
+            self.__load_synthesis(cont)
         except Exception as e:
             raise CelloError('Error with logic synthesis', e)
 
-        # NOTE: Initializes UCF, Input, and Output from filepaths
+    def __yosys_key(self):
+        """
+        :return: str | None: stage key of the logic synthesis (the output folder is re-initialized if it is cached)
+        """
+        out_dir = os.path.join(self.out_path, self.verilog_name)
+        v_file = self.verilog_name if self.verilog_name.endswith('.v') else self.verilog_name + '.v'
+        v_path = os.path.join(self.verilogs_path, v_file)
+        key = StageCache.key('yosys', file_digest(v_path), self.yosys_cmd_choice, self.verilog_name,
+                             self.ucf_name) if os.path.isfile(v_path) else None
+        if self.stages is not None and key is not None and self.stages.contains('yosys', key):
+            # NOTE: the output folder is re-initialized, as call_YOSYS does
+            shutil.rmtree(out_dir, ignore_errors=True)
+            os.makedirs(out_dir)
+        return key
+
+    def __load_synthesis(self, cont: bool):
+        """
+        Loads the netlist written by YOSYS.
+
+        :param cont: bool: whether YOSYS ran
+        """
+        print_centered('End of Logic Synthesis')
+        if not cont:
+            # raise an error
+            # break if run into problem with yosys, call_YOSYS() will show the error.
+            raise CelloError('Error with logic synthesis')
+
+        # initialize RG from netlist JSON output from Yosys
+        self.rnl = self.__load_netlist()
+
+        if not self.rnl:
+            raise CelloError('Error with logic synthesis')
+
+    def load_ucf(self):
+        """
+        Initializes UCF, Input, and Output from filepaths (and the units & unit conversions of the outputs).
+        """
         try:
-            self.ucf = UCF(self.constraints_path, self.ucf_name, self.in_name, self.out_name)
+            self.ucf = (cached_ucf if self.reuse_ucf else UCF)(self.constraints_path, self.ucf_name, self.in_name,
+                                                               self.out_name)
             units = self.ucf.query_top_level_collection(self.ucf.UCFout, 'measurement_std')
             if units:
                 self.units = units[0]['signal_carrier_units']
@@ -170,6 +440,7 @@ class CELLO3:
                     log.cf.warning('Cannot find units...')
             if not self.ucf.valid:
                 raise CelloError('Error with UCF')
+            self.ucf_digest = [file_digest(path) for path in self.ucf.paths()]
             conversions = self.ucf.query_top_level_collection(self.ucf.UCFout, 'models')
             for gate in conversions:
                 print(gate['name'][:-6])
@@ -178,7 +449,12 @@ class CELLO3:
         except Exception as e:
             raise CelloError('Error reading UCF', e)
 
-        # NOTE: Verilog/UCF Compatibility Check
+    def run_condition_check(self) -> int:
+        """
+        Verilog/UCF compatibility check.
+
+        :return: int: number of possible assignments
+        """
         try:
             valid: bool
             iter_: int
@@ -188,22 +464,31 @@ class CELLO3:
             log.cf.info(f'\nCondition check passed? {valid}\n')
         except Exception as e:
             raise CelloError('Error with Verilog/UCF compatibility check', e)
+        return iter_
 
-        # NOTE: Circuit Scoring
+    def run_gate_assignment(self, iter_: int):
+        """
+        Circuit scoring (techmap).
+        Stage key: netlist, UCF files, and search options; searches depending on an unseeded random number generator
+        are not cached.
+
+        :param iter_: int
+        :return: tuple: (circuit_score, graph, tb, tb_labels) of the best design
+        """
         try:
-            best_result = self.techmap(iter_)  # Executing the algorithm if things check out
+            deterministic = self.seed is not None or self.exhaustive or self.algorithm in DETERMINISTIC_ALGORITHMS
+            key = StageCache.key('techmap', self.stage_keys['yosys'], self.ucf_digest,
+                                 {option: getattr(self, option) for option in SEARCH_OPTIONS}) \
+                if deterministic and self.stage_keys['yosys'] is not None else None
+
+            def techmap():
+                best = self.techmap(iter_)  # Executing the algorithm if things check out
+                return best, self.best_score, self.iter_count
+
+            (best_result, self.best_score, self.iter_count) = self.__stage('techmap', key, techmap)
             if best_result is None:
                 log.cf.error('\nProblem with best_result...\n')
                 raise CelloError('Problem with best result')
-            # best_score = best_result[0]
-            best_graph = best_result[1]
-            truth_table = best_result[2]
-            truth_table_labels = best_result[3]
-
-            graph_inputs_for_printing = list(zip(self.rnl.inputs, best_graph.inputs))
-            graph_gates_for_printing = list(zip(self.rnl.gates, best_graph.gates))
-            graph_outputs_for_printing = list(zip(self.rnl.outputs, best_graph.outputs))
-            # NOTE: only rnl Gate nodes are dictionaries with inputs and outputs; Input and Output nodes are lists
 
             if self.verbose:
                 debug_print(
@@ -212,56 +497,107 @@ class CELLO3:
         except Exception as e:
             raise CelloError('Error with circuit scoring', e)
 
-        # NOTE: RESULTS/CIRCUIT DESIGN
-        try:
-            print_centered(['RESULTS', self.verilog_name + ' + ' + self.ucf_name])
-            log.cf.info(f'CIRCUIT DESIGN:\n'
-                        f' - Best Design: {best_result[1]}\n'
-                        f' - Best Circuit Score: {self.best_score}')
+        # NOTE: post-processing stages are keyed by the design itself (found by any search, cached or not)
+        (_, best_graph, truth_table, truth_table_labels) = best_result
+        self.stage_keys['design'] = StageCache.key('design', self.stage_keys['yosys'], self.ucf_digest,
+                                                   self.best_score, str(best_graph), truth_table_labels, truth_table)
+        return best_result
 
-            if self.best_score == 0.0:
-                log.cf.error('ERROR: Cello was unable to find any valid configurations...')
-                raise Exception
+    def __printing_pairs(self, best_graph):
+        """
+        :return: tuple of 3 lists: (rnl node, graph node) pairs of the inputs, gates, and outputs
+        """
+        # NOTE: only rnl Gate nodes are dictionaries with inputs and outputs; Input and Output nodes are lists
+        return (list(zip(self.rnl.inputs, best_graph.inputs)), list(zip(self.rnl.gates, best_graph.gates)),
+                list(zip(self.rnl.outputs, best_graph.outputs)))
 
-            log.cf.info(f'\nInputs ( input response = {best_graph.inputs[0].resp_func_eq} ):')
-            in_labels = {}
-            for rnl_in, g_in in graph_inputs_for_printing:
-                log.cf.info(
-                    f' - {rnl_in} {str(g_in)} with max sensor output of {str(list(g_in.out_scores.items()))}')
-                in_labels[rnl_in[0]] = g_in.name
+    def write_design_results(self, best_result):
+        """
+        RESULTS/CIRCUIT DESIGN: logs the best design, and labels the techmap diagram with its parts.
+        Stage key (diagram): design.
 
-            log.cf.info(f'\nGates ( response function = {best_graph.gates[0].response_func};   '
-                        f'input composition = {best_graph.gates[0].input_comp} ):')
-            gate_labels = {}
-            for rnl_g, g_g in graph_gates_for_printing:
-                log.cf.info(f' - {rnl_g} {g_g}')
-                gate_labels[rnl_g] = g_g.gate_in_use
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels)
+        """
+        try:
+            labels = self.__design_labels(best_result)
+            self.__stage('diagram', StageCache.key('diagram', self.stage_keys['design']),
+                         lambda: replace_techmap_diagram_labels(*labels), outputs=('*_yosys.*', '*_tech-mapping.*'))
+        except Exception as e:
+            log.cf.error('Error with results/circuit design\n')
+            raise CelloError('Error with results/circuit design', e)
 
-            log.cf.info(f'\nOutputs ( unit conversion and/or hill response... ):')
-            out_labels = {}
-            for rnl_out, g_out in graph_outputs_for_printing:
-                log.cf.info(f' - {rnl_out} {str(g_out)}')
-                out_labels[rnl_out[0]] = g_out.name
-            tech_diagram_filepath = os.path.join(self.out_path, v_name,
-                                                 f'{self.verilog_name}_{self.ucf_name[:-4]}')
-            replace_techmap_diagram_labels(tech_diagram_filepath, gate_labels, in_labels,
-                                           out_labels)
+    async def write_design_results_async(self, best_result):
+        """
+        As write_design_results, with the techmap diagram drawn by dot as asyncio subprocesses.
+        """
+        try:
+            labels = self.__design_labels(best_result)
+            await self.__stage_async('diagram', StageCache.key('diagram', self.stage_keys['design']),
+                                     lambda: replace_techmap_diagram_labels_async(*labels),
+                                     outputs=('*_yosys.*', '*_tech-mapping.*'))
         except Exception as e:
             log.cf.error('Error with results/circuit design\n')
             raise CelloError('Error with results/circuit design', e)
 
-        # NOTE: TRUTH TABLE/GATE SCORING
+    def __design_labels(self, best_result) -> tuple:
+        """
+        Logs the best design.
+
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels)
+        :return: tuple: techmap diagram path, and labels of its gates, inputs, and outputs (parts of the design)
+        """
+        best_graph = best_result[1]
+        (graph_inputs_for_printing, graph_gates_for_printing,
+         graph_outputs_for_printing) = self.__printing_pairs(best_graph)
+        print_centered(['RESULTS', self.verilog_name + ' + ' + self.ucf_name])
+        log.cf.info(f'CIRCUIT DESIGN:\n'
+                    f' - Best Design: {best_result[1]}\n'
+                    f' - Best Circuit Score: {self.best_score}')
+
+        if self.best_score == 0.0:
+            log.cf.error('ERROR: Cello was unable to find any valid configurations...')
+            raise Exception
+
+        log.cf.info(f'\nInputs ( input response = {best_graph.inputs[0].resp_func_eq} ):')
+        in_labels = {}
+        for rnl_in, g_in in graph_inputs_for_printing:
+            log.cf.info(
+                f' - {rnl_in} {str(g_in)} with max sensor output of {str(list(g_in.out_scores.items()))}')
+            in_labels[rnl_in[0]] = g_in.name
+
+        log.cf.info(f'\nGates ( response function = {best_graph.gates[0].response_func};   '
+                    f'input composition = {best_graph.gates[0].input_comp} ):')
+        gate_labels = {}
+        for rnl_g, g_g in graph_gates_for_printing:
+            log.cf.info(f' - {rnl_g} {g_g}')
+            gate_labels[rnl_g] = g_g.gate_in_use
+
+        log.cf.info(f'\nOutputs ( unit conversion and/or hill response... ):')
+        out_labels = {}
+        for rnl_out, g_out in graph_outputs_for_printing:
+            log.cf.info(f' - {rnl_out} {str(g_out)}')
+            out_labels[rnl_out[0]] = g_out.name
+        tech_diagram_filepath = os.path.join(self.out_path, self.verilog_name,
+                                             f'{self.verilog_name}_{self.ucf_name[:-4]}')
+        return tech_diagram_filepath, gate_labels, in_labels, out_labels
+
+    def write_truth_table(self, best_result) -> list:
+        """
+        TRUTH TABLE/GATE SCORING: prints the truth table and writes it (activity table csv).
+
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels)
+        :return: list: truth table, with its labels as first row
+        """
         try:
             # Create the full path for the file
-            filepath = os.path.join(out_path, self.verilog_name,
-                                    f'{self.verilog_name}_{self.ucf_name[:-4]}')
+            filepath = self.filepath
 
             # Ensure the directory exists
             directory_path = os.path.dirname(filepath)
             os.makedirs(directory_path, exist_ok=True)
 
             log.cf.info(f'\n\nTRUTH TABLE/GATE SCORING:')
-            tb = [truth_table_labels] + truth_table
+            tb = [best_result[3]] + best_result[2]
             print_table(tb)
             print('(See log for more precision)')
 
@@ -285,11 +621,15 @@ class CELLO3:
         except Exception as e:
             raise CelloError(
                 'Error with generating truth table/gate scoring', e)
+        return tb
 
-        # NOTE: CIRCUIT SCORE FILE
+    def write_circuit_score(self):
+        """
+        CIRCUIT SCORE FILE
+        """
         try:
-            fullpath = os.path.join(os.path.dirname(filepath),
-                                    f"{os.path.basename(filepath)}_circuit-score.csv")
+            fullpath = os.path.join(os.path.dirname(self.filepath),
+                                    f"{os.path.basename(self.filepath)}_circuit-score.csv")
 
             with open(fullpath, 'w', newline='') as csvfile:
                 csv_writer = csv.writer(csvfile)
@@ -297,10 +637,18 @@ class CELLO3:
         except Exception as e:
             raise CelloError('Error with generating circuit score file', e)
 
-        # NOTE: EUGENE FILE
-        try:
-            eugene = EugeneObject(self.ucf, graph_inputs_for_printing, graph_gates_for_printing,
-                                  graph_outputs_for_printing, best_graph)
+    def write_eugene_file(self, best_result) -> tuple:
+        """
+        EUGENE FILE
+        Stage key: design.
+
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels)
+        :return: tuple: structs, cassettes, sequences, device_rules, circuit_rules, fenceposts (Eugene helpers)
+        """
+        filepath = self.filepath
+
+        def eugene_file():
+            eugene = EugeneObject(self.ucf, *self.__printing_pairs(best_result[1]), best_result[1])
             log.cf.info('\n\nEUGENE FILES:')
             if eugene.generate_eugene_structs():
                 log.cf.info(" - Eugene object and structs created...")
@@ -312,13 +660,26 @@ class CELLO3:
                 log.cf.info(" - Eugene helpers created...")
             if eugene.write_eugene(filepath + "_eugene.eug"):
                 log.cf.info(f" - Eugene script written to {filepath}_eugene.eug")
+            return structs, cassettes, sequences, device_rules, circuit_rules, fenceposts
+
+        try:
+            return self.__stage('eugene', StageCache.key('eugene', self.stage_keys['design']), eugene_file,
+                                outputs=('*_eugene.eug',))
         except Exception as e:
             raise CelloError('Error with generating eugene file', e)
 
-        # NOTE: DNA DESIGN
-        try:
-            dna_designs = DNADesign(structs, cassettes, sequences, device_rules, circuit_rules,
-                                    fenceposts)
+    def write_dna_design(self, eugene_helpers: tuple) -> list:
+        """
+        DNA DESIGN (part orders from miniEugene, and DNA design files).
+        Stage key: Eugene file stage key.
+
+        :param eugene_helpers: tuple: see write_eugene_file
+        :return: list: part orders
+        """
+        filepath = self.filepath
+
+        def dna_design():
+            dna_designs = DNADesign(*eugene_helpers)
             dna_designs.prep_to_get_part_orders()
             mini_eugene_part_orders = dna_designs.get_part_orders()  # Calls miniEugene
             dna_designs.write_dna_parts_info(filepath)
@@ -326,11 +687,26 @@ class CELLO3:
             dna_designs.write_plot_params(filepath)
             dna_designs.write_regulatory_info(filepath)
             dna_designs.write_dna_sequences(filepath)
+            return mini_eugene_part_orders
+
+        try:
+            return self.__stage('dna', StageCache.key('dna', self.stage_keys['eugene']), dna_design,
+                                outputs=('*_dpl-*.csv', '*_dna-sequences.csv'))
         except Exception as e:
             raise CelloError('Error with generating DNA design', e)
 
-        # NOTE: SBOL DIAGRAM
-        try:
+    def write_sbol_diagram(self, mini_eugene_part_orders: list, eugene_helpers: tuple):
+        """
+        SBOL DIAGRAM (SBOL XML, and DNA plot of the design).
+        Stage key: DNA design stage key.
+
+        :param mini_eugene_part_orders: list: see write_dna_design
+        :param eugene_helpers: tuple: see write_eugene_file
+        """
+        filepath = self.filepath
+        sequences = eugene_helpers[2]
+
+        def sbol_diagram():
             # SBOL XML
             sbol_instance = SBOL(filepath, mini_eugene_part_orders[0],
                                  sequences)  # TODO: loop part orders
@@ -350,31 +726,60 @@ class CELLO3:
             dpl_pdf_file = os.path.join(base_dir, f"{os.path.basename(filepath)}_dpl-sbol.pdf")
 
             print(' - ', end='')
-            plotter(plot_parameters_file, dpl_part_info_file, dpl_reg_info_file,
-                    dpl_dna_designs_file, dpl_png_file, dpl_pdf_file)
+            with PLOT_LOCK:
+                plotter(plot_parameters_file, dpl_part_info_file, dpl_reg_info_file,
+                        dpl_dna_designs_file, dpl_png_file, dpl_pdf_file)
 
             log.cf.info('SBOL XML and related files generated')
+
+        try:
+            self.__stage('sbol', StageCache.key('sbol', self.stage_keys['dna']), sbol_diagram,
+                         outputs=('*_pySBOL3.*', '*_dpl-sbol.*'))
         except Exception as e:
             raise CelloError('Error with generating SBOL diagram', e)
 
-        # NOTE: PLOTS
-        try:
-            plot_name = self.verilog_name + ' + ' + self.ucf_name
-            plot_bars(filepath, plot_name, best_graph, tb, self.units, self.conversions)
+    def write_response_plots(self, best_result, tb: list):
+        """
+        PLOTS (response plots of the design).
+        Stage key: design, units, and unit conversions.
+
+        :param best_result: tuple: (circuit_score, graph, tb, tb_labels)
+        :param tb: list: see write_truth_table
+        """
+        plot_name = self.verilog_name + ' + ' + self.ucf_name
+
+        def response_plots():
+            with PLOT_LOCK:
+                plot_bars(self.filepath, plot_name, best_result[1], tb, self.units, self.conversions)
             log.cf.info(' - Response plots generated\n\n')
+
+        try:
+            self.__stage('plots', StageCache.key('plots', self.stage_keys['design'], plot_name, self.units,
+                                                 self.conversions), response_plots,
+                         outputs=('*_response-plots.*',))
         except Exception as e:
             log.cf.error(
                 f'Unable to generate response plots:\n{e}', exc_info=True)
             raise CelloError('Error with generating response plots', e)
 
-        # NOTE: ZIPFILE
-        try:
-            archive_name = os.path.join(
-                out_path, f"{self.verilog_name}_{self.ucf_name[:-4]}_all-files")
-            target_directory = os.path.join(out_path, self.verilog_name)
+    def write_zipfile(self):
+        """
+        ZIPFILE of all output files.
+        Stage key: keys of the other stages (not cached if one of them was not).
+        """
+        archive_name = os.path.join(
+            self.out_path, f"{self.verilog_name}_{self.ucf_name[:-4]}_all-files")
+        target_directory = os.path.join(self.out_path, self.verilog_name)
 
+        def zipfile():
             shutil.make_archive(archive_name, 'zip', target_directory)
             shutil.move(f"{archive_name}.zip", target_directory)
+
+        # NOTE: the techmap stage key is not needed (the design key covers its result); sorted, since the other
+        # stages may finish in any order
+        keys = [key for (stage, key) in sorted(self.stage_keys.items()) if stage != 'techmap']
+        try:
+            self.__stage('zip', StageCache.key('zip', *keys) if None not in keys else None, zipfile)
         except Exception as e:
             raise CelloError('Error with generating zipfile', e)
 
@@ -468,7 +873,7 @@ class CELLO3:
             # NOTE: below assumes that all gates in our UCFs are 'NOR' gates (currently)
             gate_names.append(gate['name'])
             g_list.append(gate['group'])
-        g_list = list(set(g_list))
+        g_list = list(dict.fromkeys(g_list))  # NOTE: in UCF order (a set would depend on the hash seed)
         num_groups = len(g_list)
         # numFunctions = len(self.ucf.query_top_level_collection(self.ucf.UCFmain, 'functions'))
         if verbose:
@@ -556,7 +961,7 @@ class CELLO3:
         for gate in gates:
             # NOTE: below assumes that all gates in our UCFs are 'NOR' gates
             g_list.append(gate['group'])
-        g_list = list(set(g_list))
+        g_list = list(dict.fromkeys(g_list))  # NOTE: in UCF order (a set would depend on the hash seed)
 
         log.cf.info('\nListing available assignments from UCF: ')
         log.cf.info(i_list)
@@ -569,6 +974,7 @@ class CELLO3:
         log.cf.info(circuit.inputs)
         log.cf.info(circuit.gates)
         log.cf.info(circuit.outputs)
+        log.cf.info(circuit.plan)  # NOTE: evaluation order & Boolean truth table shared by all assignments
 
         log.cf.info('\nNetlist requirements: ')
         i = len(self.rnl.inputs)
@@ -579,13 +985,15 @@ class CELLO3:
         log.cf.info(f'need {g} gates')
         # NOTE: ^ This is the input to whatever algorithm to use
 
+        # NOTE: the deadline covers the whole gate assignment (including fallbacks & tabu refinement)
+        self.limits = SearchLimits(self.time_limit, self.patience)
+        self.limits.start()
+
         # best_assignments = []
-        if not self.exhaustive:
-            best_assignments = self.simulated_annealing_assign(
-                i_list, o_list, g_list, i, o, g, circuit, iter_)
+        if self.tree_dp and self.rnl.is_fanout_free():
+            best_assignments = self.tree_assign(i_list, o_list, g_list, i, o, g, circuit, iter_)
         else:
-            best_assignments = self.exhaustive_assign(
-                i_list, o_list, g_list, i, o, g, circuit, iter_)
+            best_assignments = self.search_assign(i_list, o_list, g_list, i, o, g, circuit, iter_)
 
         print_centered('End of GATE ASSIGNMENT')
         log.cf.info('\n')
@@ -593,12 +1001,155 @@ class CELLO3:
         return max(best_assignments, key=lambda x: x[0]) if len(
             best_assignments) > 0 else best_assignments
 
+    def search_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                      netgraph: GraphParser, iter_: int) -> list:
+        """
+        Runs the gate-assignment search selected by the options (exhaustive, algorithm, anneal_starts, workers, ...).
+
+        :param i_list: list of available inputs
+        :param o_list: list of available outputs
+        :param g_list: list of available gates
+        :param i: int of required inputs
+        :param o: int of required outputs
+        :param g: int of required gates
+        :param netgraph: GraphParser of circuit parameters
+        :param iter_: int of total possible configurations
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        if self.algorithm == 'branch_and_bound':
+            best_assignments = self.branch_and_bound_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'portfolio':
+            best_assignments = self.portfolio_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'genetic':
+            best_assignments = self.genetic_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'cross_entropy':
+            best_assignments = self.cross_entropy_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'random':
+            best_assignments = self.random_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'beam_search':
+            best_assignments = self.beam_search_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.algorithm == 'replica_exchange':
+            best_assignments = self.replica_exchange_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive and self.anneal_starts > 1:
+            best_assignments = self.multistart_annealing_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif not self.exhaustive:
+            best_assignments = self.simulated_annealing_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif self.workers != 1:
+            best_assignments = self.parallel_exhaustive_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        elif self.batch_size > 0:
+            best_assignments = self.batch_exhaustive_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        else:
+            best_assignments = self.exhaustive_assign(
+                i_list, o_list, g_list, i, o, g, netgraph, iter_)
+        return best_assignments
+
+    def portfolio_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                         netgraph: GraphParser, iter_: int) -> list:
+        """
+        Races the searches listed in the 'portfolio' option (values of the 'algorithm' option), each in its own
+        worker process, on a shared budget of total_iters designs (see PortfolioRace): in each round, the strategies
+        still in the race run with an equal share of the round's budget (and a new seed); then the worse half is
+        cancelled, so the leading strategy gets most of the remaining budget.  The best score of each strategy versus
+        time is logged, and the overall best designs are returned (refined by tabu search if tabu_steps > 0).
+
+        Each run of a strategy starts from its best design so far (start_design: the initial state of the annealing
+        searches, a member of the first genetic / cross-entropy generation), but its other state (population, sampling
+        distribution, temperature, score cache) is not kept between rounds.  Strategies are cancelled at the end of a
+        round only: their runs of that round are not interrupted.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+        race = PortfolioRace(self.portfolio, max_fun)
+        print_centered(f'Running PORTFOLIO of gate-assignment algorithms ({", ".join(race.strategies)})...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        seed_seq = np.random.SeedSequence(self.seed)
+        log.cf.info(f'Portfolio base seed: {seed_seq.entropy}')
+
+        self.best_score, self.best_graphs, self.iter_count = 0, [], 0
+        designs = set()
+        starts = {}  # strategy: its best design so far, (i_perm, o_perm, g_perm) names, which its next run starts from
+        start = time.perf_counter()
+        reason = f'scored {max_fun:,} designs'
+        with ProcessPoolExecutor(max_workers=len(race.strategies), initializer=init_worker,
+                                 initargs=(self,)) as pool:
+            while not race.done():
+                if self.limits.reason() is not None:
+                    reason = self.limits.reason()
+                    break
+                shares = race.shares()
+                seeds = [int(child.generate_state(1)[0]) for child in seed_seq.spawn(len(shares))]
+                futures = {pool.submit(portfolio_run, strategy, seed, (i_list, o_list, g_list), (i, o, g), netgraph,
+                                       iter_, share, starts.get(strategy)): strategy
+                           for (strategy, share), seed in zip(shares.items(), seeds) if share > 0}
+                results = {}
+                for future in as_completed(futures):
+                    strategy = futures[future]
+                    results[strategy] = (best_score, best_graphs, iter_count, _) = future.result()
+                    race.record(strategy, best_score, iter_count, time.perf_counter() - start)
+                    if best_graphs and best_score >= race.best[strategy]:
+                        graph = best_graphs[0][1]
+                        starts[strategy] = tuple(tuple(n.name for n in nodes)
+                                                 for nodes in (graph.inputs, graph.outputs, graph.gates))
+
+                # NOTE: results are merged in strategy order (independent of which run finishes first)
+                for strategy, (best_score, best_graphs, iter_count, run_time) in sorted(
+                        results.items(), key=lambda item: race.strategies.index(item[0])):
+                    log.cf.info(f'Round {race.round + 1}, {strategy}: best score {best_score} after '
+                                f'{iter_count:,}/{shares[strategy]:,} designs ({run_time:.2f} s)')
+                    self.iter_count += iter_count
+                    if best_score > self.best_score:
+                        self.best_score, self.best_graphs, designs = best_score, [], set()
+                    if best_score == self.best_score:
+                        for best_graph in best_graphs:
+                            if repr(best_graph[1]) not in designs:  # same design may be found by several runs
+                                designs.add(repr(best_graph[1]))
+                                self.best_graphs.append(best_graph)
+                if sum(result[2] for result in results.values()) == 0:
+                    reason = 'no strategy scored new designs'
+                    break
+                if len(race.strategies) > 1:
+                    log.cf.info(f'Cancelled: {", ".join(race.eliminate())} (leader: {race.leader()})')
+
+        log.cf.info('\nBest score vs. time (s, best score, designs scored) of each strategy:')
+        for strategy, history in race.history.items():
+            log.cf.info(f'{strategy}: ' + ', '.join(f'({t:.2f}, {best:.4g}, {scored:,})'
+                                                    for (t, best, scored) in history))
+        log.cf.info(f'\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Stopped: {reason}\n'
+                    f'Leading strategy: {race.leader()}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+        if self.tabu_steps > 0:
+            self.tabu_refine(perms, netgraph)
+
+        return self.best_graphs
+
     def simulated_annealing_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int,
                                    g: int,
                                    netgraph: GraphParser, iter_: int) -> list:
         """
-        Uses scipy's dual annealing func to efficiently find a regional optimum.
-        (See notes on Dual Annealing below...)
+        Uses scipy's dual annealing func (or discrete annealing, see 'algorithm' option) to efficiently find a regional
+        optimum. (See notes on Dual Annealing below...)
 
         :param i_list: list of available inputs
         :param o_list: list of available outputs
@@ -612,65 +1163,606 @@ class CELLO3:
         """
         with threadpool_limits(limits=1, user_api='blas'):  # TODO: Needed?
             print_centered('Running SIMULATED ANNEALING gate-assignment algorithm...')
-            i_perms, o_perms, g_perms = [], [], []
-            # TODO: Optimize permutation arrays
-            for i_perm in itertools.permutations(i_list, i):
-                i_perms.append(i_perm)
-            for o_perm in itertools.permutations(o_list, o):
-                o_perms.append(o_perm)
-            for g_perm in itertools.permutations(g_list, g):
-                g_perms.append(g_perm)
+            # NOTE: permutations are unranked on demand (the permutation space is never materialized)
+            i_perms = PermutationIndexer(i_list, i)
+            o_perms = PermutationIndexer(o_list, o)
+            g_perms = PermutationIndexer(g_list, g)
             max_fun = iter_ if iter_ < self.total_iters else self.total_iters
-            max_iter = max_fun
-
-            # DUAL ANNEALING SCIPY FUNC
-            def func(x):
-                return self.prep_assign_for_scoring(x, (
-                i_perms, o_perms, g_perms, netgraph, i, o, g, max_fun))
 
-            lo = [0, 0, 0]
-            hi = [len(i_perms), len(o_perms), len(g_perms)]
-            # NOTE: Not possible to add integrality constraint; just round to int instead; adds only minor inefficiency
-            bounds = scipy.optimize.Bounds(lo, hi,
-                                           True)  # Alternatively: bounds = list(zip(lo, hi))
-            # TODO: CK: Implement seed (test in simplified script; test other scipy func seeding)
-            # TODO: CK: Implement toxicity check...
-
-            ret = scipy.optimize.dual_annealing(func, bounds, maxfun=max_fun, maxiter=max_iter)
-            """
-            Dual Annealing: https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.dual_annealing.html
-            Dual Annealing combines Classical Simulated Annealing, Fast Simulated Annealing, and local search optimizations
-            to improve upon the standard simulated annealing technique. The algorithm does not guarantee a global optimal 
-            score but can find a good regional optimum in far less time than would be required by exhaustive search.
-            
-            Key Parameters:
-            :param func:    Function of form func(x, *args) with return value that dual_annealing is attempting to optimize
-            :param bounds:  Upper and lower bounds for each dimension/variable being passed into func
-            :param maxiter: Max number of ~global searches (to identify neighborhoods with potential local maxima)
-            :param max_fun: Max number of total function calls/circuit iterations, including local minimization searches
-            :param no_local_search: Enable to function more like traditional simulated annealing
-            Note: Additional parameters specified in URL above...
-    
-            :return OptimizeResult: Array including the solution input array, best score, number of iterations run, and a 
-            message indicating the specific reason for termination, among additional attributes specified here...
-            docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.OptimizeResult.html#scipy.optimize.OptimizeResult  
-            """
+            if self.seed is not None:
+                log.cf.info(f'Annealing seed: {self.seed}')
+            reason = self.run_annealing((i_perms, o_perms, g_perms), netgraph, i, o, g, max_fun, self.seed)
 
             # TODO: CK: Capture multiple equivalent optimums
             # self.best_graphs = ret.x     # solution inputs (already stored in object attribute)
-            # solution score (reverses inversion from prep_assign_for_scoring)
-            self.best_score = -ret.fun
+            # NOTE: best score is kept by prep_assign_for_scoring (-ret.fun, unless stopped by the iteration budget)
             # count = ret.nfev     # number of func executions
-            # reason = ret.message # reason for termination
             log.cf.info(f'\n\nDONE!\n'
                         f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                        f'Stopped: {reason}\n'
+                        f'{self.score_cache.info()}\n'
                         f'Best Score: {self.best_score}')
+            if self.tabu_steps > 0:
+                self.tabu_refine((i_perms, o_perms, g_perms), netgraph)
 
             # global mem_usage
             # mem_usage = memory_usage(-1, interval=.1, timeout=0.1)
 
         return self.best_graphs
 
+    def multistart_annealing_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                                    netgraph: GraphParser, iter_: int) -> list:
+        """
+        Runs anneal_starts independent dual annealing searches, each with its own (logged) seed and an equal share
+        of the total_iters budget, in worker processes (see 'workers' option).  The best designs of all runs are
+        merged in seed order, so a run is reproducible by passing the logged base seed as the 'seed' option.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        starts = self.anneal_starts
+        workers = min(resolve_workers(self.workers), starts)
+        print_centered(f'Running SIMULATED ANNEALING gate-assignment algorithm ({starts} starts)...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+        shares = [max_fun // starts + (1 if s < max_fun % starts else 0) for s in range(starts)]
+        seed_seq = np.random.SeedSequence(self.seed)
+        seeds = [int(child.generate_state(1)[0]) for child in seed_seq.spawn(starts)]
+        log.cf.info(f'Annealing base seed: {seed_seq.entropy} (run seeds: {seeds})')
+
+        tasks = [(seed, perms, netgraph, i, o, g, share) for seed, share in zip(seeds, shares) if share > 0]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(self,)) as pool:
+                results = list(pool.map(anneal_start, *zip(*tasks)))
+        else:
+            score_cache = self.score_cache  # each run starts from an empty cache of the same size
+            init_worker(self)
+            results = [anneal_start(*task) for task in tasks]
+            self.score_cache = score_cache
+
+        self.best_score, self.best_graphs, self.iter_count = 0, [], 0
+        designs = set()
+        for (seed, *_), (best_score, best_graphs, iter_count, reason, (hits, misses)) in zip(tasks, results):
+            log.cf.info(f'Seed {seed}: best score {best_score} after {iter_count:,} designs '
+                        f'({hits:,} cache hits, {misses:,} misses); stopped: {reason}')
+            self.iter_count += iter_count
+            if best_score > self.best_score:
+                self.best_score, self.best_graphs, designs = best_score, [], set()
+            if best_score == self.best_score:
+                for best_graph in best_graphs:
+                    if repr(best_graph[1]) not in designs:  # same design may be found by several runs
+                        designs.add(repr(best_graph[1]))
+                        self.best_graphs.append(best_graph)
+
+        log.cf.info(f'\n\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+        if self.tabu_steps > 0:
+            self.tabu_refine(perms, netgraph)
+
+        return self.best_graphs
+
+    def genetic_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                       netgraph: GraphParser, iter_: int) -> list:
+        """
+        Genetic algorithm: evolves a population of assignments (see GeneticOperators) with elitism, tournament
+        selection, permutation-preserving crossover, and swap/replace mutations.  Each generation is scored as one
+        batch by the BatchScorer; designs already scored are not re-scored (nor counted as another iteration).
+        Stops after total_iters distinct designs, or once the best score has not improved for 'convergence' generations.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        print_centered('Running GENETIC gate-assignment algorithm...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        ga = GeneticOperators((len(i_list), len(o_list), len(g_list)), self.elites, self.mutation_rate)
+        seed_seq = np.random.SeedSequence(self.seed)
+        rng = np.random.default_rng(seed_seq)
+        log.cf.info(f'Genetic algorithm seed: {seed_seq.entropy} (population {self.population}, '
+                    f'{self.elites} elites, mutation rate {self.mutation_rate})')
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+
+        scores = {}  # assignment (bytes of its index vector) -> score, for all designs scored so far
+        best_designs = []  # index vectors of all designs with score == self.best_score
+        population = ga.random_population(rng, self.population, (i, o, g))
+        self.__seed_population(population, (i_list, o_list, g_list))
+        generation, stale, reason = 0, 0, 'max generations reached'  # stale: generations without a better design
+        while generation < max_fun:
+            (fitness, improved) = self.__score_population(scorer, population, scores, best_designs, max_fun)
+            generation += 1
+            stale = 0 if improved else stale + 1
+            if self.iter_count >= max_fun:
+                reason = f'scored {self.iter_count:,} distinct designs'
+                break
+            if stale >= self.convergence:
+                reason = f'converged (best score unchanged for {stale} generations)'
+                break
+            if self.limits.reason() is not None:
+                reason = self.limits.reason()
+                break
+            population = ga.next_generation(rng, population, fitness)
+
+        self.__record_best_genomes(best_designs, perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Stopped after {generation:,} generations: {reason}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+
+        return self.best_graphs
+
+    def cross_entropy_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                             netgraph: GraphParser, iter_: int) -> list:
+        """
+        Cross-entropy method: samples 'samples' valid assignments per generation from a probability matrix per kind of
+        node (see CrossEntropySampler), scores them as one batch, and updates the matrices from the elite samples.
+        Designs already scored are not re-scored (nor counted as another iteration).  Stops after total_iters
+        distinct designs, once the best score has not improved for 'convergence' generations, or once the
+        distribution has converged to a single design.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        print_centered('Running CROSS-ENTROPY gate-assignment algorithm...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        sampler = CrossEntropySampler((len(i_list), len(o_list), len(g_list)), (i, o, g), self.elite_fraction,
+                                      self.smoothing)
+        seed_seq = np.random.SeedSequence(self.seed)
+        rng = np.random.default_rng(seed_seq)
+        log.cf.info(f'Cross-entropy seed: {seed_seq.entropy} ({self.samples} samples per generation, elite fraction '
+                    f'{self.elite_fraction}, smoothing {self.smoothing})')
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+
+        scores = {}  # assignment (bytes of its index vector) -> score, for all designs scored so far
+        best_designs = []  # index vectors of all designs with score == self.best_score
+        generation, stale, reason = 0, 0, 'max generations reached'  # stale: generations without a better design
+        while generation < max_fun:
+            population = sampler.sample(rng, self.samples)
+            if generation == 0:
+                self.__seed_population(population, (i_list, o_list, g_list))
+            (fitness, improved) = self.__score_population(scorer, population, scores, best_designs, max_fun)
+            generation += 1
+            stale = 0 if improved else stale + 1
+            if self.iter_count >= max_fun:
+                reason = f'scored {self.iter_count:,} distinct designs'
+                break
+            if stale >= self.convergence:
+                reason = f'converged (best score unchanged for {stale} generations)'
+                break
+            if self.limits.reason() is not None:
+                reason = self.limits.reason()
+                break
+            sampler.update(population, fitness)
+            if sampler.converged():
+                reason = 'converged (sampling distribution concentrated on one design)'
+                break
+
+        self.__record_best_genomes(best_designs, perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Stopped after {generation:,} generations: {reason}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+
+        return self.best_graphs
+
+    def random_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                      netgraph: GraphParser, iter_: int) -> list:
+        """
+        Random sampling: scores batches of 'samples' uniformly random assignments (as one batch each, see
+        BatchScorer) until total_iters distinct designs are scored, or a batch has no new design.  A baseline for
+        the other searches (e.g. in a portfolio).
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        print_centered('Running RANDOM SAMPLING gate-assignment algorithm...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        ga = GeneticOperators((len(i_list), len(o_list), len(g_list)))
+        seed_seq = np.random.SeedSequence(self.seed)
+        rng = np.random.default_rng(seed_seq)
+        log.cf.info(f'Random sampling seed: {seed_seq.entropy} ({self.samples} samples per batch)')
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+
+        scores = {}  # assignment (bytes of its index vector) -> score, for all designs scored so far
+        best_designs = []  # index vectors of all designs with score == self.best_score
+        batches, reason = 0, f'scored {max_fun:,} distinct designs'
+        while self.iter_count < max_fun:
+            scored = self.iter_count
+            self.__score_population(scorer, ga.random_population(rng, self.samples, (i, o, g)), scores, best_designs,
+                                    max_fun)
+            batches += 1
+            if self.iter_count == scored:
+                reason = 'no new designs in the last batch'
+                break
+            if self.limits.reason() is not None:
+                reason = self.limits.reason()
+                break
+
+        self.__record_best_genomes(best_designs, perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Stopped after {batches:,} batches: {reason}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+
+        return self.best_graphs
+
+    def __score_population(self, scorer: BatchScorer, population: tuple, scores: dict, best_designs: list,
+                           max_fun: int):
+        """
+        Scores the designs of a population that were not scored yet (within the remaining budget of max_fun distinct
+        designs) as one batch, counting them and keeping track of the best one(s), as prep_assign_for_scoring does.
+
+        :param scorer: BatchScorer
+        :param population: tuple of 3 int arrays (P, k): assignments (see BatchScorer.score_assignments)
+        :param scores: dict: assignment (bytes of its index vector) -> score, for all designs scored so far (updated)
+        :param best_designs: list: index vectors of all designs with score == self.best_score (updated)
+        :param max_fun: int
+        :return: tuple[np.ndarray, bool]: score of each assignment (NaN if beyond the budget), and whether the best
+            score improved
+        """
+        genomes = np.concatenate(population, axis=1)
+        keys = [row.tobytes() for row in genomes]
+        new, seen = [], set()  # first occurrence of each design not scored yet (within the remaining budget)
+        for p, key in enumerate(keys):
+            if key not in scores and key not in seen:
+                seen.add(key)
+                new.append(p)
+        new = new[:max_fun - self.iter_count]
+        improved = False
+        if new:
+            new_scores = scorer.score_assignments(*(genes[new] for genes in population))
+            for p, score in zip(new, new_scores.tolist()):
+                scores[keys[p]] = score
+                if score > self.best_score:
+                    self.best_score, best_designs[:], improved = score, [genomes[p]], True
+                elif score == self.best_score:
+                    best_designs.append(genomes[p])
+            self.iter_count += len(new)
+            self.limits.update(len(new), improved)
+            self.__print_progress(max_fun)
+        return np.array([scores.get(key, np.nan) for key in keys]), improved
+
+    def __record_best_genomes(self, best_designs: list, perms: tuple, netgraph: GraphParser):
+        """
+        :param best_designs: list of index vectors (input, output, then gate nodes; see __score_population)
+        :param perms: tuple[PermutationIndexer, PermutationIndexer, PermutationIndexer]
+        :param netgraph: GraphParser
+        """
+        (i, o) = (perms[0].k, perms[1].k)
+        self.__record_best_graphs([tuple(p.rank(tuple(p.items[j] for j in genes)) for p, genes in
+                                         zip(perms, np.split(genome, [i, i + o]))) for genome in best_designs],
+                                  perms, netgraph)
+
+    def __start_assignment(self, moves: AssignmentMoves):
+        """
+        :param moves: AssignmentMoves: over the search's sensors, devices, and gate groups
+        :return: tuple of 3 int arrays: start_design as indices into the lists (None: no start design, or one that
+            is not made of these lists)
+        """
+        if self.start_design is None:
+            return None
+        try:
+            return moves.indices(self.start_design)
+        except ValueError:
+            return None
+
+    def __seed_population(self, population: tuple, lists: tuple):
+        """
+        Replaces the first member of a population by start_design (if any), so that the search starts from it.
+
+        :param population: tuple of 3 int arrays (P, k) (updated in place)
+        :param lists: tuple[list, list, list]: available inputs, outputs, and gates
+        """
+        start = self.__start_assignment(AssignmentMoves(*lists))
+        if start is not None:
+            for genes, idx in zip(population, start):
+                genes[0] = idx
+
+    def replica_exchange_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                                netgraph: GraphParser, iter_: int) -> list:
+        """
+        Parallel tempering: 'replicas' Metropolis chains (see run_discrete_annealing) run at fixed temperatures, from
+        'temperature'[0] (hottest) to [1] (coldest), in worker processes (see 'workers' option).  After every
+        exchange_interval steps, this process (the coordinator) collects the chains' states and the designs they
+        scored, and swaps the states of neighbouring temperatures by the replica exchange criterion, so that good
+        designs found by hot chains are refined by cold ones while hot chains keep exploring.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        replicas = self.replicas
+        workers = min(resolve_workers(self.workers), replicas)
+        print_centered(f'Running REPLICA EXCHANGE gate-assignment algorithm ({replicas} replicas, '
+                       f'{workers} processes)...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        moves = AssignmentMoves(i_list, o_list, g_list)
+        max_fun = iter_ if iter_ < self.total_iters else self.total_iters
+        (t_start, t_end) = self.temperature
+        temps = [temperature('geometric', t_start, t_end, k / max(replicas - 1, 1)) for k in range(replicas)]
+        seed_seq = np.random.SeedSequence(self.seed)
+        rng = np.random.default_rng(seed_seq)  # initial states & exchanges (chains get their own seeds each sweep)
+        log.cf.info(f'Replica exchange seed: {seed_seq.entropy} (temperatures: {[round(t, 4) for t in temps]})')
+
+        states = [moves.random_assignment(rng, i, o, g) for _ in range(replicas)]
+        best_designs = []
+        (accepted, attempted) = ([0] * (replicas - 1), [0] * (replicas - 1))
+        max_steps = max_fun * 10  # NOTE: as for annealing, re-visits only count towards this bound
+        steps, sweeps, reason = 0, 0, f'completed {max_steps:,} steps'
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(scorer,)) \
+            if workers > 1 else None
+        if pool is None:
+            init_worker(scorer)
+        try:
+            while True:
+                if self.iter_count >= max_fun:
+                    reason = f'scored {self.iter_count:,} distinct designs'
+                    break
+                if self.limits.reason() is not None:
+                    reason = self.limits.reason()
+                    break
+                if steps >= max_steps:
+                    break
+                seeds = [int(child.generate_state(1)[0]) for child in seed_seq.spawn(replicas)]
+                args = (states, temps, [self.exchange_interval] * replicas, seeds)
+                results = list(pool.map(replica_sweep, *args) if pool is not None else map(replica_sweep, *args))
+                steps += self.exchange_interval * replicas
+                sweeps += 1
+
+                # NOTE: designs are counted in replica order (independent of which worker finishes first)
+                for (_, _, scored) in results:
+                    for design, score in scored.items():
+                        if self.iter_count < max_fun and self.score_cache.get(design) is None:
+                            self.__record_design(design, score, best_designs, max_fun)
+                states = [state for (state, _, _) in results]
+                scores = [score for (_, score, _) in results]
+
+                # Exchange states of neighbouring temperatures (alternating even & odd pairs)
+                for k in range(sweeps % 2, replicas - 1, 2):
+                    attempted[k] += 1
+                    delta = (log_score(scores[k + 1]) - log_score(scores[k])) * (1 / temps[k] - 1 / temps[k + 1])
+                    if delta >= 0 or rng.random() < math.exp(delta):
+                        accepted[k] += 1
+                        states[k], states[k + 1] = states[k + 1], states[k]
+                        scores[k], scores[k + 1] = scores[k + 1], scores[k]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if best_designs:
+            self.__record_best_graphs([(perms[0].rank(i_perm), perms[1].rank(o_perm), perms[2].rank(g_perm))
+                                       for (i_perm, o_perm, g_perm) in best_designs], perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        rates = [f'{a / n:.0%}' if n else 'n/a' for a, n in zip(accepted, attempted)]
+        log.cf.info(f'\nDONE!\n'
+                    f'Completed: {self.iter_count:,}/{max_fun:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Stopped after {sweeps:,} sweeps: {reason}\n'
+                    f'Exchange acceptance (hottest to coldest pair): {rates}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+
+        return self.best_graphs
+
+    def tabu_refine(self, perms: tuple, netgraph: GraphParser):
+        """
+        Refines the best design of a search by tabu search (see TabuSearch), for at most tabu_time seconds or until
+        tabu_steps steps without a better design.  Better designs replace best_graphs; equally good ones are added.
+
+        :param perms: tuple[PermutationIndexer, PermutationIndexer, PermutationIndexer]: i_perms, o_perms, g_perms
+        :param netgraph: GraphParser
+        """
+        if not self.best_graphs:
+            return
+        print_centered('Running TABU SEARCH refinement...')
+        scorer = BatchScorer(self.ucf.library, netgraph, *(p.items for p in perms))
+        moves = AssignmentMoves(*(p.items for p in perms))
+        designs = [tuple(tuple(n.name for n in nodes) for nodes in (graph.inputs, graph.outputs, graph.gates))
+                   for (_, graph, _, _) in self.best_graphs]
+        time_limit = self.tabu_time if self.limits.deadline is None else \
+            min(self.limits.remaining(), self.tabu_time if self.tabu_time is not None else math.inf)
+        tabu = TabuSearch(scorer, moves, self.tabu_tenure, self.tabu_steps, time_limit)
+        start_score = self.best_score
+        best_score, best_designs = tabu.run(moves.indices(designs[0]))
+
+        # NOTE: the start is one of best_designs, so best_score >= start_score
+        designs = best_designs if best_score > start_score else designs + [d for d in best_designs if d not in designs]
+        if len(designs) > len(self.best_graphs) or best_score > start_score:
+            self.best_score = best_score
+            self.__record_best_graphs([tuple(p.rank(perm) for p, perm in zip(perms, d)) for d in designs],
+                                      perms, netgraph)
+        log.cf.info(f'Tabu search: {tabu.steps:,} steps, {tabu.scored:,} designs scored; stopped: {tabu.reason}\n'
+                    f'Best Score: {start_score} -> {self.best_score} ({len(self.best_graphs)} design(s))')
+
+    def run_annealing(self, perms: tuple, netgraph: GraphParser, i: int, o: int, g: int, max_fun: int,
+                      seed: int = None) -> str:
+        """
+        Runs one annealing search with the selected algorithm (run_dual_annealing or run_discrete_annealing).
+
+        :return: str: reason for termination
+        """
+        if self.algorithm == 'discrete_annealing':
+            return self.run_discrete_annealing(perms, netgraph, i, o, g, max_fun, seed)
+        return self.run_dual_annealing(perms, netgraph, i, o, g, max_fun, seed)
+
+    def run_discrete_annealing(self, perms: tuple, netgraph: GraphParser, i: int, o: int, g: int, max_fun: int,
+                               seed: int = None) -> str:
+        """
+        Simulated annealing directly over assignments: each step swaps two assigned gate groups (or sensors, or
+        output devices), or replaces one with an unused one (see AssignmentMoves).  Only the nodes downstream of the
+        move are re-scored (BatchScorer.evaluate), and a worse design is accepted with probability
+        exp(log10(new score / current score) / T), T following the 'cooling' schedule from 'temperature'[0] to [1].
+
+        :param perms: tuple[PermutationIndexer, PermutationIndexer, PermutationIndexer]: i_perms, o_perms, g_perms
+        :param netgraph: GraphParser
+        :param i: int
+        :param o: int
+        :param g: int
+        :param max_fun: int: number of distinct designs to score
+        :param seed: int: seed of the random number generator (None: unseeded)
+        :return: str: reason for termination
+        """
+        (i_perms, o_perms, g_perms) = perms
+        scorer = BatchScorer(self.ucf.library, netgraph, i_perms.items, o_perms.items, g_perms.items)
+        moves = AssignmentMoves(i_perms.items, o_perms.items, g_perms.items)
+        rng = np.random.default_rng(seed)
+        (t_start, t_end) = self.temperature
+
+        best_designs = []  # (i_perm, o_perm, g_perm) of all designs with score == self.best_score
+        start = self.__start_assignment(moves)
+        chain = MetropolisChain(scorer, moves, rng, moves.random_assignment(rng, i, o, g) if start is None else start)
+        if self.score_cache.get(chain.design) is None:
+            self.__record_design(chain.design, chain.score, best_designs, max_fun)
+        max_steps = max_fun * 10  # NOTE: as for dual annealing, re-visits (cache hits) only count towards this bound
+        reason = f'completed {max_steps:,} steps'
+        for _ in range(max_steps):
+            if self.iter_count >= max_fun:
+                reason = f'scored {self.iter_count:,} distinct designs'
+                break
+            if self.limits.reason() is not None:
+                reason = self.limits.reason()
+                break
+            step = chain.step(temperature(self.cooling, t_start, t_end, self.iter_count / max_fun),
+                              self.score_cache.get)
+            if step is None:
+                reason = 'no neighbouring designs'
+                break
+            (design, score, scored) = step
+            if scored:
+                self.__record_design(design, score, best_designs, max_fun)
+
+        if best_designs:
+            self.__record_best_graphs([(i_perms.rank(i_perm), o_perms.rank(o_perm), g_perms.rank(g_perm))
+                                       for (i_perm, o_perm, g_perm) in best_designs], perms, netgraph)
+        return reason
+
+    def __record_design(self, design: tuple, score: float, best_designs: list, max_fun: int):
+        """
+        Counts a newly scored design (found by a search working on BatchScorer scores) and keeps track of the best
+        one(s), as prep_assign_for_scoring does for the other searches.
+
+        :param design: tuple: (i_perm, o_perm, g_perm)
+        :param score: float
+        :param best_designs: list: designs with score == self.best_score (updated in place)
+        :param max_fun: int: for the progress bar
+        """
+        self.iter_count += 1
+        self.score_cache.put(design, score)
+        self.limits.update(1, score > self.best_score)
+        if score > self.best_score:
+            self.best_score = score
+            best_designs[:] = [design]
+        elif score == self.best_score and design not in best_designs:
+            best_designs.append(design)
+        if self.iter_count % 100 == 0 or self.iter_count == max_fun:
+            self.__print_progress(max_fun)
+
+    def run_dual_annealing(self, perms: tuple, netgraph: GraphParser, i: int, o: int, g: int, max_fun: int,
+                           seed: int = None) -> str:
+        """
+        Runs one scipy dual annealing search over the (input, output, gate) permutation indices, scoring each
+        visited design with prep_assign_for_scoring (results kept in best_score/best_graphs).
+
+        :param perms: tuple[PermutationIndexer, PermutationIndexer, PermutationIndexer]: i_perms, o_perms, g_perms
+        :param netgraph: GraphParser
+        :param i: int
+        :param o: int
+        :param g: int
+        :param max_fun: int: number of distinct designs to score
+        :param seed: int: seed of the annealing random number generator (None: unseeded)
+        :return: str: reason for termination
+        """
+        (i_perms, o_perms, g_perms) = perms
+
+        # DUAL ANNEALING SCIPY FUNC
+        def func(x):
+            return self.prep_assign_for_scoring(x, (
+                i_perms, o_perms, g_perms, netgraph, i, o, g, max_fun))
+
+        lo = [0, 0, 0]
+        hi = [i_perms.size, o_perms.size, g_perms.size]
+        # NOTE: Not possible to add integrality constraint; just round to int instead; adds only minor inefficiency
+        bounds = scipy.optimize.Bounds(lo, hi,
+                                       True)  # Alternatively: bounds = list(zip(lo, hi))
+        # TODO: CK: Implement toxicity check...
+
+        # Stops at the end of an annealing iteration once a limit is reached (or within one, see func)
+        def callback(x, f, context):
+            return self.limits.reason() is not None
+
+        # NOTE: max_fun counts distinct designs (re-visits are cache hits); maxfun only bounds the total calls
+        try:
+            start = self.__start_assignment(AssignmentMoves(i_perms.items, o_perms.items, g_perms.items))
+            x0 = None if start is None else [p.rank(tuple(p.items[j] for j in idx)) + 0.5
+                                             for p, idx in zip(perms, start)]
+            ret = scipy.optimize.dual_annealing(func, bounds, maxfun=max_fun * 10, maxiter=max_fun, seed=seed,
+                                                callback=callback, x0=x0)
+            reason = ret.message if self.limits.reason() is None else self.limits.reason()
+        except SearchLimitReached as e:
+            reason = str(e)
+        """
+        Dual Annealing: https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.dual_annealing.html
+        Dual Annealing combines Classical Simulated Annealing, Fast Simulated Annealing, and local search optimizations
+        to improve upon the standard simulated annealing technique. The algorithm does not guarantee a global optimal 
+        score but can find a good regional optimum in far less time than would be required by exhaustive search.
+        
+        Key Parameters:
+        :param func:    Function of form func(x, *args) with return value that dual_annealing is attempting to optimize
+        :param bounds:  Upper and lower bounds for each dimension/variable being passed into func
+        :param maxiter: Max number of ~global searches (to identify neighborhoods with potential local maxima)
+        :param max_fun: Max number of total function calls/circuit iterations, including local minimization searches
+        :param no_local_search: Enable to function more like traditional simulated annealing
+        Note: Additional parameters specified in URL above...
+
+        :return OptimizeResult: Array including the solution input array, best score, number of iterations run, and a 
+        message indicating the specific reason for termination, among additional attributes specified here...
+        docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.OptimizeResult.html#scipy.optimize.OptimizeResult  
+        """
+
+        return reason
+
     def exhaustive_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
                           netgraph: GraphParser, iter_: int) -> list:
         """
@@ -690,17 +1782,297 @@ class CELLO3:
         """
         print_centered('Running EXHAUSTIVE gate-assignment algorithm...')
         log.cf.info('Scoring potential gate assignments...')
-        for I_perm in itertools.permutations(i_list, i):
-            for O_perm in itertools.permutations(o_list, o):
-                for G_perm in itertools.permutations(g_list, g):
-                    self.prep_assign_for_scoring((I_perm, O_perm, G_perm),
-                                                 (None, None, None, netgraph, i, o, g, iter_))
+        reason = 'all designs scored'
+        try:
+            for I_perm in itertools.permutations(i_list, i):
+                for O_perm in itertools.permutations(o_list, o):
+                    for G_perm in itertools.permutations(g_list, g):
+                        self.prep_assign_for_scoring((I_perm, O_perm, G_perm),
+                                                     (None, None, None, netgraph, i, o, g, iter_))
+        except SearchLimitReached as e:
+            reason = str(e)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\nCounted: {self.iter_count:,} iterations\n{self.score_cache.info()}\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score}')
+
+        return self.best_graphs
+
+    def batch_exhaustive_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                                netgraph: GraphParser, iter_: int) -> list:
+        """
+        Same search as exhaustive_assign, but scores batch_size assignments per call with the BatchScorer.
+        Only the best assignment(s) are then re-scored with score_circuit to build their graphs and truth tables.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        print_centered('Running EXHAUSTIVE (batched) gate-assignment algorithm...')
+        log.cf.info('Scoring potential gate assignments...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list, *perms)
+        batch_size = self.batch_size if self.batch_size > 0 else 4096
+
+        # NOTE: ranks enumerate (i_perm, o_perm, g_perm) in the same order as the nested loops of exhaustive_assign
+        results, reason = [], 'all designs scored'
+        for start in range(0, scorer.total, batch_size):
+            if self.limits.reason() is not None:
+                reason = self.limits.reason()
+                break
+            results.append(scorer.search_range(start, min(start + batch_size, scorer.total), batch_size))
+            self.iter_count += results[-1][2]
+            self.limits.update(results[-1][2], results[-1][0] > self.best_score)
+            self.best_score = max(self.best_score, results[-1][0])
+            self.__print_progress(iter_)
+        self.best_score, best_ranks, _ = merge_best(results, self.best_score)
+
+        self.__record_best_graphs(best_ranks, perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\nCounted: {self.iter_count:,} iterations\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score}')
+
+        return self.best_graphs
+
+    def parallel_exhaustive_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                                   netgraph: GraphParser, iter_: int) -> list:
+        """
+        Same search as batch_exhaustive_assign, with the rank space split into shards that are scored in worker
+        processes (see 'workers' option).  Shard results are merged in rank order, so the best assignment(s) are the
+        same as with a single process.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        workers = resolve_workers(self.workers)
+        print_centered(f'Running EXHAUSTIVE (parallel, {workers} processes) gate-assignment algorithm...')
+        log.cf.info('Scoring potential gate assignments...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list, *perms)
+        batch_size = self.batch_size if self.batch_size > 0 else 4096
+
+        # NOTE: several shards per worker, so that workers finishing early pick up the remaining shards
+        shards = shard_ranges(scorer.total, workers * 8)
+        reason = 'all designs scored'
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(scorer,)) as pool:
+            futures = [pool.submit(search_shard, start, stop, batch_size, self.limits.deadline)
+                       for (start, stop) in shards]
+            for future in as_completed(futures):
+                (shard_best, _, shard_count) = future.result()
+                self.iter_count += shard_count
+                self.limits.update(shard_count, shard_best > self.best_score)
+                self.best_score = max(self.best_score, shard_best)
+                self.__print_progress(iter_)
+                if self.limits.reason() is not None:
+                    reason = self.limits.reason()
+                    for f in futures:
+                        f.cancel()  # NOTE: running shards stop at the deadline (the designs they scored are merged)
+                    break
+            done = [f for f in futures if not f.cancelled()]
+            self.best_score, best_ranks, _ = merge_best([f.result() for f in done], self.best_score)
+            self.iter_count = sum(f.result()[2] for f in done)
+
+        self.__record_best_graphs(best_ranks, perms, netgraph)
+        if not self.verbose:
+            log.cf.info('\n')
+        log.cf.info(f'\nDONE!\nCounted: {self.iter_count:,} iterations ({len(done)}/{len(shards)} shards on {workers} '
+                    f'processes)\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score}')
+
+        return self.best_graphs
+
+    def tree_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                    netgraph: GraphParser, iter_: int) -> list:
+        """
+        Exact assignment of a fanout-free (tree) netlist by dynamic programming over its subtrees (see
+        TreeAssignment): finds the best score of exhaustive_assign, typically in milliseconds.  Falls back to the
+        search selected by the options (search_assign) if the UCF's responses are not monotone or there are too many
+        designs.  The time limit and patience are checked after each subtree and before each batch of complete
+        designs; if the search stops before any complete design was scored, the best one found greedily (beam search
+        of width 1) is kept.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+
+        def progress(best_score, scored):
+            self.limits.update(scored - self.iter_count, best_score > self.best_score)
+            self.best_score, self.iter_count = max(best_score, self.best_score), scored
+            return self.limits.reason() is not None
+
+        try:
+            tree = TreeAssignment(scorer)
+            print_centered('Running TREE (dynamic programming) gate-assignment algorithm...')
+            best_score, ties = tree.solve(progress=progress)
+        except ValueError as e:
+            log.cf.info(f'{e}; running the gate-assignment search instead...')
+            return self.search_assign(i_list, o_list, g_list, i, o, g, netgraph, iter_)
+
+        reason = 'search completed (exact)' if self.limits.reason() is None else self.limits.reason()
+        scored = tree.scored
+        if not ties and self.limits.reason() is not None:
+            log.cf.info(f'Stopped before any complete design ({reason}); completing one greedily...')
+            greedy = BeamSearch(scorer, width=1)
+            best_score, ties = greedy.search()
+            scored += greedy.scored
+        self.best_score, self.iter_count = best_score, scored
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        # NOTE: best designs listed in rank order, as with exhaustive search
+        best_ranks = sorted(tuple(p.rank(tuple(p.items[j] for j in idx)) for p, idx in zip(perms, tie)) for tie in ties)
+        self.__record_best_graphs(best_ranks, perms, netgraph)
+        log.cf.info(f'\nDONE!\nKept {tree.states:,} partial assignments (subtrees), scored {scored:,} designs '
+                    f'(out of {iter_:,} possible iterations)\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score}')
+
+        return self.best_graphs
+
+    def beam_search_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                           netgraph: GraphParser, iter_: int) -> list:
+        """
+        Beam search (see BeamSearch): assigns the gates level by level, from the inputs to the outputs, keeping the
+        beam_width best partial assignments after each gate (ranked from the assigned gates only), then assigns the
+        output devices.  Not exact, but the number of designs scored (and so the run time) only depends on beam_width
+        and the netlist/UCF sizes; total_iters and patience are not used (no complete design is scored before the last
+        step, so there is no improvement to wait for).  The time limit is checked after each gate: once reached, only
+        the best partial assignment is kept and completed greedily.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        print_centered('Running BEAM SEARCH gate-assignment algorithm...')
+        log.cf.info(f'Beam width: {self.beam_width}')
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        beam = BeamSearch(scorer, self.beam_width)
+        reason = None
+
+        def progress(best_score, scored):
+            nonlocal reason
+            self.iter_count = scored
+            if self.limits.remaining() == 0:  # NOTE: deadline only (see docstring)
+                reason = self.limits.reason()
+            return reason is not None
+
+        best_score, ties = beam.search(progress=progress)
+        reason = 'search completed' if reason is None else f'{reason}; best partial assignment completed greedily'
+
+        self.best_score, self.iter_count = best_score, beam.scored
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        best_ranks = sorted(tuple(p.rank(tuple(p.items[j] for j in idx)) for p, idx in zip(perms, tie)) for tie in ties)
+        self.__record_best_graphs(best_ranks, perms, netgraph)
+        log.cf.info(f'\nDONE!\nScored {beam.scored:,} partial and complete assignments '
+                    f'(out of {iter_:,} possible iterations)\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score} ({len(self.best_graphs)} design(s))')
+
+        return self.best_graphs
+
+    def branch_and_bound_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
+                                netgraph: GraphParser, iter_: int) -> list:
+        """
+        Exact search: finds the same best design(s) as exhaustive_assign by branch and bound (see BranchAndBound),
+        only scoring the complete assignments whose score bound can still reach the best score.
+        The bounds require monotone responses (e.g. no tandem promoters); for other UCFs, the exhaustive search is
+        run instead.
+
+        :param i_list: list
+        :param o_list: list
+        :param g_list: list
+        :param i: int
+        :param o: int
+        :param g: int
+        :param netgraph: GraphParser
+        :param iter_: int
+        :return: list: self.best_graphs: [(circuit_score, graph, tb, tb_labels)]
+        """
+        scorer = BatchScorer(self.ucf.library, netgraph, i_list, o_list, g_list)
+        reason = unsupported_reason(scorer)
+        if reason is not None:
+            log.cf.info(f'Branch and bound is not supported for this UCF ({reason}); running exhaustive search...')
+            if self.workers != 1:
+                return self.parallel_exhaustive_assign(i_list, o_list, g_list, i, o, g, netgraph, iter_)
+            return self.batch_exhaustive_assign(i_list, o_list, g_list, i, o, g, netgraph, iter_)
+
+        print_centered('Running BRANCH AND BOUND gate-assignment algorithm...')
+        log.cf.info('Scoring potential gate assignments...')
+        perms = (PermutationIndexer(i_list, i), PermutationIndexer(o_list, o), PermutationIndexer(g_list, g))
+        bnb = BranchAndBound(scorer)
+
+        def progress(best_score, scored):
+            self.limits.update(scored - self.iter_count, best_score > self.best_score)
+            self.best_score, self.iter_count = best_score, scored
+            self.__print_progress(iter_)
+            return self.limits.reason() is not None
+
+        self.best_score, ties = bnb.search(self.best_score, progress=progress)
+        self.iter_count = bnb.scored
+        reason = 'search completed (exact)' if self.limits.reason() is None else self.limits.reason()
+        # NOTE: best designs listed in rank order, as with exhaustive search
+        best_ranks = sorted(tuple(p.rank(tuple(p.items[j] for j in idx)) for p, idx in zip(perms, tie)) for tie in ties)
+        self.__record_best_graphs(best_ranks, perms, netgraph)
         if not self.verbose:
             log.cf.info('\n')
-        log.cf.info(f'\nDONE!\nCounted: {self.iter_count:,} iterations')
+        log.cf.info(f'\nDONE!\nCounted: {self.iter_count:,} iterations (out of {iter_:,} possible iterations)\n'
+                    f'Bounded {bnb.explored:,} partial assignments ({bnb.pruned:,} pruned)\n'
+                    f'Stopped: {reason}\n'
+                    f'Best Score: {self.best_score}')
 
         return self.best_graphs
 
+    def __record_best_graphs(self, best_ranks, perms, netgraph: GraphParser):
+        """
+        Rebuilds and re-scores (with score_circuit) the best assignment(s) found by a batched search, so that
+        best_graphs holds their graphs and truth tables as with the other search algorithms.
+
+        :param best_ranks: list of (i_perm, o_perm, g_perm) indices
+        :param perms: tuple[PermutationIndexer, PermutationIndexer, PermutationIndexer]
+        :param netgraph: GraphParser
+        """
+        self.best_graphs = []
+        for (i_rank, o_rank, g_rank) in best_ranks:
+            graph = self.build_assign_graph(perms[0][i_rank], perms[1][o_rank], perms[2][g_rank], netgraph)
+            (circuit_score, tb, tb_labels) = self.score_circuit_vectorized(graph) if self.vectorized \
+                else self.score_circuit(graph)
+            self.best_graphs.append((circuit_score, graph, tb, tb_labels))
+
+    def __print_progress(self, max_fun: int):
+        block = '\u2588'  # str: █,   utf-8: '\u2588',   byte: b'\xe2\x96\x88'
+        num_blocks = int(round(self.iter_count / max_fun, 2) * 50)
+        print(f'{"_" * 50} #{format(self.iter_count, ",")}/{format(max_fun, ",")} | '
+              f'Best: {round(self.best_score, 2)}\r{num_blocks * block}', end='\r')
+
     # def user_specified_assign(self, i_list: list, o_list: list, g_list: list, i: int, o: int, g: int,
     #                           netgraph: GraphParser, iter_: int) -> list:
     #     """
@@ -742,6 +2114,7 @@ class CELLO3:
         (i_perms, o_perms, g_perms, netgraph, i, o, g, max_fun) = args
         # TODO: CK: Account for duplicates
         if i_perms and o_perms and g_perms:
+            # NOTE: lists or PermutationIndexers (which unrank the permutation on demand)
             i_perm = i_perms[math.floor(i_perm)]
             o_perm = o_perms[math.floor(o_perm)]
             g_perm = g_perms[math.floor(g_perm)]
@@ -766,6 +2139,13 @@ class CELLO3:
 
         # Check if inputs, outputs, and gates are unique and the correct number
         if len(set(i_perm + o_perm + g_perm)) == i + o + g:
+            # Designs already scored in this search are not re-scored (nor counted as another iteration)
+            if self.score_cache.get((i_perm, o_perm, g_perm)) is not None:
+                return -self.best_score
+            if self.iter_count >= max_fun:
+                raise SearchLimitReached(f'scored {self.iter_count:,} distinct designs')
+            if self.limits.reason() is not None:
+                raise SearchLimitReached(self.limits.reason())
             self.iter_count += 1
             if case_invalid:
                 return 0.0
@@ -773,20 +2153,11 @@ class CELLO3:
                 print_centered(f'beginning iteration {self.iter_count}:', also_logfile=False)
 
             # Output the combination
-            def map_helper(l, c):
-                return list(map(lambda x_, y: (x_, y), l, c))
-
-            new_i = map_helper(i_perm, netgraph.inputs)
-            new_g = map_helper(g_perm, netgraph.gates)
-            new_o = map_helper(o_perm, netgraph.outputs)
-            new_i = [Input(i[0], i[1].id) for i in new_i]
-            new_o = [Output(o[0], o[1].id) for o in new_o]
-            new_g = [Gate(g[0], g[1].gate_type, g[1].inputs, g[1].output)
-                     for g in new_g]
-
-            graph = AssignGraph(new_i, new_o,
-                                new_g)  # NOTE: specific ins, gates, outs from annealing | exhaustive
-            (circuit_score, tb, tb_labels) = self.score_circuit(graph)
+            graph = self.build_assign_graph(i_perm, o_perm, g_perm, netgraph)
+            if self.vectorized:
+                (circuit_score, tb, tb_labels) = self.score_circuit_vectorized(graph)
+            else:
+                (circuit_score, tb, tb_labels) = self.score_circuit(graph)
             # NOTE: follow the circuit scoring functions
 
             block = '\u2588'  # str: █,   utf-8: '\u2588',   byte: b'\xe2\x96\x88'
@@ -813,6 +2184,8 @@ class CELLO3:
             #             csv_writer.writerow(['Scores', 'Designs...'])
             #         csv_writer.writerow([circuit_score, graph])
 
+            self.score_cache.put((i_perm, o_perm, g_perm), circuit_score)
+            self.limits.update(1, circuit_score > self.best_score)
             if circuit_score > self.best_score:
                 self.best_score = circuit_score
                 self.best_graphs = [(circuit_score, graph, tb, tb_labels)]
@@ -827,6 +2200,59 @@ class CELLO3:
 
         return -self.best_score
 
+    @staticmethod
+    def build_assign_graph(i_perm, o_perm, g_perm, netgraph: GraphParser) -> AssignGraph:
+        """
+        Builds the AssignGraph for a specific assignment of inputs, outputs, and gates to the netlist nodes.
+
+        :param i_perm: tuple of input sensor names (in netgraph.inputs order)
+        :param o_perm: tuple of output device names (in netgraph.outputs order)
+        :param g_perm: tuple of gate group names (in netgraph.gates order)
+        :param netgraph: GraphParser
+        :return: AssignGraph
+        """
+        def map_helper(l, c):
+            return list(map(lambda x_, y: (x_, y), l, c))
+
+        new_i = map_helper(i_perm, netgraph.inputs)
+        new_g = map_helper(g_perm, netgraph.gates)
+        new_o = map_helper(o_perm, netgraph.outputs)
+        new_i = [Input(i[0], i[1].id) for i in new_i]
+        new_o = [Output(o[0], o[1].id) for o in new_o]
+        new_g = [Gate(g[0], g[1].gate_type, g[1].inputs, g[1].output)
+                 for g in new_g]
+
+        # NOTE: specific ins, gates, outs from annealing | exhaustive (same node order, so same evaluation plan)
+        return AssignGraph(new_i, new_o, new_g, netgraph.plan)
+
+    def __add_eval_params(self, graph: AssignGraph):
+        """
+        Adds the UCF parameters and equations to each input, gate, and output of the graph.
+        NOTE: parameters & equations come from the UCF library compiled when the UCF was loaded (no UCF re-queries)
+
+        :param graph: AssignGraph
+        """
+        library = self.ucf.library
+
+        # adding parameters to inputs
+        for graph_input in graph.inputs:
+            if repr(graph_input) in library.sensors:
+                m = library.sensors[repr(graph_input)]
+                graph_input.add_eval_params(m.equations, m.params)
+
+        # adding parameters to outputs (NOTE: intermediate output nodes are technically treated as gates, not outputs)
+        for graph_output in graph.outputs:
+            m = library.outputs.get(repr(graph_output))
+            if m is not None and 'response_function' in m.equations:
+                graph_output.add_eval_params(m.equations['response_function'], m.params,
+                                             m.functions['response_function'],
+                                             m.variables.get('response_function'))
+
+        # adding parameters and individual gates to gates
+        for graph_gate in graph.gates:
+            for m in library.gate_groups.get(graph_gate.name, []):
+                graph_gate.add_eval_params(m.equations, m.name, m.params)
+
     def score_circuit(self, graph: AssignGraph):
         """
         Calculates the circuit score. Returns circuit_score, the core mapping from UCF. (See Pseudocode below).
@@ -870,111 +2296,31 @@ class CELLO3:
                 evaluate output
         '''
 
-        # First, make sure that all inputs use the same 'sensor_response' function; this has to do with UCF formatting
-        input_function_json = self.ucf.query_top_level_collection(self.ucf.UCFin, 'functions')
-        input_model_names = [i.name + '_model' for i in graph.inputs]
-        input_info = query_helper(self.ucf.query_top_level_collection(self.ucf.UCFin, 'models'),
-                                  'name', input_model_names)
-        input_functions = {c['name'][:-6]: c['functions'] for c in input_info}
-        input_equations = input_functions.copy()
-        for key, input in input_functions.items():
-            input_equations[key] = {k: (e['equation']) for e in input_function_json for (k, f) in
-                                    input.items()
-                                    if (e['name'] == f)}
-        input_params = {c['name'][:-6]: {p['name']: p['value'] for p in c['parameters']} for c in
-                        input_info}
-
         if self.print_iters:
+            library = self.ucf.library
+            input_models = {i.name: library.sensors[i.name] for i in graph.inputs if i.name in library.sensors}
             debug_print(f'Assignment configuration: {repr(graph)}', False)
             print(f'INPUT parameters:')
-            for p in input_params:
-                print(f'{p} {input_params[p]}')
+            for p, m in input_models.items():
+                print(f'{p} {m.params}')
             print(
-                f"input_response = {(funcs := next(iter(input_equations.values())))['response_function']}")
+                f"input_response = {(funcs := next(iter(input_models.values())).equations)['response_function']}")
             if 'tandem_interference_factor' in funcs.keys():
                 print(f"\ntandem_interference_factor = {funcs['tandem_interference_factor']}")
-            print(f'\nParameters in sensor_response function json: \n{input_params}\n')
+            print(f'\nParameters in sensor_response function json: \n'
+                  f'{({k: m.params for k, m in input_models.items()})}\n')
 
-        main_function_json = self.ucf.query_top_level_collection(self.ucf.UCFmain, 'functions')
-        gate_groups = [(g.name, g.gate_type) for g in graph.gates]
-        gates = self.ucf.query_top_level_collection(self.ucf.UCFmain, 'gates')
-        gate_query = query_helper(gates, 'group', [g[0] for g in gate_groups])
-        gate_ids = [(g['group'], g['name']) for g in gate_query]
-        gate_id_names = [i[1] + '_model' for i in gate_ids]
-        gate_info = query_helper(self.ucf.query_top_level_collection(self.ucf.UCFmain, 'models'),
-                                 'name', gate_id_names)
-        gate_functions = {c['name'][:-6]: c['functions'] for c in gate_info}
-        gate_equations = gate_functions.copy()
-        for key, input in gate_functions.items():
-            gate_equations[key] = {k: (e['equation']) for e in main_function_json for (k, f) in
-                                   input.items()
-                                   if (e['name'] == f and 'equation' in e.keys())}
-        gate_func_names = gate_info[0]['functions']
-        gate_params = {gf['name'][:-6]: {g['name']: g['value'] for g in gf['parameters']} for gf in
-                       gate_info}
-        if self.print_iters:
             print(f'GATE parameters: ')
-            for f in gate_params:
-                print(f'{f} {gate_params[f]}')
-
-        # gate_funcs = {}
-        # for func_type, func_name in gate_func_names.items():
-        #     if func_type not in ['toxicity', 'cytometry']:  # TODO: add cytometry and toxicity evaluation
-        #         gate_funcs[func_type] = query_helper(main_function_json, 'name', [func_name])[0]['equation']
+            for m in [m for g in graph.gates for m in library.gate_groups.get(g.name, [])]:
+                print(f'{m.name} {m.params}')
 
-        # try:
-        #     input_composition = query_helper(ucf_main_functions, 'name', ['linear_input_composition'])[0]
-        # except Exception as e:
-        #     raise Exception(f"UCF contains 'tandem' or no input_composition...") from e  # TODO: handle tandem?
-        # hill_response_equation = gate_funcs['Hill_response']['equation'].replace('^', '**')  # substitute power operator
-        # linear_input_composition = gate_funcs['linear_input_composition']['equation']
-        # if self.print_iters:
-        #     print(f'hill_response = {hill_response_equation}')
-        #     print(f'linear_input_composition = {linear_input_composition}')
-        #     print('\n')
-
-        output_function_json = self.ucf.query_top_level_collection(self.ucf.UCFout, 'functions')
-        output_function_str = output_function_json[0]['equation']
-        output_names = [o.name for o in graph.outputs]
-        output_model_names = [o + '_model' for o in output_names]
-        output_jsons = query_helper(self.ucf.query_top_level_collection(self.ucf.UCFout, 'models'),
-                                    'name',
-                                    output_model_names)
-        output_params = {o['name'][:-6]: {p['name']: p['value'] for p in o['parameters']} for o in
-                         output_jsons}
-        output_functions = {c['name'][:-6]: c['functions']['response_function'] for c in
-                            output_jsons}
-        output_equations = {k: (e['equation']) for e in output_function_json for (k, f) in
-                            output_functions.items() if (e['name'] == f)}
-        output_vars = {k: (e['variables']) for e in output_function_json for (k, f) in
-                       output_functions.items() if (e['name'] == f)}
-
-        if self.print_iters:
+            output_models = {o.name: library.outputs[o.name] for o in graph.outputs if o.name in library.outputs}
             print('OUTPUT parameters: ')
-            for op in output_params:
-                print(f'{op} {output_params[op]}')
-            print(f'output_response = {output_equations}\n')
-
-        # adding parameters to inputs
-        for graph_input in graph.inputs:
-            if all([repr(graph_input) in x for x in [input_params, input_equations]]):
-                graph_input.add_eval_params(input_equations[repr(
-                    graph_input)], input_params[repr(graph_input)])
-
-        # adding parameters to outputs (NOTE: intermediate output nodes are technically treated as gates, not outputs)
-        for graph_output in graph.outputs:
-            if all([repr(graph_output) in x for x in [output_params, output_equations]]):
-                graph_output.add_eval_params(output_equations[repr(graph_output)],
-                                             output_params[repr(graph_output)],
-                                             output_functions[repr(graph_output)],
-                                             output_vars[repr(graph_output)])
+            for op, m in output_models.items():
+                print(f'{op} {m.params}')
+            print(f"output_response = {({k: m.equations.get('response_function') for k, m in output_models.items()})}\n")
 
-        # adding parameters and individual gates to gates
-        for (gate_group, gate_name) in gate_ids:
-            gate_param = gate_params[gate_name]
-            for graph_gate in graph.gates:
-                if graph_gate.name == gate_group:
-                    graph_gate.add_eval_params(gate_equations[gate_name], gate_name, gate_param)
+        self.__add_eval_params(graph)
 
         # NOTE: creating a truth table for each graph assignment
         num_inputs = len(graph.inputs)
@@ -998,6 +2344,17 @@ class CELLO3:
             """
             return truth_table_labels.index(node_name + '_I/O')
 
+        logic_io = graph.plan.io
+        if logic_io is None:
+            # FIXME: this happens for something like the sr_latch, it is not currently supported,
+            #  but with modifications to the truth table, this type of unstable could work
+            debug_print(f'{self.verilog_name} has unsupported circuit configuration due to flip-flopping.')
+            print_table([truth_table_labels] + truth_table)
+            log.cf.info('\n')
+            raise RecursionError
+        io_columns = [(k, get_tb_IO_index(repr(graph.nodes[k])))
+                      for k in graph.plan.gate_order + graph.plan.output_order]
+
         circuit_scores = []
         for r in range(len(truth_table)):
             if self.print_iters:
@@ -1014,99 +2371,17 @@ class CELLO3:
                         truth_table[r][graph_input_idx] = graph_input.out_scores[
                             graph_input.score_in_use]
 
-            def set_tb_IO(node_name, io_val):
-                """
-                Fills out truth table IO values
-
-                :param node_name:
-                :param io_val:
-                """
-                tb_index_ = get_tb_IO_index(node_name)
-                truth_table[r][tb_index_] = io_val
-
-            def get_tb_IO_val(node_name):
-                """
-                Uses get_tb_IO_index to return value of corresponding col.
-
-                :param node_name: str
-                :return: float
-                """
-                tb_index_ = get_tb_IO_index(node_name)
-                return truth_table[r][tb_index_]
-
-            def fill_truth_table_IO(graph_node):
-                """
-                TODO: docstring
-
-                :param graph_node:
-                """
-                if type(graph_node) == Gate:
-                    gate_inputs = graph.find_prev(graph_node)
-                    gate_type = graph_node.gate_type
-                    # gate_io = None
-                    if gate_type == 'NOR':  # gate_type is either 'NOR' or 'NOT'
-                        io_s = []
-                        for gate_input in gate_inputs:  # should be exactly 2 inputs
-                            input_io = get_tb_IO_val(repr(gate_input))
-                            if input_io is None:
-                                # this might happen if the gate_input is a gate
-                                fill_truth_table_IO(gate_input)
-                            input_io = get_tb_IO_val(repr(gate_input))
-                            io_s.append(input_io)
-                        if len(io_s) == 2 and sum(io_s) == 0:
-                            gate_io = 1
-                        else:
-                            gate_io = 0
-                    elif gate_type == 'NOT':  # (gate_type == 'NOT')
-                        input_io = get_tb_IO_val(repr(gate_inputs))
-                        if input_io is None:
-                            fill_truth_table_IO(gate_inputs)
-                        input_io = get_tb_IO_val(repr(gate_inputs))
-                        if input_io == 0:
-                            gate_io = 1
-                        elif input_io == 1:
-                            gate_io = 0
-                        else:
-                            raise RecursionError
-                    # finally, update the truth table for this gate
-                    set_tb_IO(repr(graph_node), gate_io)
-                    graph_node.IO = gate_io
-                elif type(graph_node) == Output:
-                    input_gate = graph.find_prev(graph_node)
-                    gate_io = get_tb_IO_val(repr(input_gate))
-                    if gate_io is None:
-                        fill_truth_table_IO(input_gate)
-                    gate_io = get_tb_IO_val(repr(input_gate))
-                    # output just carries the gate I/O
-                    set_tb_IO(repr(graph_node), gate_io)
-                    graph_node.IO = gate_io
-                elif type(graph_node) == Input:
-                    raise NameError(
-                        'not suppose to recurse to input to fill truth table')
-                else:
-                    raise RecursionError
-
-            for gout in graph.outputs:
-                try:
-                    fill_truth_table_IO(gout)
-                except Exception as e_:
-                    # FIXME: this happens for something like the sr_latch, it is not currently supported,
-                    #  but with modifications to the truth table, this type of unstable could work
-                    debug_print(
-                        f'{self.verilog_name} has unsupported circuit configuration due to flip-flopping.\n'
-                        f'{e_}')
-                    print_table([truth_table_labels] + truth_table)
-                    log.cf.info('\n')
-                    raise RecursionError
+            # NOTE: the I/O only depends on the netlist; it is computed once (EvalPlan.io) and copied in here
+            for (k, tb_index_) in io_columns:
+                truth_table[r][tb_index_] = int(logic_io[r, k])
+                graph.nodes[k].IO = truth_table[r][tb_index_]
 
+            node_scores = graph.evaluate()  # NOTE: each node scored once per row, in plan order
             for graph_output in graph.outputs:
                 output_name = graph_output.name
                 graph_output_idx = truth_table_labels.index(output_name)
                 if truth_table[r][graph_output_idx] is None:
-                    output_score = graph.get_score(graph_output, verbose=self.verbose,
-                                                   table_info={'table': truth_table,
-                                                               'labels': truth_table_labels,
-                                                               'r': r})[0]
+                    output_score = node_scores[graph.node_index(graph_output)][0]
                     truth_table[r][graph_output_idx] = output_score
                     circuit_scores.append((output_score, output_name))
 
@@ -1125,13 +2400,11 @@ class CELLO3:
         # except:
         #   either Max() ?
         truth_tested_output_values = {}
-        for o in graph.outputs:
-            tb_io_index = get_tb_IO_index(repr(o))
+        for o, on_rows in zip(graph.outputs, graph.plan.on_rows):
             tb_index = truth_table_labels.index(repr(o))
             truth_values = {0: [], 1: []}
             for r in range(len(truth_table)):
-                o_io_val = truth_table[r][tb_io_index]
-                truth_values[o_io_val].append(truth_table[r][tb_index])
+                truth_values[int(on_rows[r])].append(truth_table[r][tb_index])
             try:
                 truth_tested_output_values[repr(o)] = min(
                     truth_values[1]) / max(truth_values[0])
@@ -1183,6 +2456,81 @@ class CELLO3:
 
         return score
 
+    def score_circuit_vectorized(self, graph: AssignGraph):
+        """
+        Same result as score_circuit, but the truth table is held as a (2**num_inputs, num_columns) NumPy array and
+        each node's response is evaluated for all rows at once, visiting the gates in topological order.
+
+        :param graph: AssignGraph
+        :return: score: tuple[float, list[list[int | float]], list[str]]
+        """
+
+        self.__add_eval_params(graph)
+
+        num_inputs = len(graph.inputs)
+        num_gates = len(graph.gates)
+        num_outputs = len(graph.outputs)
+        truth_table_labels = generate_truth_table(0, num_gates, num_outputs, graph.inputs, graph.gates,
+                                                  graph.outputs)[1]
+        num_rows = 2 ** num_inputs
+        table = np.zeros((num_rows, len(truth_table_labels)))
+        col = {label: c for c, label in enumerate(truth_table_labels)}
+
+        # NOTE: the I/O of every node only depends on the netlist (computed once, see EvalPlan.io)
+        if graph.plan.io is None:
+            raise RecursionError(f'{self.verilog_name} has unsupported circuit configuration due to flip-flopping.')
+        io = {repr(node): graph.plan.io[:, k] for k, node in enumerate(graph.nodes)}
+        scores, tandems = {}, {}
+        for graph_input in graph.inputs:
+            scores[repr(graph_input)], tandems[repr(graph_input)] = graph_input.eval_input_array(io[repr(graph_input)])
+
+        for graph_gate, prevs in graph.topological_order():
+            if graph_gate.gate_type == 'NOR':
+                x = graph_gate.input_comp_eq(**{**graph_gate.comp_params,
+                                                'x1': scores[repr(prevs[0])], 'x2': scores[repr(prevs[1])],
+                                                't1': tandems[repr(prevs[0])]})
+                x = np.broadcast_to(x, (num_rows,))
+            elif graph_gate.gate_type == 'NOT':
+                x = scores[repr(prevs[0])]
+            else:
+                # there shouldn't be gates other than NOR/NOT
+                raise Exception
+            scores[repr(graph_gate)], tandems[repr(graph_gate)] = graph_gate.eval_gates_array(x)
+            graph_gate.IO = int(io[repr(graph_gate)][-1])
+
+        truth_tested_output_values = {}
+        for graph_output, on in zip(graph.outputs, graph.plan.on_rows):
+            prev = graph.find_prev(graph_output)
+            scores[repr(graph_output)] = graph_output.eval_output_array(scores[repr(prev)])
+            graph_output.IO = int(io[repr(graph_output)][-1])
+
+            on_values = [float(v) for v in scores[repr(graph_output)][on]]
+            off_values = [float(v) for v in scores[repr(graph_output)][~on]]
+            try:
+                truth_tested_output_values[repr(graph_output)] = min(on_values) / max(off_values)
+            except Exception:
+                # this means that either all the rows in the output is ON or all OFF
+                try:
+                    truth_tested_output_values[repr(graph_output)] = max(off_values)
+                except Exception:
+                    truth_tested_output_values[repr(graph_output)] = max(on_values)
+
+        for name in io:
+            table[:, col[name + '_I/O']] = io[name]
+            table[:, col[name]] = scores[name]
+        io_cols = [c for c, label in enumerate(truth_table_labels) if label.endswith('_I/O')]
+        truth_table = table.tolist()
+        for row in truth_table:
+            for c in io_cols:
+                row[c] = int(row[c])
+
+        if self.print_iters:
+            print_table([truth_table_labels] + truth_table, False)
+            print(truth_tested_output_values)
+
+        # NOTE: **return the lower-scored output of the multiple outputs**
+        return min(truth_tested_output_values.values()), truth_table, truth_table_labels
+
     def __del__(self):
 
         log.cf.info('Cello object deleted...\n')
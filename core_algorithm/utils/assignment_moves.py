@@ -0,0 +1,211 @@
+"""
+Local moves between gate assignments, for searches that walk the assignment space step by step (e.g. discrete
+annealing) instead of jumping between unrelated permutation indices.
+An assignment is a tuple of three int arrays: the index (in i_list, o_list, g_list) of the sensor, output device, and
+gate group assigned to each input, output, and gate node of the netlist (as in BatchScorer.score_assignments).
+
+Class: AssignmentMoves: random_assignment(), random_move(), all_moves(), apply(), changed_nodes(), names(), indices()
+Class: MetropolisChain: step()
+temperature(), log_score(), metropolis()
+"""
+
+import itertools
+import math
+
+import numpy as np
+
+KINDS = ('in', 'out', 'gate')
+COOLING_SCHEDULES = ('geometric', 'linear', 'logarithmic')
+
+
+class AssignmentMoves:
+    """
+    Proposes random moves on an assignment, each changing one or two nodes:
+        swap:    two nodes of the same kind exchange their sensors/devices/groups (e.g. swap two gate groups)
+        replace: a node is given a sensor/device/group that is not used yet (e.g. replace a gate group by an unused one)
+
+    A move is a tuple (move, kind, a, b): ('swap', kind, node a, node b) or ('replace', kind, node a, list index b).
+    """
+
+    def __init__(self, i_list: list, o_list: list, g_list: list):
+        self.lists = (list(i_list), list(o_list), list(g_list))
+
+    def random_assignment(self, rng: np.random.Generator, i: int, o: int, g: int) -> tuple:
+        """
+        :param rng: np.random.Generator
+        :param i: int: number of input nodes
+        :param o: int: number of output nodes
+        :param g: int: number of gate nodes
+        :return: tuple[np.ndarray, np.ndarray, np.ndarray]: a random valid assignment (no name used twice)
+        """
+        used = set()
+        assignment = []
+        for names, k in zip(self.lists, (i, o, g)):
+            free = [j for j, n in enumerate(names) if n not in used]
+            if len(free) < k:
+                raise ValueError(f'Not enough distinct names to assign {k} nodes from {names}')
+            idx = rng.choice(free, k, replace=False) if k else np.zeros(0, dtype=np.int64)
+            used.update(names[j] for j in idx)
+            assignment.append(np.asarray(idx, dtype=np.int64))
+        return tuple(assignment)
+
+    def random_move(self, rng: np.random.Generator, assignment: tuple):
+        """
+        Draws one of the possible kinds of move uniformly (e.g. gate swap, gate replace, input swap, ...), then a
+        random move of that kind.
+
+        :param rng: np.random.Generator
+        :param assignment: tuple of 3 int arrays
+        :return: tuple (move, kind, a, b) | None (if the assignment has no neighbours)
+        """
+        used = {n for perm in self.names(assignment) for n in perm}
+        options = []
+        for t, (kind, idx, names) in enumerate(zip(KINDS, assignment, self.lists)):
+            if len(idx) >= 2:
+                options.append(('swap', t, None))
+            free = [j for j, n in enumerate(names) if n not in used]
+            if len(idx) >= 1 and free:
+                options.append(('replace', t, free))
+        if not options:
+            return None
+        move, t, free = options[rng.integers(len(options))]
+        a = int(rng.integers(len(assignment[t])))
+        if move == 'swap':
+            b = int(rng.integers(len(assignment[t]) - 1))
+            b += b >= a  # any node but a
+        else:
+            b = int(free[rng.integers(len(free))])
+        return move, KINDS[t], a, b
+
+    def all_moves(self, assignment: tuple) -> list:
+        """
+        :param assignment: tuple of 3 int arrays
+        :return: list of tuple (move, kind, a, b): every swap and replace move of the assignment (its neighbourhood)
+        """
+        used = {n for perm in self.names(assignment) for n in perm}
+        moves = []
+        for kind, idx, names in zip(KINDS, assignment, self.lists):
+            moves.extend(('swap', kind, a, b) for a, b in itertools.combinations(range(len(idx)), 2))
+            free = [j for j, n in enumerate(names) if n not in used]
+            moves.extend(('replace', kind, a, b) for a in range(len(idx)) for b in free)
+        return moves
+
+    @staticmethod
+    def apply(assignment: tuple, move: tuple) -> tuple:
+        """
+        :param assignment: tuple of 3 int arrays
+        :param move: tuple (move, kind, a, b)
+        :return: tuple of 3 int arrays: the new assignment (the given one is not modified)
+        """
+        (name, kind, a, b) = move
+        t = KINDS.index(kind)
+        idx = assignment[t].copy()
+        if name == 'swap':
+            idx[a], idx[b] = idx[b], idx[a]
+        else:
+            idx[a] = b
+        return tuple(idx if s == t else assignment[s] for s in range(3))
+
+    @staticmethod
+    def changed_nodes(move: tuple) -> list:
+        """
+        :param move: tuple (move, kind, a, b)
+        :return: list of (kind, node index) assigned another sensor/device/group by the move (see BatchScorer.evaluate)
+        """
+        (name, kind, a, b) = move
+        return [(kind, a), (kind, b)] if name == 'swap' else [(kind, a)]
+
+    def names(self, assignment: tuple) -> tuple:
+        """
+        :param assignment: tuple of 3 int arrays
+        :return: tuple[tuple, tuple, tuple]: (i_perm, o_perm, g_perm) of names, as used by prep_assign_for_scoring
+        """
+        return tuple(tuple(names[j] for j in idx) for names, idx in zip(self.lists, assignment))
+
+    def indices(self, design: tuple) -> tuple:
+        """
+        :param design: tuple[tuple, tuple, tuple]: (i_perm, o_perm, g_perm) of names
+        :return: tuple of 3 int arrays: the assignment (inverse of names)
+        """
+        return tuple(np.array([names.index(n) for n in perm], dtype=np.int64)
+                     for names, perm in zip(self.lists, design))
+
+
+def temperature(schedule: str, t_start: float, t_end: float, progress: float) -> float:
+    """
+    Annealing temperature after a fraction of the search.
+
+    :param schedule: str: 'geometric' (exponential decay), 'linear', or 'logarithmic' (fast drop, then slow)
+    :param t_start: float: initial temperature
+    :param t_end: float: final temperature
+    :param progress: float: 0 (start) to 1 (end)
+    :return: float
+    """
+    progress = min(max(progress, 0.0), 1.0)
+    if schedule == 'geometric':
+        return t_start * (t_end / t_start) ** progress
+    if schedule == 'linear':
+        return t_start + (t_end - t_start) * progress
+    if schedule == 'logarithmic':
+        # T = t_start / (1 + c * log(1 + 1000 * progress)), with c set so that T reaches t_end
+        c = (t_start / t_end - 1) / math.log(1001)
+        return t_start / (1 + c * math.log(1 + 1000 * progress))
+    raise ValueError(f'Unknown cooling schedule {schedule!r} (expected one of {COOLING_SCHEDULES})')
+
+
+def log_score(score: float) -> float:
+    """log10 of a circuit score (the energy scale of the annealing temperatures); -12 for scores <= 0 or NaN"""
+    return math.log10(score) if score > 0 else -12.0
+
+
+def metropolis(rng: np.random.Generator, new_score: float, current_score: float, t: float) -> bool:
+    """
+    Metropolis criterion: a better design is always accepted, a worse one with probability
+    exp(log10(new_score / current_score) / t).
+
+    :return: bool: whether to move to the new design
+    """
+    delta = log_score(new_score) - log_score(current_score)
+    return delta >= 0 or (t > 0 and rng.random() < math.exp(delta / t))
+
+
+class MetropolisChain:
+    """
+    Random walk over assignments: each step proposes a random move (AssignmentMoves), re-scores only the nodes it
+    changes (BatchScorer.evaluate), and accepts it by the Metropolis criterion at the given temperature.
+
+    Attributes: current, design, score
+    """
+
+    def __init__(self, scorer, moves: AssignmentMoves, rng: np.random.Generator, assignment: tuple):
+        self.scorer = scorer
+        self.moves = moves
+        self.rng = rng
+        self.current = assignment
+        """current assignment (tuple of 3 int arrays)"""
+        self.design = moves.names(assignment)
+        """(i_perm, o_perm, g_perm) of the current assignment"""
+        self.__values = scorer.evaluate(*assignment)
+        self.score = float(self.__values['score'][0])
+
+    def step(self, t: float, lookup=None):
+        """
+        :param t: float: temperature
+        :param lookup: callable(design) -> score | None: known scores (those designs are not re-scored)
+        :return: tuple[tuple, float, bool] | None: proposed design, its score, and whether it was scored (i.e. not
+            found by lookup); None if the current assignment has no neighbours
+        """
+        move = self.moves.random_move(self.rng, self.current)
+        if move is None:
+            return None
+        candidate, changed = self.moves.apply(self.current, move), self.moves.changed_nodes(move)
+        design = self.moves.names(candidate)
+        score = lookup(design) if lookup is not None else None
+        values = None
+        if score is None:
+            values = self.scorer.evaluate(*candidate, self.__values, changed)
+            score = float(values['score'][0])
+        if metropolis(self.rng, score, self.score, t):
+            self.current, self.design, self.score = candidate, design, score
+            self.__values = values if values is not None else self.scorer.evaluate(*candidate, self.__values, changed)
+        return design, score, values is not None
@@ -0,0 +1,275 @@
+"""
+Runs a batch of Cello jobs (Verilog, UCF, Input & Output files, and options) listed in a manifest, on a pool of worker
+processes, each job with its own time limit, and writes a JSON summary of all jobs (rewritten as each job ends, so an
+interrupted batch still leaves a summary of the jobs done).  Each worker parses a UCF only once for all its jobs (see
+cached_ucf); a worker whose job times out is killed (with any processes it started) and replaced.  Each worker gets its
+jobs from (and sends their results back through) its own pipe, so killing one leaves the others' channels intact.
+
+Manifest: JSON list of jobs, or {"defaults": {...}, "jobs": [...]} (defaults apply to every job, options merged), or
+CSV with a header row; fields: verilog, ucf, input, output, options (a JSON object in CSV), timeout, name.
+Only verilog and ucf are required (e.g. "and", "Eco1C2G2T2": input & output default to Eco1C2G2T2.input/.output).
+
+Usage: python -m core_algorithm.utils.batch_runner manifest.json [--summary summary.json] [--workers 4] ...
+
+Class: BatchJob
+load_manifest(), run_job(), run_batch(), write_summary()
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from multiprocessing.connection import wait
+
+from config import VERILOGS_DIR, CONSTRAINTS_DIR, TEMP_OUTPUTS_DIR
+from core_algorithm.celloAlgo import CELLO3, CelloError
+from core_algorithm.utils import log
+
+STATUSES = ('SUCCESS', 'FAILED', 'TIMEOUT', 'PENDING')
+
+
+@dataclass
+class BatchJob:
+    """
+    One (Verilog, UCF) job of a batch.
+
+    Attributes: verilog, ucf, input, output, options, timeout, name
+    """
+    verilog: str
+    """Verilog file name (with or without .v)"""
+    ucf: str
+    """UCF file name (with or without .UCF)"""
+    input: str = ''
+    """Input file name (default: <UCF name>.input)"""
+    output: str = ''
+    """Output file name (default: <UCF name>.output)"""
+    options: dict = field(default_factory=dict)
+    """CELLO3 options"""
+    timeout: float = None
+    """max wall time (seconds) of the job; None: the batch's default"""
+    name: str = ''
+    """unique name of the job, also its output subfolder (default: <verilog>+<UCF name>)"""
+
+    def __post_init__(self):
+        self.verilog = self.verilog[:-2] if self.verilog.endswith('.v') else self.verilog
+        base = self.ucf[:-4] if self.ucf.endswith('.UCF') else self.ucf
+        self.ucf = base + '.UCF'
+        self.input = self.input or base + '.input'
+        self.output = self.output or base + '.output'
+        self.timeout = float(self.timeout) if self.timeout not in (None, '') else None
+        self.name = self.name or f'{self.verilog}+{base}'
+
+
+def load_manifest(path: str) -> list[BatchJob]:
+    """
+    :param path: str: .json or .csv manifest (see module docstring)
+    :return: list[BatchJob]
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.csv'):
+            jobs, defaults = [{k: v for k, v in row.items() if v} for row in csv.DictReader(f)], {}
+            for job in jobs:
+                job['options'] = json.loads(job['options']) if 'options' in job else {}
+        else:
+            manifest = json.load(f)
+            (jobs, defaults) = (manifest, {}) if isinstance(manifest, list) else \
+                (manifest['jobs'], manifest.get('defaults', {}))
+    batch = [BatchJob(**{**defaults, **job, 'options': {**defaults.get('options', {}), **job.get('options', {})}})
+             for job in jobs]
+    names = [job.name for job in batch]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f'Duplicate job names in {path} (give them distinct "name" fields): {duplicates}')
+    return batch
+
+
+def run_job(job: BatchJob, verilogs_path: str, constraints_path: str, out_path: str) -> dict:
+    """
+    Runs one job (in this process), reusing the UCFs already parsed by it.
+
+    :param job: BatchJob
+    :param verilogs_path: str
+    :param constraints_path: str
+    :param out_path: str: output folder of the batch (the job writes to its own subfolder)
+    :return: dict: summary of the job (status, best score, number of designs scored, time, issues logged...)
+    """
+    start = time.perf_counter()
+    summary = {'status': 'SUCCESS', 'best_score': None, 'designs_scored': None, 'error': None}
+    try:
+        cello = CELLO3(job.verilog, job.ucf, job.input, job.output, verilogs_path, constraints_path,
+                       os.path.join(out_path, job.name), {'reuse_ucf': True, **job.options})
+        summary['best_score'], summary['designs_scored'] = float(cello.best_score), int(cello.iter_count)
+    except CelloError as e:
+        summary['status'], summary['error'] = 'FAILED', f'{e.msg}: {e.exception!r}'
+    except Exception as e:  # NOTE: e.g. errors outside of CELLO3's stages; the batch goes on
+        summary['status'], summary['error'] = 'FAILED', repr(e)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    summary['logged'] = dict(log.log_counts)  # warnings, errors, and criticals logged by the job
+    return summary
+
+
+def _worker(conn, verilogs_path, constraints_path, out_path):
+    """Worker process: runs the jobs received through its pipe, sending back their results, until it gets None."""
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()  # NOTE: so a timed-out job can be killed with its own processes (yosys, search workers...)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):  # NOTE: each job has its own log file
+        while (task := conn.recv()) is not None:
+            (index, job) = task
+            conn.send((index, run_job(job, verilogs_path, constraints_path, out_path)))
+
+
+def _kill(process):
+    """Kills a worker process, and the processes it started."""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass  # NOTE: already exited
+    process.join()
+
+
+def write_summary(path: str, jobs: list[BatchJob], results: list, started: datetime, workers: int):
+    """
+    Writes the JSON summary of a batch (written to a temporary file first, so the summary is always complete).
+
+    :param path: str
+    :param jobs: list[BatchJob]
+    :param results: list[dict | None]: summary of each job (None: not done yet)
+    :param started: datetime: start of the batch
+    :param workers: int
+    """
+    entries = [{**asdict(job), **(result or {'status': 'PENDING'})} for job, result in zip(jobs, results)]
+    summary = {
+        'started': started.isoformat(timespec='seconds'),
+        'seconds': round((datetime.now() - started).total_seconds(), 3),
+        'workers': workers,
+        'counts': {status: sum(e['status'] == status for e in entries) for status in STATUSES},
+        'jobs': entries,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def run_batch(jobs: list[BatchJob], summary_path: str, verilogs_path: str = VERILOGS_DIR,
+              constraints_path: str = CONSTRAINTS_DIR, out_path: str = TEMP_OUTPUTS_DIR, workers: int = 0,
+              timeout: float = None, poll: float = 0.5) -> list[dict]:
+    """
+    Runs all jobs on a pool of worker processes, killing (and replacing) the worker of any job over its time limit.
+
+    :param jobs: list[BatchJob]
+    :param summary_path: str: JSON summary (see write_summary)
+    :param verilogs_path: str
+    :param constraints_path: str
+    :param out_path: str: output folder (one subfolder per job)
+    :param workers: int: number of worker processes (0: one per CPU core)
+    :param timeout: float: default max wall time (seconds) of a job; None: no limit
+    :param poll: float: seconds between checks of the time limits
+    :return: list[dict]: summary of each job (in the order of jobs)
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    started = datetime.now()
+    os.makedirs('logs', exist_ok=True)  # NOTE: each job's log is written to logs/ (see log.config_logger)
+    ctx = multiprocessing.get_context()
+    pending = deque(range(len(jobs)))
+    slots = {}  # pipe of each worker: [process, index of its job (None: idle), start time]
+    results = [None] * len(jobs)
+
+    def start_worker():
+        conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_worker, args=(child_conn, verilogs_path, constraints_path, out_path))
+        process.start()
+        child_conn.close()
+        slots[conn] = [process, None, None]
+
+    def stop_worker(conn):
+        _kill(slots.pop(conn)[0])
+        conn.close()
+        if pending:
+            start_worker()  # NOTE: takes over the stopped worker's share of the jobs
+
+    def finish(index, result):
+        if results[index] is not None:
+            return  # NOTE: already ended (e.g. timed out)
+        results[index] = result
+        write_summary(summary_path, jobs, results, started, workers)
+        print(f'[{sum(r is not None for r in results)}/{len(jobs)}] {jobs[index].name}: {result["status"]} '
+              f'(score {result.get("best_score")}, {result.get("seconds")} s)')
+
+    write_summary(summary_path, jobs, results, started, workers)
+    for _ in range(workers):
+        start_worker()
+    try:
+        while None in results:
+            for conn, slot in slots.items():
+                if slot[1] is None and pending:
+                    slot[1], slot[2] = pending.popleft(), time.monotonic()
+                    try:
+                        conn.send((slot[1], jobs[slot[1]]))
+                    except OSError:
+                        pass  # NOTE: the worker died (its pipe is closed, so its job is reported FAILED below)
+            busy = [conn for conn, slot in slots.items() if slot[1] is not None]
+            if not busy:
+                break  # NOTE: no worker left (jobs still marked PENDING in the summary)
+
+            for conn in wait(busy, timeout=poll):
+                (process, index, start) = slots[conn]
+                try:
+                    (_, result) = conn.recv()
+                except (EOFError, OSError):  # NOTE: the worker died
+                    process.join()
+                    finish(index, {'status': 'FAILED', 'error': f'worker exited (code {process.exitcode})',
+                                   'seconds': round(time.monotonic() - start, 3)})
+                    stop_worker(conn)
+                    continue
+                slots[conn][1] = None
+                finish(index, result)
+
+            now = time.monotonic()
+            for conn in [conn for conn in busy if conn in slots and slots[conn][1] is not None]:
+                (process, index, start) = slots[conn]
+                limit = jobs[index].timeout if jobs[index].timeout is not None else timeout
+                if limit is None or now - start <= limit or conn.poll():
+                    continue  # NOTE: a result sent in the meantime is read first
+                stop_worker(conn)
+                finish(index, {'status': 'TIMEOUT', 'error': f'time limit reached ({limit} s)',
+                               'seconds': round(now - start, 3)})
+    finally:
+        for conn, (process, _, _) in list(slots.items()):
+            if None in results:
+                _kill(process)  # NOTE: interrupted batch
+            else:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass  # NOTE: already exited
+                process.join()
+            conn.close()
+    write_summary(summary_path, jobs, results, started, workers)
+    return [result or {'status': 'PENDING'} for result in results]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a batch of Cello jobs listed in a manifest (JSON or CSV).')
+    parser.add_argument('manifest')
+    parser.add_argument('--summary', default=None, help='JSON summary (default: <manifest>_summary.json)')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (default: one per CPU core)')
+    parser.add_argument('--timeout', type=float, default=None, help='default max seconds per job')
+    parser.add_argument('--verilogs', default=VERILOGS_DIR)
+    parser.add_argument('--constraints', default=CONSTRAINTS_DIR)
+    parser.add_argument('--out', default=TEMP_OUTPUTS_DIR)
+    args = parser.parse_args()
+    batch = load_manifest(args.manifest)
+    summary_file = args.summary or os.path.splitext(args.manifest)[0] + '_summary.json'
+    print(f'Running {len(batch)} jobs from {args.manifest} (summary: {summary_file})...')
+    run_batch(batch, summary_file, args.verilogs, args.constraints, args.out, args.workers, args.timeout)
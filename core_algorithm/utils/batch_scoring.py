@@ -0,0 +1,346 @@
+"""
+Scores whole batches of candidate gate assignments per call with NumPy broadcasting, instead of building Input, Gate,
+Output, and AssignGraph objects and scoring them one assignment at a time.
+Gives the same circuit scores as CELLO3.score_circuit (but not the truth tables or graphs, which are only needed for
+the final design(s)).
+
+Class: BatchScorer: score(), score_assignments(), evaluate(), gate_response(), output_response(), split_ranks(),
+    search_range()
+"""
+
+import numpy as np
+
+from core_algorithm.utils.gate_assignment import *
+from core_algorithm.utils.permutations import PermutationIndexer
+
+
+class BatchScorer:
+    """
+    Gathers the UCF parameters of the sensors, gate groups, and output devices into arrays once, then scores a batch
+    of N candidate assignments at a time as (N, 2**num_inputs) arrays, evaluating the gates in topological order.
+
+    Candidates are given either as permutation indices (score) or as indices into i_list/o_list/g_list for each
+    node of the netlist (score_assignments).  Invalid candidates (same name used twice) are scored as NaN.
+    """
+
+    def __init__(self, library: UCFLibrary, netgraph: GraphParser, i_list: list, o_list: list, g_list: list,
+                 i_perms=None, o_perms=None, g_perms=None):
+        self.i_list, self.o_list, self.g_list = list(i_list), list(o_list), list(g_list)
+        self.num_in, self.num_out, self.num_gates = len(netgraph.inputs), len(netgraph.outputs), len(netgraph.gates)
+        self.perms = [self.__perm_array(perms, names, k) for perms, names, k in
+                      [(i_perms, self.i_list, self.num_in), (o_perms, self.o_list, self.num_out),
+                       (g_perms, self.g_list, self.num_gates)]]
+        self.sizes = [perms.size if isinstance(perms, PermutationIndexer) else len(perms) if perms is not None else 0
+                      for perms in self.perms]
+        """number of input, output, and gate permutations"""
+        self.total = self.sizes[0] * self.sizes[1] * self.sizes[2]
+        """number of (i_perm, o_perm, g_perm) assignments, i.e. combined ranks 0..total-1 (see split_ranks)"""
+
+        # Unique ids across all three lists (to reject candidates that use the same name as e.g. input and output)
+        names = {n: k for k, n in enumerate(dict.fromkeys(self.i_list + self.o_list + self.g_list))}
+        self.__name_ids = [np.array([names[n] for n in lst]) for lst in [self.i_list, self.o_list, self.g_list]]
+
+        self.__load_circuit(netgraph)
+        self.__load_sensors(library)
+        self.__load_gates(library)
+        self.__load_outputs(library)
+
+    @staticmethod
+    def __perm_array(perms, names, k):
+        """Permutations as (num_perms, k) arrays of indexes into names (PermutationIndexers are unranked lazily)"""
+        if perms is None or (isinstance(perms, PermutationIndexer) and perms.items == tuple(names)):
+            return perms
+        index = {n: j for j, n in enumerate(names)}
+        return np.array([[index[n] for n in perm] for perm in perms], dtype=np.int64).reshape(len(perms), k)
+
+    @staticmethod
+    def __unrank(perms, ranks):
+        return perms.unrank_array(ranks) if isinstance(perms, PermutationIndexer) else perms[ranks]
+
+    def __load_circuit(self, netgraph: GraphParser):
+        """
+        Evaluation order of the gates (by index), with their predecessors as ('in' | 'gate', index), and the
+        Boolean I/O of the inputs and outputs (from the netlist's EvalPlan, shared with score_circuit).
+        """
+        plan = netgraph.plan
+        if plan.io is None:
+            raise RecursionError('Netlist has an unsupported circuit configuration (e.g. a feedback loop)')
+
+        def ref(k):
+            return ('gate', k - plan.num_inputs) if k >= plan.num_inputs else ('in', k)
+
+        self.order = [(k - plan.num_inputs, netgraph.gates[k - plan.num_inputs].gate_type,
+                       [ref(p) for p in plan.prevs[k]]) for k in plan.gate_order]
+        self.output_prevs = [plan.prevs[k][0] - plan.num_inputs for k in plan.output_order]
+        self.num_rows = 2 ** self.num_in
+        self.in_io = plan.io[:, :self.num_in].T.astype(bool)
+        self.on_rows = plan.on_rows
+        """per output: bool array of the rows in which it is ON"""
+        self.gate_io = plan.io[:, plan.num_inputs:plan.num_inputs + self.num_gates].T.astype(bool)
+        """per gate: bool array of the rows in which its output is ON"""
+
+    def __load_sensors(self, library: UCFLibrary):
+        # NOTE: reuses Input.add_eval_params so that sensor outputs are computed exactly as in score_circuit
+        sensors = []
+        for name in self.i_list:
+            sensor = Input(name, 0)
+            if name in library.sensors:
+                sensor.add_eval_params(library.sensors[name].equations, library.sensors[name].params)
+            sensors.append(sensor)
+        self.sensor_high = np.array([s.out_scores['high'] for s in sensors], dtype=float)
+        self.sensor_low = np.array([s.out_scores['low'] for s in sensors], dtype=float)
+        self.tandem_high = np.array([s.tandem_scores['high'] for s in sensors], dtype=float)
+        self.tandem_low = np.array([s.tandem_scores['low'] for s in sensors], dtype=float)
+
+    def __load_gates(self, library: UCFLibrary):
+        # NOTE: reuses Gate.add_eval_params (one Gate per group) for the same equations/params as in score_circuit
+        groups = []
+        for name in self.g_list:
+            gate = Gate(name, 'NOR', [], 0)
+            for m in library.gate_groups.get(name, []):
+                gate.add_eval_params(m.equations, m.name, m.params)
+            groups.append(gate)
+        self.max_members = max([len(g.gate_params) for g in groups] + [1])
+        shape = (len(groups), self.max_members)
+
+        self.member_valid = np.zeros(shape, dtype=bool)
+        self.member_names = [list(g.gate_params.keys()) for g in groups]
+        member_params = {}
+        for j, g in enumerate(groups):
+            for m, params in enumerate(g.gate_params.values()):
+                self.member_valid[j, m] = True
+                for p, v in params.items():
+                    member_params.setdefault(p, np.full(shape, np.nan))[j, m] = v
+        self.member_params = member_params
+
+        # Groups sharing the same equations are evaluated together (usually all groups in a UCF)
+        self.comp_eqs = self.__split_by_equation([g.input_comp_eq for g in groups])
+        self.response_eqs = self.__split_by_equation([g.response_eq for g in groups])
+        self.tandem_eqs = self.__split_by_equation([g.tandem_factor_eq for g in groups])
+        comp_params = {}
+        for j, g in enumerate(groups):
+            for p, v in g.comp_params.items():
+                comp_params.setdefault(p, np.full(len(groups), np.nan))[j] = v
+        self.comp_params = comp_params
+
+    def __load_outputs(self, library: UCFLibrary):
+        # NOTE: reuses Output.add_eval_params for the same equations/params as in score_circuit
+        outputs = []
+        for name in self.o_list:
+            device = Output(name, 0)
+            m = library.outputs.get(name)
+            if m is not None and 'response_function' in m.equations:
+                device.add_eval_params(m.equations['response_function'], m.params,
+                                       m.functions['response_function'], m.variables.get('response_function'))
+            outputs.append(device)
+        self.output_eqs = self.__split_by_equation([d.response_eq for d in outputs])
+        output_params = {}
+        for j, d in enumerate(outputs):
+            for p, v in {**d.params, 'c': d.unit_conversion}.items():
+                if v is not None:
+                    output_params.setdefault(p, np.full(len(outputs), np.nan))[j] = v
+        self.output_params = output_params
+
+    @staticmethod
+    def __split_by_equation(equations):
+        """
+        :param equations: list[CompiledEquation | None]: one per group/device
+        :return: list[tuple[CompiledEquation, np.ndarray]]: each distinct equation with a bool mask of its users
+        """
+        split = []
+        for eq in dict.fromkeys(e for e in equations if e is not None):
+            split.append((eq, np.array([e is eq for e in equations])))
+        return split
+
+    @staticmethod
+    def __gather(params, idx, eq, exclude, expand):
+        """Parameter arrays used by eq, gathered for the candidates' groups/devices (idx) and expanded to broadcast"""
+        return {p: params[p][idx][expand] for p in eq.variables if p not in exclude and p in params}
+
+    def split_ranks(self, ranks) -> np.ndarray:
+        """
+        Splits combined ranks into (input, output, gate) permutation indices, enumerating the assignments in the same
+        order as the nested loops of exhaustive_assign.
+
+        :param ranks: int array (N,): 0 <= rank < total
+        :return: np.ndarray (N, 3)
+        """
+        ranks = np.asarray(ranks, dtype=np.int64)
+        _, o_size, g_size = self.sizes
+        return np.stack([ranks // (o_size * g_size), (ranks // g_size) % o_size, ranks % g_size], axis=1)
+
+    def search_range(self, start: int, stop: int, batch_size: int = 4096, min_score: float = 0):
+        """
+        Scores all assignments with combined ranks in [start, stop), batch_size at a time, keeping the best one(s).
+
+        :param start: int
+        :param stop: int
+        :param batch_size: int
+        :param min_score: float: only scores >= min_score are kept (as with CELLO3.best_score)
+        :return: tuple[float, list[tuple[int, int, int]], int]: best score (or min_score), permutation indices of
+            all assignments with that score (in rank order), and number of valid assignments scored
+        """
+        best, ties, count = min_score, [], 0
+        for lo in range(start, stop, batch_size):
+            x = self.split_ranks(np.arange(lo, min(lo + batch_size, stop)))
+            scores = self.score(x)
+            valid = ~np.isnan(scores)
+            count += int(valid.sum())
+            if not valid.any():
+                continue
+            batch_best = float(np.nanmax(scores))
+            if batch_best > best:
+                best, ties = batch_best, []
+            if batch_best == best:
+                ties.extend(tuple(r) for r in x[scores == batch_best].tolist())
+        return best, ties, count
+
+    def score(self, x) -> np.ndarray:
+        """
+        Scores candidates given as permutation indices (as in prep_assign_for_scoring).
+
+        :param x: int array (N, 3): index of the input, output, and gate permutation of each candidate
+        :return: np.ndarray (N,): circuit scores (NaN for invalid candidates)
+        """
+        x = np.asarray(x, dtype=np.int64).reshape(-1, 3)
+        return self.score_assignments(*[self.__unrank(self.perms[j], x[:, j]) for j in range(3)])
+
+    def score_assignments(self, i_idx, o_idx, g_idx) -> np.ndarray:
+        """
+        Scores candidates given as the index in i_list/o_list/g_list assigned to each input/output/gate node.
+
+        :param i_idx: int array (N, num_inputs)
+        :param o_idx: int array (N, num_outputs)
+        :param g_idx: int array (N, num_gates)
+        :return: np.ndarray (N,): circuit scores (NaN for invalid candidates)
+        """
+        i_idx, o_idx, g_idx = [np.asarray(a, dtype=np.int64).reshape(-1, k) for a, k in
+                               [(i_idx, self.num_in), (o_idx, self.num_out), (g_idx, self.num_gates)]]
+        scores = self.evaluate(i_idx, o_idx, g_idx)['score']
+
+        ids = np.sort(np.concatenate([self.__name_ids[0][i_idx], self.__name_ids[1][o_idx],
+                                      self.__name_ids[2][g_idx]], axis=1), axis=1)
+        scores[(ids[:, 1:] == ids[:, :-1]).any(axis=1)] = np.nan
+        return scores
+
+    def evaluate(self, i_idx, o_idx, g_idx, values: dict = None, changed=None) -> dict:
+        """
+        Evaluates all nodes of the candidates (as in score_assignments, but without the check for invalid candidates).
+        Given the values of a previous evaluation, only the nodes downstream of the changed nodes are re-evaluated,
+        e.g. for a local search that moves a single gate group.
+
+        :param i_idx: int array (N, num_inputs)
+        :param o_idx: int array (N, num_outputs)
+        :param g_idx: int array (N, num_gates)
+        :param values: dict: result of a previous evaluate() of candidates that differ only in the changed nodes
+        :param changed: iterable of ('in' | 'out' | 'gate', index): nodes assigned another sensor/device/group
+        :return: dict: 'inputs', 'gates', 'outputs' (output scores, (N, num_outputs)), and 'score' (circuit scores)
+        """
+        i_idx, o_idx, g_idx = [np.asarray(a, dtype=np.int64).reshape(-1, k) for a, k in
+                               [(i_idx, self.num_in), (o_idx, self.num_out), (g_idx, self.num_gates)]]
+        n = len(i_idx)
+        changed = set(changed or ())
+        dirty = changed if values is not None else None  # None: evaluate everything
+
+        def is_dirty(ref):
+            return dirty is None or ref in dirty
+
+        with np.errstate(all='ignore'):  # padded (NaN) parameters of absent group members are masked out below
+            if dirty is None or any(kind == 'in' for kind, _ in changed):
+                in_scores = np.where(self.in_io[None, :, :], self.sensor_high[i_idx][:, :, None],
+                                     self.sensor_low[i_idx][:, :, None])
+                in_tandems = np.where(self.in_io[None, :, :], self.tandem_high[i_idx][:, :, None],
+                                      self.tandem_low[i_idx][:, :, None])
+            else:
+                in_scores, in_tandems = values['inputs']
+            gate_scores = [None] * self.num_gates if dirty is None else list(values['gates'][0])
+            gate_tandems = [None] * self.num_gates if dirty is None else list(values['gates'][1])
+
+            def prev_values(ref):
+                kind, j = ref
+                return (in_scores[:, j], in_tandems[:, j]) if kind == 'in' else (gate_scores[j], gate_tandems[j])
+
+            for k, gate_type, prevs in self.order:
+                if not (is_dirty(('gate', k)) or any(is_dirty(ref) for ref in prevs)):
+                    continue
+                if dirty is not None:
+                    dirty.add(('gate', k))  # NOTE: order is topological, so downstream gates are marked in turn
+                groups = g_idx[:, k]
+                if gate_type == 'NOR':
+                    (x1, t1), (x2, _) = prev_values(prevs[0]), prev_values(prevs[1])
+                    x = np.zeros((n, self.num_rows))
+                    for eq, users in self.comp_eqs:
+                        params = self.__gather(self.comp_params, groups, eq, ('x1', 'x2', 't1'), (slice(None), None))
+                        x = np.where(users[groups][:, None],
+                                     np.broadcast_to(eq(**params, x1=x1, x2=x2, t1=t1), x.shape), x)
+                else:
+                    x = prev_values(prevs[0])[0]
+                gate_scores[k], gate_tandems[k] = self.__eval_groups(groups, x)
+
+            output_scores = np.empty((n, self.num_out)) if dirty is None else values['outputs'].copy()
+            for j, k in enumerate(self.output_prevs):
+                if not (is_dirty(('out', j)) or is_dirty(('gate', k))):
+                    continue
+                out_values = self.output_response(o_idx[:, j], gate_scores[k])
+                output_scores[:, j] = self.__output_score(out_values, self.on_rows[j])
+
+        return {'inputs': (in_scores, in_tandems), 'gates': (gate_scores, gate_tandems), 'outputs': output_scores,
+                'score': output_scores.min(axis=1, initial=np.inf)}
+
+    def gate_response(self, groups, x) -> np.ndarray:
+        """
+        :param groups: int array (N,): index of the gate group (in g_list) of each candidate
+        :param x: np.ndarray (N, rows): input composition
+        :return: np.ndarray (N, rows): best (max) response of the group's gates (as in Gate.eval_gates)
+        """
+        with np.errstate(all='ignore'):
+            return self.__eval_groups(np.asarray(groups), x)[0]
+
+    def output_response(self, devices, x) -> np.ndarray:
+        """
+        :param devices: int array (N,): index of the output device (in o_list) of each candidate
+        :param x: np.ndarray (N, rows): score of the gate driving the output
+        :return: np.ndarray (N, rows): output device response (NaN if the device has no response function)
+        """
+        devices = np.asarray(devices)
+        values = np.full(np.shape(x), np.nan)
+        with np.errstate(all='ignore'):
+            for eq, users in self.output_eqs:
+                params = self.__gather(self.output_params, devices, eq, ('x',), (slice(None), None))
+                values = np.where(users[devices][:, None], np.broadcast_to(eq(**params, x=x), values.shape), values)
+        return values
+
+    def __eval_groups(self, groups, x):
+        """
+        Best (max) response of the individual gates in each candidate's group, for each row (as in Gate.eval_gates).
+
+        :param groups: int array (N,)
+        :param x: np.ndarray (N, rows): input composition
+        :return: tuple[np.ndarray, np.ndarray]: (N, rows) scores and tandem factors
+        """
+        x = x[:, None, :]
+        shape = (len(groups), self.max_members, self.num_rows)
+        expand = (slice(None), slice(None), None)
+        responses = np.full(shape, -np.inf)
+        tandems = np.zeros(shape)
+        for eq, users in self.response_eqs:
+            params = self.__gather(self.member_params, groups, eq, ('x',), expand)
+            responses = np.where(users[groups][:, None, None], np.broadcast_to(eq(**params, x=x), shape), responses)
+        for eq, users in self.tandem_eqs:
+            params = self.__gather(self.member_params, groups, eq, ('x',), expand)
+            tandems = np.where(users[groups][:, None, None], np.broadcast_to(eq(**params, x=x), shape), tandems)
+        responses = np.where(self.member_valid[groups][:, :, None], responses, -np.inf)
+        best = np.argmax(responses, axis=1)[:, None, :]
+        return np.take_along_axis(responses, best, 1)[:, 0], np.take_along_axis(tandems, best, 1)[:, 0]
+
+    @staticmethod
+    def __output_score(values, on):
+        """
+        min(ON) / max(OFF) for each candidate (or the max output if the output is always ON or always OFF),
+        following the same rules as score_circuit.
+        """
+        if on.all() or not on.any():
+            return values.max(axis=1)
+        min_on = values[:, on].min(axis=1)
+        max_off = values[:, ~on].max(axis=1)
+        return np.where(max_off == 0, max_off, min_on / np.where(max_off == 0, 1, max_off))
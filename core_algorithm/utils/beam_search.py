@@ -0,0 +1,137 @@
+"""
+Beam search gate assignment: the gates are assigned one at a time in topological order (level by level, from the
+inputs to the outputs), each input sensor just before the first gate that uses it, keeping only the best partial
+assignments (the beam) after each step.  Run time only depends on the beam width and the netlist/UCF sizes, not on the
+(possibly huge) number of possible designs.
+
+Partial assignments are ranked over the full truth table from their assigned prefix only: by the upper bound on the
+score of their completions (see BranchAndBound.upper_bounds), if the UCF's responses are monotone, then by their
+partial score: each assigned gate whose output is still needed (by an unassigned gate, or by an output) is scored like
+an output, min(ON) / max(OFF) over its own truth table rows, and the partial score is the lowest of these.
+
+Class: BeamSearch: partial_scores(), search()
+"""
+
+import itertools
+
+import numpy as np
+
+from core_algorithm.utils.batch_scoring import BatchScorer
+from core_algorithm.utils.branch_and_bound import BranchAndBound, unsupported_reason
+
+
+class BeamSearch:
+    """
+    Beam search over partial assignments (index arrays as in BatchScorer.score_assignments, with -1 for inputs and
+    gates not assigned yet).  Each step extends every partial assignment in the beam with every unused sensor for the
+    next input (ranked by the sensors' ON/OFF ratios), or with every unused gate group for the next gate (evaluated as
+    one batch), and the output devices are assigned last, scoring the complete designs exactly.
+
+    Attributes: width, scored, bounds
+    """
+
+    def __init__(self, scorer: BatchScorer, width: int = 64):
+        self.scorer = scorer
+        self.width = width
+        """number of partial assignments kept after each gate"""
+        self.scored = 0
+        """number of partial and complete assignments evaluated (sensors are ranked without evaluating the circuit)"""
+        self.bounds = BranchAndBound(scorer) if unsupported_reason(scorer) is None else None
+        """BranchAndBound whose upper bounds rank the partial assignments (None: not monotone, partial scores only)"""
+        self.__consumers = [[] for _ in range(scorer.num_gates)]
+        for k, _, prevs in scorer.order:
+            for kind, j in prevs:
+                if kind == 'gate':
+                    self.__consumers[j].append(k)
+
+    def partial_scores(self, i_idx, g_idx, assigned: set) -> np.ndarray:
+        """
+        :param i_idx: int array (N, num_inputs): -1 for inputs not assigned yet (not used by the assigned gates)
+        :param g_idx: int array (N, num_gates): -1 for gates not assigned yet
+        :param assigned: set of gate indexes assigned (the same for all partial assignments)
+        :return: np.ndarray (N,): partial scores (NaN for invalid partial assignments)
+        """
+        sc = self.scorer
+        o_idx = np.zeros((len(i_idx), sc.num_out), dtype=np.int64)  # NOTE: placeholders (outputs are not scored)
+        gates = sc.evaluate(np.maximum(i_idx, 0), o_idx, np.maximum(g_idx, 0))['gates'][0]
+        scores = np.full(len(i_idx), np.inf)
+        with np.errstate(all='ignore'):
+            for k in assigned:
+                if k not in sc.output_prevs and all(c in assigned for c in self.__consumers[k]):
+                    continue
+                on = sc.gate_io[k]
+                if on.all() or not on.any():
+                    gate_score = gates[k].max(axis=1)
+                else:
+                    max_off = gates[k][:, ~on].max(axis=1)
+                    gate_score = np.where(max_off == 0, 0, gates[k][:, on].min(axis=1) / np.where(max_off == 0, 1,
+                                                                                                     max_off))
+                scores = np.minimum(scores, gate_score)
+        return np.where(np.isinf(scores), np.nan, scores)
+
+    def search(self, progress=None):
+        """
+        :param progress: callable(best score, scored) | None: called after each gate (best score: -inf, as no complete
+            assignment is scored before the output devices); if it returns True, only the best partial assignment is
+            kept and completed greedily (beam width 1), so that the search still ends with a design
+        :return: tuple[float, list[tuple[np.ndarray, np.ndarray, np.ndarray]]]: best score, and all complete
+            assignments found with that score
+        """
+        sc = self.scorer
+        n = len(sc.g_list)
+        width = self.width
+        i_idx = np.full((1, sc.num_in), -1, dtype=np.int64)
+        g_idx = np.full((1, sc.num_gates), -1, dtype=np.int64)
+        assigned = set()
+        for k, _, prevs in sc.order:
+            for kind, j in prevs:
+                if kind == 'in' and i_idx[0, j] < 0:
+                    i_idx, g_idx = self.__assign_input(i_idx, g_idx, j, width)
+            # every unused group for gate k, in each partial assignment of the beam
+            s, group = np.nonzero((g_idx[:, :, None] != np.arange(n)).all(axis=1))
+            i_idx, g_idx = i_idx[s], g_idx[s]
+            g_idx[:, k] = group
+            assigned.add(k)
+            scores = np.nan_to_num(self.partial_scores(i_idx, g_idx, assigned), nan=-np.inf)
+            self.scored += len(scores)
+            if self.bounds is None:
+                beam = np.argsort(-scores, kind='stable')[:width]
+            else:
+                bounds = self.bounds.upper_bounds(i_idx, np.full((len(i_idx), sc.num_out), -1), g_idx)
+                beam = np.lexsort((-scores, -np.nan_to_num(bounds, nan=-np.inf)))[:width]
+            i_idx, g_idx = i_idx[beam], g_idx[beam]
+            if width > 1 and progress is not None and progress(-np.inf, self.scored):
+                width = 1
+                i_idx, g_idx = i_idx[:1], g_idx[:1]
+        for j in range(sc.num_in):  # NOTE: inputs not used by any gate
+            if i_idx[0, j] < 0:
+                i_idx, g_idx = self.__assign_input(i_idx, g_idx, j, width)
+
+        o_perms = np.array(list(itertools.permutations(range(len(sc.o_list)), sc.num_out)),
+                           dtype=np.int64).reshape(-1, sc.num_out)
+        s, o = np.divmod(np.arange(len(i_idx) * len(o_perms)), len(o_perms))
+        candidates = (i_idx[s], o_perms[o], g_idx[s])
+        scores = sc.score_assignments(*candidates)
+        self.scored += len(scores)
+        valid = ~np.isnan(scores)
+        if not valid.any():
+            return 0.0, []
+        best = float(scores[valid].max())
+        return best, [tuple(c[m] for c in candidates) for m in np.flatnonzero(scores == best)]
+
+    def __assign_input(self, i_idx, g_idx, j: int, width: int):
+        """
+        Extends each partial assignment of the beam with every unused sensor for input j, keeping the width best by
+        the lowest ON/OFF ratio (high / low output) of their assigned sensors (no circuit evaluation needed).
+
+        :return: tuple[np.ndarray, np.ndarray]: i_idx, g_idx of the new beam
+        """
+        sc = self.scorer
+        s, sensor = np.nonzero((i_idx[:, :, None] != np.arange(len(sc.i_list))).all(axis=1))
+        i_idx, g_idx = i_idx[s], g_idx[s]
+        i_idx[:, j] = sensor
+        with np.errstate(all='ignore'):
+            ratios = sc.sensor_high / sc.sensor_low
+        ratio = np.where(i_idx >= 0, ratios[np.maximum(i_idx, 0)], np.inf).min(axis=1)
+        beam = np.argsort(-np.nan_to_num(ratio, nan=-np.inf), kind='stable')[:width]
+        return i_idx[beam], g_idx[beam]
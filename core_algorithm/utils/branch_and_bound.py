@@ -0,0 +1,240 @@
+"""
+Exact gate assignment by branch and bound, for circuits where enumerating every assignment is infeasible.
+Nodes are assigned one at a time (inputs, then gates in topological order, then outputs); for each partial assignment,
+interval arithmetic over the truth table gives each node's min/max value (the envelope of all completions), hence an
+upper bound on the circuit score.  Partial assignments that cannot reach the best score found so far are pruned.
+
+The bounds are only valid if every response is monotone in its input, which is checked on the UCF's equations and
+parameters (see unsupported_reason): sensors are non-negative, input compositions add their inputs (no tandem
+interference), gate responses are Hill repressors, and output responses are linear or Hill activators.
+
+Class: BranchAndBound: upper_bounds(), search()
+unsupported_reason()
+"""
+
+import ast
+
+import numpy as np
+
+from core_algorithm.utils.batch_scoring import BatchScorer
+
+BOUND_TOLERANCE = 1e-9  # relative; a partial assignment is pruned if its bound is below best * (1 - tolerance)
+
+
+def _normalize(expression: str) -> str:
+    """Equation in a canonical form (spacing & redundant parentheses removed), for comparison with known equations"""
+    return ast.unparse(ast.parse(expression.strip(), mode='eval'))
+
+
+SUM_COMPOSITION = _normalize('x1 + x2')
+HILL_REPRESSOR = _normalize('ymin + (ymax - ymin) / (1.0 + (x / K) ** n)')
+LINEAR_OUTPUT = _normalize('c * x')
+HILL_ACTIVATOR = _normalize('ymin + (ymax - ymin) / (1.0 + (kd / (unit_conversion * x)) ** n)')
+
+
+def _all(params: dict, names: tuple, users, condition) -> bool:
+    """Whether condition holds for the parameters of all users (gate group members/output devices)"""
+    return all(name in params and bool(condition(params[name][users]).all()) for name in names)
+
+
+def unsupported_reason(scorer: BatchScorer):
+    """
+    Checks that the bounds are valid for the scorer's UCF, i.e. that every response is monotone in its input.
+
+    :param scorer: BatchScorer
+    :return: str | None: why branch and bound cannot be used (None if it can)
+    """
+    if (scorer.sensor_low < 0).any() or (scorer.sensor_high < 0).any():
+        return 'negative input sensor levels'
+    for eq, _ in scorer.comp_eqs:
+        if _normalize(eq.expression) != SUM_COMPOSITION:
+            return f'input composition {eq.source!r} is not a sum of the inputs (e.g. tandem promoters)'
+    valid = scorer.member_valid
+    for eq, users in scorer.response_eqs:
+        members = valid & users[:, None]
+        p = scorer.member_params
+        if _normalize(eq.expression) != HILL_REPRESSOR or not (
+                _all(p, ('ymin',), members, lambda v: v >= 0) and
+                _all(p, ('ymax',), members, lambda v: v >= p['ymin'][members]) and
+                _all(p, ('K', 'n'), members, lambda v: v > 0)):
+            return f'gate response {eq.source!r} is not a decreasing Hill function'
+    p = scorer.output_params
+    for eq, users in scorer.output_eqs:
+        if _normalize(eq.expression) == LINEAR_OUTPUT and _all(p, ('c',), users, lambda v: v >= 0):
+            continue
+        if _normalize(eq.expression) == HILL_ACTIVATOR and \
+                _all(p, ('ymax',), users, lambda v: v >= p['ymin'][users]) and \
+                _all(p, ('kd', 'unit_conversion', 'n'), users, lambda v: v > 0):
+            continue
+        return f'output response {eq.source!r} is not an increasing linear or Hill function'
+    return None
+
+
+class BranchAndBound:
+    """
+    Depth-first branch and bound over partial assignments (index arrays as in BatchScorer.score_assignments, with -1
+    for nodes not assigned yet).  All children of a partial assignment are bounded as one batch, and explored best
+    bound first, so that good designs (and hence tight pruning) are found early.  Complete assignments are scored
+    exactly by the BatchScorer.
+
+    Attributes: nodes, explored, pruned, scored
+    """
+
+    def __init__(self, scorer: BatchScorer):
+        reason = unsupported_reason(scorer)
+        if reason is not None:
+            raise ValueError(f'Branch and bound not supported: {reason}')
+        self.scorer = scorer
+        self.nodes = [('in', j) for j in range(scorer.num_in)] + \
+                     [('gate', k) for k, _, _ in scorer.order] + \
+                     [('out', j) for j in range(scorer.num_out)]
+        """order in which nodes are assigned: inputs, gates (topological order), outputs"""
+        self.sizes = {'in': len(scorer.i_list), 'out': len(scorer.o_list), 'gate': len(scorer.g_list)}
+        self.explored = 0
+        """number of partial assignments bounded"""
+        self.pruned = 0
+        """number of partial assignments pruned"""
+        self.scored = 0
+        """number of complete assignments scored"""
+
+    def upper_bounds(self, i_idx, o_idx, g_idx) -> np.ndarray:
+        """
+        Upper bounds on the score of any completion of each partial assignment.
+
+        :param i_idx: int array (C, num_inputs): sensor index of each input node (-1: not assigned)
+        :param o_idx: int array (C, num_outputs): device index of each output node (-1: not assigned)
+        :param g_idx: int array (C, num_gates): group index of each gate node (-1: not assigned)
+        :return: np.ndarray (C,)
+        """
+        sc = self.scorer
+        c = len(i_idx)
+        with np.errstate(all='ignore'):
+            # Inputs: exact levels if assigned, else the envelope of the unused sensors
+            free = self.__free(i_idx, len(sc.i_list))
+            envelope = {}
+            for state, levels in ((True, sc.sensor_high), (False, sc.sensor_low)):
+                envelope[state] = (np.where(free, levels, np.inf).min(axis=1)[:, None],
+                                   np.where(free, levels, -np.inf).max(axis=1)[:, None])
+            in_lo, in_hi = [], []
+            for j in range(sc.num_in):
+                s = np.maximum(i_idx[:, j], 0)
+                exact = np.where(sc.in_io[j][None, :], sc.sensor_high[s][:, None], sc.sensor_low[s][:, None])
+                assigned = (i_idx[:, j] >= 0)[:, None]
+                in_lo.append(np.where(assigned, exact, np.where(sc.in_io[j], envelope[True][0], envelope[False][0])))
+                in_hi.append(np.where(assigned, exact, np.where(sc.in_io[j], envelope[True][1], envelope[False][1])))
+
+            # Gates: responses decrease with the input composition (sum of the inputs)
+            free = self.__free(g_idx, len(sc.g_list))
+            gate_lo, gate_hi = [None] * sc.num_gates, [None] * sc.num_gates
+
+            def prev_bounds(ref):
+                kind, j = ref
+                return (in_lo[j], in_hi[j]) if kind == 'in' else (gate_lo[j], gate_hi[j])
+
+            for k, gate_type, prevs in sc.order:
+                bounds = [prev_bounds(ref) for ref in (prevs if gate_type == 'NOR' else prevs[:1])]
+                x_lo, x_hi = sum(b[0] for b in bounds), sum(b[1] for b in bounds)
+                gate_lo[k], gate_hi[k] = self.__envelope(sc.gate_response, g_idx[:, k], free, x_hi, x_lo)
+
+            # Outputs: responses increase with the driving gate's score; the output score is bounded for each device
+            # (the assigned one, else the best of the unused ones)
+            n = len(sc.o_list)
+            free = self.__free(o_idx, n)
+            devices = np.repeat(np.arange(n), c)
+            bound = np.full(c, np.inf)
+            for j, k in enumerate(sc.output_prevs):
+                lo = sc.output_response(devices, np.tile(gate_lo[k], (n, 1))).reshape(n, c, -1)
+                hi = sc.output_response(devices, np.tile(gate_hi[k], (n, 1))).reshape(n, c, -1)
+                on = sc.on_rows[j]
+                if on.all() or not on.any():
+                    device_bounds = hi.max(axis=2)
+                else:
+                    max_off = lo[:, :, ~on].max(axis=2)
+                    device_bounds = np.where(max_off > 0, hi[:, :, on].min(axis=2) / max_off, np.inf)
+                device_bounds = np.where(np.isnan(device_bounds), np.inf, device_bounds)  # (n, C)
+                output_bound = np.where(o_idx[:, j] >= 0, device_bounds[np.maximum(o_idx[:, j], 0), np.arange(c)],
+                                        np.where(free.T, device_bounds, -np.inf).max(axis=0))
+                bound = np.minimum(bound, output_bound)
+        return bound
+
+    def __envelope(self, response, idx, free, x_low_out, x_high_out):
+        """
+        Min/max response over the rows' input range: response(x_low_out) is the lowest response of an assigned
+        item (response(x_high_out) the highest); unassigned nodes take the min/max over all unused items.
+
+        :return: tuple[np.ndarray, np.ndarray]: (C, rows) lower and upper bounds
+        """
+        (c, n) = free.shape
+        assigned = idx >= 0
+        lo = response(np.maximum(idx, 0), x_low_out)
+        hi = response(np.maximum(idx, 0), x_high_out)
+        if assigned.all():
+            return lo, hi
+        items = np.repeat(np.arange(n), c)
+        all_lo = response(items, np.tile(x_low_out, (n, 1))).reshape(n, c, -1)
+        all_hi = response(items, np.tile(x_high_out, (n, 1))).reshape(n, c, -1)
+        unused = free.T[:, :, None]
+        any_lo = np.where(unused, all_lo, np.inf).min(axis=0)
+        any_hi = np.where(unused, all_hi, -np.inf).max(axis=0)
+        return np.where(assigned[:, None], lo, any_lo), np.where(assigned[:, None], hi, any_hi)
+
+    @staticmethod
+    def __free(idx, n):
+        """(C, n) bool: items not used by any node of each partial assignment"""
+        free = np.ones((len(idx), n), dtype=bool)
+        rows, cols = np.nonzero(idx >= 0)
+        free[rows, idx[rows, cols]] = False
+        return free
+
+    def search(self, incumbent: float = 0.0, chunk_size: int = 256, progress=None):
+        """
+        :param incumbent: float: only designs scoring at least this much are kept (e.g. the best score of a quick
+            heuristic search, so that pruning is effective from the start)
+        :param chunk_size: int: number of partial assignments expanded (and their children bounded) per batch
+        :param progress: callable(best score, scored) | None: called after each batch of partial or complete
+            assignments; the search stops (with the best designs found so far) if it returns True
+        :return: tuple[float, list[tuple[np.ndarray, np.ndarray, np.ndarray]]]: best score (or incumbent), and
+            all complete assignments with that score
+        """
+        sc = self.scorer
+        best, ties = incumbent, []
+        root = tuple(np.full((1, k), -1) for k in (sc.num_in, sc.num_out, sc.num_gates))
+        stack = [(0, root, np.array([np.inf]))]  # depth-first over chunks of partial assignments (best on top)
+        while stack:
+            depth, partials, bounds = stack.pop()
+            keep = bounds >= best * (1 - BOUND_TOLERANCE)  # NOTE: best may have improved since they were bounded
+            self.pruned += int((~keep).sum())
+            if not keep.any():
+                continue
+            children = self.__expand(tuple(p[keep] for p in partials), depth)
+
+            if depth == len(self.nodes) - 1:
+                scores = self.scorer.score_assignments(*children)
+                self.scored += len(scores)
+                valid = ~np.isnan(scores)
+                if valid.any():
+                    batch_best = float(scores[valid].max())
+                    if batch_best > best:
+                        best, ties = batch_best, []
+                    if batch_best == best:
+                        ties.extend(tuple(c[m] for c in children) for m in np.flatnonzero(scores == best))
+            else:
+                child_bounds = self.upper_bounds(*children)
+                self.explored += len(child_bounds)
+                order = np.argsort(-child_bounds, kind='stable')
+                for lo in reversed(range(0, len(order), chunk_size)):
+                    chunk = order[lo:lo + chunk_size]
+                    stack.append((depth + 1, tuple(c[chunk] for c in children), child_bounds[chunk]))
+            if progress is not None and progress(best, self.scored):
+                break
+        return best, ties
+
+    def __expand(self, partials, depth):
+        """All children of the partial assignments: the next node assigned each item not used yet"""
+        kind, j = self.nodes[depth]
+        t = ('in', 'out', 'gate').index(kind)
+        n = self.sizes[kind]
+        children = [np.repeat(p, n, axis=0) for p in partials]
+        children[t][:, j] = np.tile(np.arange(n), len(partials[t]))
+        unused = ~(partials[t][:, :, None] == np.arange(n)).any(axis=1).reshape(-1)
+        return tuple(c[unused] for c in children)
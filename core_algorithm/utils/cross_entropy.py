@@ -0,0 +1,82 @@
+"""
+Cross-entropy method (an estimation-of-distribution algorithm) for gate assignment.
+A probability matrix P[node, item] is kept for each kind of node (input sensors, output devices, gate groups).  Each
+round, a batch of valid assignments is sampled from P with array operations, scored as one batch, and P is moved
+towards the frequencies of the items in the best (elite) samples.
+
+Class: CrossEntropySampler: sample(), update(), converged()
+"""
+
+import numpy as np
+
+MIN_PROBABILITY = 1e-6  # floor of P (relative to uniform), so that no item is ever ruled out completely
+
+
+class CrossEntropySampler:
+    """
+    Sampling distribution over assignments (index arrays as in BatchScorer.score_assignments).  Nodes of the same
+    kind are sampled one at a time (in a random order each round), each from its row of P restricted to the items not
+    used yet, so every sample is a valid assignment.
+
+    Attributes: probs, elite_fraction, smoothing
+    """
+
+    def __init__(self, sizes: tuple, nodes: tuple, elite_fraction: float = 0.1, smoothing: float = 0.7):
+        """
+        :param sizes: tuple[int, int, int]: number of available sensors, output devices, and gate groups
+        :param nodes: tuple[int, int, int]: number of input, output, and gate nodes
+        :param elite_fraction: float: fraction of each batch used to update P
+        :param smoothing: float: weight of the elite frequencies in the update (1: P is replaced by them)
+        """
+        self.probs = [np.full((k, n), 1.0 / n) for n, k in zip(sizes, nodes)]
+        """P[node, item] of the input, output, and gate nodes (each row sums to 1)"""
+        self.elite_fraction = elite_fraction
+        self.smoothing = smoothing
+
+    def sample(self, rng: np.random.Generator, count: int) -> tuple:
+        """
+        :param rng: np.random.Generator
+        :param count: int: number of assignments
+        :return: tuple of 3 int arrays (count, nodes[t])
+        """
+        samples = []
+        rows = np.arange(count)
+        for probs in self.probs:
+            (k, n) = probs.shape
+            genes = np.zeros((count, k), dtype=np.int64)
+            available = np.ones((count, n), dtype=bool)
+            for j in rng.permutation(k):
+                cdf = np.cumsum(probs[j] * available, axis=1)
+                u = rng.random(count) * cdf[:, -1]
+                item = np.minimum((cdf <= u[:, None]).sum(axis=1), n - 1)
+                genes[:, j] = item
+                available[rows, item] = False
+            samples.append(genes)
+        return tuple(samples)
+
+    def update(self, population: tuple, fitness: np.ndarray):
+        """
+        Moves P towards the item frequencies of the elite samples.
+
+        :param population: tuple of 3 int arrays (P, k): samples
+        :param fitness: np.ndarray (P,): scores (NaN: never elite)
+        """
+        elite_count = max(1, int(round(self.elite_fraction * len(fitness))))
+        elite = np.argsort(-np.nan_to_num(fitness, nan=-np.inf), kind='stable')[:elite_count]
+        for t, genes in enumerate(population):
+            (k, n) = self.probs[t].shape
+            if k == 0:
+                continue
+            freq = np.zeros((k, n))
+            np.add.at(freq, (np.broadcast_to(np.arange(k), (elite_count, k)), genes[elite]), 1.0)
+            probs = (1 - self.smoothing) * self.probs[t] + self.smoothing * freq / elite_count
+            probs = np.maximum(probs, MIN_PROBABILITY / n)
+            self.probs[t] = probs / probs.sum(axis=1, keepdims=True)
+
+    def converged(self, tolerance: float = 1e-3) -> bool:
+        """
+        :param tolerance: float
+        :return: bool: whether every node is assigned one item with probability >= 1 - tolerance (so that samples
+            are (almost) all the same design)
+        """
+        return all(probs.size == 0 or bool((probs.max(axis=1) >= 1 - tolerance).all()) for probs in self.probs)
@@ -0,0 +1,101 @@
+"""
+Compiles the equation strings from the UCF 'functions' collections (e.g. 'ymin + (ymax - ymin) / (1.0 + (x / K)^n)')
+into callables with named parameters, once per equation, instead of eval()-ing the strings on every truth table row.
+Equations are checked for safety first: only arithmetic, numbers, variable names, and a few math functions are allowed.
+
+compile_equation() [cached]
+Class: CompiledEquation
+"""
+
+import ast
+from functools import lru_cache, reduce
+
+import numpy as np
+
+# NOTE: numpy versions are used so that the same callable can also be evaluated on arrays (e.g. whole truth tables)
+ALLOWED_FUNCTIONS = {
+    'exp': np.exp,
+    'log': np.log,
+    'log10': np.log10,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'min': lambda *args: reduce(np.minimum, args),  # NOTE: np.minimum(a, b, c) would write the result into c
+    'max': lambda *args: reduce(np.maximum, args),
+}
+ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call,
+                 ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+class CompiledEquation:
+    """
+    A UCF equation parsed and compiled once into a function with keyword-only parameters, one per variable name.
+    Extra keyword arguments are ignored, so a model's whole 'parameters' dict can be passed in directly.
+
+    e.g. hill = compile_equation('ymin + (ymax - ymin) / (1.0 + (x / K)^n)')
+         hill(x=0.5, **params)  # params: {'ymax': ..., 'ymin': ..., 'K': ..., 'n': ..., 'alpha': ...}
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        """equation string as it appears in the UCF"""
+        self.expression = source.replace('$', '').replace('^', '**')
+        """equation string converted to Python syntax ('$STATE' -> 'STATE', '^' -> '**')"""
+        tree = ast.parse(self.expression.strip(), mode='eval')
+        self.variables = self.__check_safety(tree)
+        """names of the variables/parameters used by the equation (in order of first appearance)"""
+        args = ', '.join(['*'] + list(self.variables) + ['**_'])
+        code = compile(f'lambda {args}: {ast.unparse(tree)}', f'<UCF equation: {source}>', 'eval')
+        self.__func = eval(code, {'__builtins__': {}, **ALLOWED_FUNCTIONS})
+
+    @staticmethod
+    def __check_safety(tree):
+        """
+        Raises ValueError if the parsed equation contains anything other than arithmetic on numbers and names.
+
+        :param tree: ast.Expression
+        :return: tuple[str]: variable names
+        """
+        names = []
+        function_nodes = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise ValueError(f'Unsupported element in UCF equation: {ast.dump(node)}')
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f'Unsupported constant in UCF equation: {node.value!r}')
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in ALLOWED_FUNCTIONS or node.keywords:
+                    raise ValueError(f'Unsupported function call in UCF equation: {ast.unparse(node)}')
+                function_nodes.add(node.func)
+            if isinstance(node, ast.Name) and node not in function_nodes:
+                if node.id.startswith('_'):
+                    raise ValueError(f'Unsupported name in UCF equation: {node.id}')
+                names.append((node.col_offset, node.id))
+        variables = []
+        for _, name in sorted(names):
+            if name not in variables:
+                variables.append(name)
+        return tuple(variables)
+
+    def __call__(self, **params):
+        return self.__func(**params)
+
+    def __reduce__(self):
+        # NOTE: code objects cannot be pickled; recompile from the source (e.g. when sent to worker processes)
+        return compile_equation, (self.source,)
+
+    def __repr__(self):
+        return f'CompiledEquation({self.source!r})'
+
+    def __str__(self):
+        return self.expression
+
+
+@lru_cache(maxsize=None)
+def compile_equation(source: str) -> CompiledEquation:
+    """
+    Returns the CompiledEquation for an equation string (each distinct string is only parsed and compiled once).
+
+    :param source: str: equation from the UCF (may contain '^' and '$STATE')
+    :return: CompiledEquation
+    """
+    return CompiledEquation(source)
@@ -3,10 +3,15 @@ Contains a function that generates the truth table and classes for: representing
 assigning gates to the graph, and initializing permutations of gate assignments.
 
 generate_truth_table()
-Classes: IO, Input(IO), Output(IO), Gate, AssignGraph, GraphParser
+Classes: IO, Input(IO), Output(IO), Gate, EvalPlan, AssignGraph, GraphParser
 """
 
+from collections import deque
+
+import numpy as np
+
 from core_algorithm.utils.ucf_class import *
+from core_algorithm.utils.equations import compile_equation
 
 
 def generate_truth_table(num_in, num_gates, num_out, in_list, gate_list, out_list):
@@ -83,6 +88,18 @@ class Input(IO):
         else:
             self.score_in_use = 'high'
 
+    def eval_input_array(self, io):
+        """
+        Vectorized counterpart of switch_onoff + AssignGraph.get_score for all truth table rows at once.
+
+        :param io: np.ndarray: 0/1 input state for each row
+        :return: tuple[np.ndarray, np.ndarray]: sensor output and tandem score for each row
+        """
+        on = np.asarray(io) != 0
+        self.score_in_use = 'high' if on[-1] else 'low'
+        return np.where(on, self.out_scores['high'], self.out_scores['low']), \
+            np.where(on, self.tandem_scores['high'], self.tandem_scores['low'])
+
     def add_eval_params(self, functions, params):
         """
 
@@ -106,13 +123,13 @@ class Input(IO):
                 self.tandem_func_eq = self.functions.get('tandem_interference_factor', '')
                 self.tandem_func_eq = self.tandem_func_eq.replace('$', '')
                 self.tandem_func_eq = self.tandem_func_eq.replace('^', '**')
-                for p in params.keys():
-                    locals()[p] = params[p]
+                resp_func = compile_equation(self.functions.get('response_function', ''))
+                tandem_func = compile_equation(self.functions['tandem_interference_factor']) \
+                    if self.tandem_func_eq else None
                 for (lvl, val) in self.states.items():
-                    STATE = val
-                    self.out_scores[lvl] = eval(self.resp_func_eq)
-                    if self.tandem_func_eq:
-                        self.tandem_scores[lvl] = eval(self.tandem_func_eq)
+                    self.out_scores[lvl] = resp_func(**{**params, 'STATE': val})
+                    if tandem_func:
+                        self.tandem_scores[lvl] = tandem_func(**{**params, 'STATE': val})
                 # print(f'IN - {self.name}: {self.params} -> {self.out_scores} (tandem: {self.tandem_scores})')
             except Exception as e:
                 debug_print(f'ERROR calculating input score for {str(self)}, with function {self.resp_func_eq}\n{e}')
@@ -134,6 +151,7 @@ class Output(IO):
     def __init__(self, name, id_):
         super().__init__(name, id_)
         self.function = None
+        self.response_eq = None
         self.unit_conversion = None
         self.out_score = None
         self.params = {}
@@ -151,6 +169,7 @@ class Output(IO):
             self.func_name = func_name
             self.vars = vars
             self.function = function.replace('^', '**')
+            self.response_eq = compile_equation(function)
             if function == 'c * x':
                 self.unit_conversion = params['unit_conversion']
             elif 'ymax' in function or 'ymin' in function:  # Usually: Hill response for Comm Molecule
@@ -166,14 +185,22 @@ class Output(IO):
         :param input_score:
         :return:
         """
-        x = input_score
-        c = self.unit_conversion
-        for p in self.params.keys():
-            locals()[p] = self.params[p]
-        self.out_score = eval(self.function)
+        self.out_score = self.response_eq(**{**self.params, 'x': input_score, 'c': self.unit_conversion})
         # print(f'OUT - {self.name}: (unit_conv: {self.unit_conversion}, CM params: {self.params}) -> {self.out_score}')
         return self.out_score
 
+    def eval_output_array(self, input_scores):
+        """
+        Vectorized counterpart of eval_output for all truth table rows at once.
+
+        :param input_scores: np.ndarray
+        :return: np.ndarray
+        """
+        scores = np.broadcast_to(
+            self.response_eq(**{**self.params, 'x': input_scores, 'c': self.unit_conversion}), input_scores.shape)
+        self.out_score = float(scores[-1])
+        return scores
+
     def __str__(self):
         if self.function is None:
             return f'output {self.name} {self.id}'
@@ -194,10 +221,14 @@ class Gate:
         self.output = output if type(output) == int else list(output.values())[0]  # each gate can have only 1 output
         self.uid = ','.join(str(i) for i in self.inputs) + '-' + str(self.output)
         self.gate_params = {}
+        self.comp_params = {}
         self.hill_response = None
         self.response_func = None
+        self.response_eq = None
         self.input_comp = None
+        self.input_comp_eq = None
         self.tandem_factor_func = None
+        self.tandem_factor_eq = None
         self.gate_in_use = None
         self.best_score = None
         self.IO = None
@@ -216,6 +247,9 @@ class Gate:
         self.input_comp = gate_funcs.get('input_composition', '')
         self.tandem_factor_func = gate_funcs.get('tandem_interference_factor', '')
         self.tandem_factor_func = self.tandem_factor_func.replace('^', '**')
+        self.response_eq = compile_equation(gate_funcs.get('response_function', ''))
+        self.input_comp_eq = compile_equation(self.input_comp) if self.input_comp else None
+        self.tandem_factor_eq = compile_equation(self.tandem_factor_func) if self.tandem_factor_func else None
 
         # if 'response_function' in gate_funcs.keys():
         #     self.response_func = gate_funcs['response_function'].replace('^', '**')
@@ -236,6 +270,7 @@ class Gate:
         # self.hill_response = hill_response
         # self.input_comp = input_composition
         self.gate_params[g_name] = params
+        self.comp_params.update(params)  # NOTE: params of all gates in group available to the input composition
 
     def eval_gates(self, in_comp, io_gate_val):
         """
@@ -265,6 +300,25 @@ class Gate:
             self.tandem_score = best_score[2]
             return best_score[0], best_score[2]
 
+    def eval_gates_array(self, in_comp):
+        """
+        Vectorized counterpart of eval_gates for all truth table rows at once: for each row, the best (max) score of
+        the individual gates in the gate group.  Leaves gate_in_use/best_score set as they would be after the last row.
+
+        :param in_comp: np.ndarray: input composition for each row
+        :return: tuple[np.ndarray, np.ndarray]: best score and corresponding tandem score for each row
+        """
+        names = list(self.gate_params.keys())
+        results = [self.eval_gate(gname, in_comp) for gname in names]
+        scores = np.array([np.broadcast_to(r[0], in_comp.shape) for r in results], dtype=float)
+        tandems = np.array([np.broadcast_to(r[2], in_comp.shape) for r in results], dtype=float)
+        best = np.argmax(scores, axis=0)
+        rows = np.arange(scores.shape[1])
+        self.best_score = float(scores[best[-1], -1])
+        self.gate_in_use = names[best[-1]]
+        self.tandem_score = float(tandems[best[-1], -1])
+        return scores[best, rows], tandems[best, rows]
+
     def eval_gate(self, gate_name, in_comp):
         """
 
@@ -272,14 +326,12 @@ class Gate:
         :param in_comp:
         :return:
         """
-        eval_params = self.gate_params[gate_name]
-        for k in eval_params.keys():
-            locals()[k] = eval_params[k]
-        x = in_comp  # NOTE: UCF has to use 'x' as input_composition in the gate response_function
-        result = eval(self.response_func)
+        eval_params = {**self.gate_params[gate_name], 'x': in_comp}
+        # NOTE: UCF has to use 'x' as input_composition in the gate response_function
+        result = self.response_eq(**eval_params)
         tandem = 0
-        if self.tandem_factor_func:
-            tandem = eval(self.tandem_factor_func)
+        if self.tandem_factor_eq:
+            tandem = self.tandem_factor_eq(**eval_params)
         # print(gate_name, result)
         return result, gate_name, tandem
 
@@ -311,12 +363,113 @@ class Gate:
         return hash((tuple(self.inputs), self.output))
 
 
-class AssignGraph:
+class EvalPlan:
     """
+    Netlist compiled once (in GraphParser) into a levelized evaluation plan: nodes are numbered inputs first, then
+    gates, then outputs (each in netlist order), and each node has the integer indexes of its predecessor node(s).
+    Scoring then visits the gates level by level, instead of recursively searching for each node's predecessors.
+    The Boolean truth table (I/O of every node in every row) only depends on the netlist, so it is also computed here.
 
+    Attributes: num_inputs, num_gates, num_outputs, prevs[], levels[], gate_order[], output_order[], feedback[],
+                io, on_rows[]
     """
 
-    def __init__(self, inputs: list = None, outputs: list = None, gates: list = None):
+    def __init__(self, inputs: list, outputs: list, gates: list):
+        self.num_inputs = len(inputs)
+        self.num_gates = len(gates)
+        self.num_outputs = len(outputs)
+        gate_base = self.num_inputs
+        output_base = gate_base + self.num_gates
+
+        # NOTE: predecessors in the same order as the (linear scan) find_prev: for each input wire, gates then inputs
+        gate_drivers, input_drivers = {}, {}
+        for k, g in enumerate(gates):
+            gate_drivers.setdefault(g.output, []).append(gate_base + k)
+        for k, i in enumerate(inputs):
+            input_drivers.setdefault(i.id, []).append(k)
+        self.prevs: list[tuple[int, ...]] = [()] * self.num_inputs
+        """node index: indexes of the predecessor nodes"""
+        for g in gates:
+            self.prevs.append(tuple(p for wire in g.inputs
+                                    for p in gate_drivers.get(wire, []) + input_drivers.get(wire, [])))
+        for o in outputs:
+            self.prevs.append(tuple(gate_drivers.get(o.id, [])[:1]))  # prev node of output has to be a gate
+
+        # Kahn's algorithm; gates left over are part of a feedback loop (e.g. latches), which cannot be scored
+        self.levels: list[int] = [0] * len(self.prevs)
+        """node index: logic level (inputs are level 0; a gate is one level above its deepest predecessor)"""
+        waiting = {k: 0 for k in range(gate_base, output_base)}
+        dependents = {}
+        for k in waiting:
+            for p in self.prevs[k]:
+                if p >= gate_base:
+                    waiting[k] += 1
+                    dependents.setdefault(p, []).append(k)
+        ready = deque(k for k, n in waiting.items() if n == 0)
+        visited = []
+        while ready:
+            k = ready.popleft()
+            visited.append(k)
+            self.levels[k] = 1 + max((self.levels[p] for p in self.prevs[k]), default=0)
+            for d in dependents.get(k, []):
+                waiting[d] -= 1
+                if waiting[d] == 0:
+                    ready.append(d)
+        self.gate_order: list[int] = sorted(visited, key=lambda k: (self.levels[k], k))
+        """gate node indexes in evaluation order (by level, then netlist order)"""
+        self.feedback: list[int] = sorted(set(range(gate_base, output_base)) - set(visited))
+        """gate node indexes that are part of (or depend on) a feedback loop"""
+        for k in range(output_base, len(self.prevs)):
+            self.levels[k] = 1 + max((self.levels[p] for p in self.prevs[k]), default=0)
+        self.output_order: list[int] = list(range(output_base, len(self.prevs)))
+        """output node indexes"""
+
+        self.io: np.ndarray | None = self.__compute_io([g.gate_type for g in gates])
+        """(2**num_inputs, nodes) int array: Boolean I/O of each node in each truth table row (None if not computable)"""
+        self.on_rows: list[np.ndarray] = [self.io[:, k] == 1 for k in self.output_order] if self.io is not None else []
+        """output index: bool array of the truth table rows in which the output is ON"""
+
+    def __compute_io(self, gate_types):
+        """
+        Boolean I/O of every node, for all rows at once (row r has input j on/off as in generate_truth_table, i.e. with
+        the first input as most significant bit).  Returns None for netlists that cannot be scored (feedback loops,
+        gate types other than NOR/NOT, or outputs not driven by a gate).
+
+        :param gate_types: list[str]
+        :return: np.ndarray | None
+        """
+        if self.feedback or any(not self.prevs[k] for k in self.output_order):
+            return None
+        rows = np.arange(2 ** self.num_inputs)
+        io = np.zeros((len(rows), len(self.prevs)), dtype=np.int64)
+        for j in range(self.num_inputs):
+            io[:, j] = (rows >> (self.num_inputs - 1 - j)) & 1
+        for k in self.gate_order:
+            prev_io = [io[:, p] for p in self.prevs[k]]
+            gate_type = gate_types[k - self.num_inputs]
+            if gate_type == 'NOR' and len(prev_io) == 2:
+                io[:, k] = (prev_io[0] | prev_io[1]) == 0
+            elif gate_type == 'NOR':
+                io[:, k] = 0
+            elif gate_type == 'NOT' and prev_io:
+                io[:, k] = 1 - prev_io[0]
+            else:
+                return None
+        for k in self.output_order:
+            io[:, k] = io[:, self.prevs[k][0]]  # output just carries the gate I/O
+        return io
+
+    def __repr__(self):
+        return f'EvalPlan(levels: {max(self.levels, default=0)}, gate order: {self.gate_order})'
+
+
+class AssignGraph:
+    """
+    Specific assignment of UCF inputs, gates, and outputs to the netlist nodes.
+    Nodes are evaluated following the EvalPlan of the netlist (built here if not passed in from the GraphParser).
+    """
+
+    def __init__(self, inputs: list = None, outputs: list = None, gates: list = None, plan: EvalPlan = None):
         if gates is None:
             gates = []
         if outputs is None:
@@ -327,6 +480,23 @@ class AssignGraph:
         self.outputs = outputs
         self.gates = gates
         self.in_binary = {}
+        self.plan = plan if plan is not None else EvalPlan(inputs, outputs, gates)
+        self.nodes = list(inputs) + list(gates) + list(outputs)
+        """all nodes, indexed as in the plan"""
+        self.__index = {**{('Input', n.id): k for k, n in enumerate(inputs)},
+                        **{('Gate', n.output): len(inputs) + k for k, n in enumerate(gates)},
+                        **{('Output', n.id): len(inputs) + len(gates) + k for k, n in enumerate(outputs)}}
+
+    def node_index(self, node):
+        """
+        Returns the plan index of a node of this graph (or None).
+
+        :param node: Input | Gate | Output
+        :return: int | None
+        """
+        if type(node) == Gate:
+            return self.__index.get(('Gate', node.output))
+        return self.__index.get((type(node).__name__, getattr(node, 'id', None)))
 
     def switch_input_ios(self, truth_row, indexes):
         """
@@ -343,26 +513,13 @@ class AssignGraph:
         :param node:
         :return:
         """
-        if type(node) == Output:
-            node_id = node.id
-            # prev node of output has to be a gate
-            for g in self.gates:
-                if g.output == node_id:
-                    return g
-            # if it gets here, then something is not right
-            return ValueError()
-        elif type(node) == Gate:
-            prevs = []
-            for i_no in node.inputs:
-                for g in self.gates:
-                    if g.output == i_no:
-                        prevs.append(g)
-                # for o in self.outputs:  # NOTE: commented out to permit intermediate output nodes
-                #     if o.id == i_no:    # TODO: OK that conversion factor of output not part of next node score?
-                #         prevs.append(o)
-                for i in self.inputs:
-                    if i.id == i_no:
-                        prevs.append(i)
+        k = self.node_index(node)
+        if type(node) == Output and k is not None:
+            prevs = self.plan.prevs[k]
+            # prev node of output has to be a gate; if there is none, then something is not right
+            return self.nodes[prevs[0]] if prevs else ValueError()
+        elif type(node) == Gate and k is not None:
+            prevs = [self.nodes[p] for p in self.plan.prevs[k]]
             if len(prevs) > 1:
                 return prevs
             else:
@@ -371,13 +528,52 @@ class AssignGraph:
             # this should not happen also
             return ValueError()
 
-    # NOTE: needs modification
+    def topological_order(self):
+        """
+        Returns the gates in evaluation order (each gate after the gates driving its inputs), along with the
+        predecessor node(s) of each gate (as returned by find_prev).
+
+        :return: list[tuple[Gate, list]]
+        """
+        if self.plan.feedback:
+            raise RecursionError(f'Circuit contains a feedback loop at gate(s) '
+                                 f'{[self.nodes[k].name for k in self.plan.feedback]}')
+        return [(self.nodes[k], [self.nodes[p] for p in self.plan.prevs[k]]) for k in self.plan.gate_order]
+
+    def evaluate(self):
+        """
+        Scores every node for the current input states (see Input.switch_onoff), visiting the gates in plan order.
+
+        :return: list[tuple[float, float]]: (score, tandem score) of each node, indexed as in the plan
+        """
+        results = [None] * len(self.nodes)
+        for k in range(self.plan.num_inputs):
+            results[k] = self.get_score(self.nodes[k])
+        for node, prevs in self.topological_order():
+            k = self.node_index(node)
+            if node.gate_type == 'NOT':  # has single input
+                x = results[self.plan.prevs[k][0]][0]
+            elif node.gate_type == 'NOR':  # has two inputs
+                (x1, t1), (x2, _) = results[self.plan.prevs[k][0]], results[self.plan.prevs[k][1]]
+                x = node.input_comp_eq(**{**node.comp_params, 'x1': x1, 'x2': x2, 't1': t1})  # usually x = x1 + x2
+            else:
+                # there shouldn't be gates other than NOR/NOT
+                raise Exception
+            # below tries to calculate scores for a gate (the best gate choice in this case)
+            results[k] = node.eval_gates(x, node.IO)
+        for k in self.plan.output_order:
+            if not self.plan.prevs[k]:
+                raise Exception(f'Output {self.nodes[k].name} is not driven by a gate')
+            results[k] = self.nodes[k].eval_output(input_score=results[self.plan.prevs[k][0]][0]), 0
+        return results
+
     def get_score(self, node, verbose=False, table_info={}):
         """
+        Returns (score, tandem score) of a node for the current input states.
 
-        :param node:
+        :param node: Input | Gate | Output
         :param verbose:
-        :return:
+        :return: tuple[float, float]
         """
 
         if type(node) == Input:
@@ -388,40 +584,9 @@ class AssignGraph:
             else:
                 log.cf.warning('this should not happen')
                 return max(node.out_scores.values()), node.tandem_scores[node.score_in_use]
-        elif type(node) == Output:
-            input_score = self.get_score(self.find_prev(node), table_info=table_info)[0]
-            output_score = node.eval_output(input_score=input_score)
-            # if verbose:
-            #     print(f'{node.name} {output_score}')
-            return output_score, 0
-        elif type(node) == Gate:
-            if table_info:
-                table, labels, r = table_info['table'], table_info['labels'], table_info['r']
-                c = labels.index(node.name + '_I/O')
-                io_gate_val = table[r][c]
-                # print(node.name, io_gate_val)
-            if node.gate_type == 'NOT':  # has single input
-                input_score = self.get_score(self.find_prev(node), table_info=table_info)[0]
-                x = input_score
-            elif node.gate_type == 'NOR':  # has two inputs
-                scores = [self.get_score(x, table_info=table_info) for x in self.find_prev(node)]
-                x1 = scores[0][0]
-                x2 = scores[1][0]
-                t1 = scores[0][1]
-                # TODO: Retrieve tandem score(s)
-                eval_params = node.gate_params
-                for k in eval_params.values():
-                    for r in k:
-                        locals()[r] = k[r]
-                x = eval(node.input_comp)  # usually x = x1 + x2
-            else:
-                # there shouldn't be gates other than NOR/NOT
-                raise Exception
-            # below tries to calculate scores for a gate (the best gate choice in this case)
-            gate_score, tandem_score = node.eval_gates(x, io_gate_val)
-            # if verbose:
-            #     print(f'{node.gate_in_use} {gate_score}')
-            return gate_score, tandem_score  # CRIT: Fix tandem scoring...
+        elif type(node) == Output or type(node) == Gate:
+            # NOTE: evaluates the whole graph in plan order (score_circuit calls evaluate() once per row instead)
+            return self.evaluate()[self.node_index(node)]
         else:
             raise Exception
 
@@ -438,6 +603,7 @@ class GraphParser:
         self.inputs = self.load_inputs(inputs)
         self.outputs = self.load_outputs(outputs)
         self.gates = self.load_gates(gates)
+        self.plan = EvalPlan(self.inputs, self.outputs, self.gates)  # shared by all AssignGraphs of this netlist
 
     @staticmethod
     def load_inputs(in_data):
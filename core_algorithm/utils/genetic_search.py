@@ -0,0 +1,142 @@
+"""
+Genetic algorithm operators for gate assignment (see the genetic_algorithm sketch in cello_helpers).
+A genome is an assignment vector: the index (in i_list, o_list, g_list) of the sensor, output device, and gate group
+of each input, output, and gate node, as in BatchScorer.score_assignments.  A population is kept as three int arrays
+(P, num_inputs), (P, num_outputs), (P, num_gates), so that a whole generation is bred and scored with array operations.
+
+Class: GeneticOperators: random_population(), tournament(), crossover(), mutate(), next_generation()
+"""
+
+import numpy as np
+
+
+class GeneticOperators:
+    """
+    Selection, crossover, and mutation of populations of assignments; every child is a valid assignment (no sensor,
+    device, or group used twice for the same kind of node).
+
+    Attributes: sizes, elites, mutation_rate, crossover_rate, tournament_size
+    """
+
+    def __init__(self, sizes: tuple, elites: int = 2, mutation_rate: float = 0.3, crossover_rate: float = 0.9,
+                 tournament_size: int = 3):
+        self.sizes = tuple(sizes)
+        """number of available sensors, output devices, and gate groups (len of i_list, o_list, g_list)"""
+        self.elites = elites
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.tournament_size = tournament_size
+
+    def random_population(self, rng: np.random.Generator, size: int, nodes: tuple) -> tuple:
+        """
+        :param rng: np.random.Generator
+        :param size: int: number of individuals
+        :param nodes: tuple[int, int, int]: number of input, output, and gate nodes
+        :return: tuple of 3 int arrays (size, nodes[t])
+        """
+        return tuple(np.argsort(rng.random((size, n)), axis=1)[:, :k] for n, k in zip(self.sizes, nodes))
+
+    def tournament(self, rng: np.random.Generator, fitness: np.ndarray, count: int) -> np.ndarray:
+        """
+        :param rng: np.random.Generator
+        :param fitness: np.ndarray (P,): scores (NaN or -inf: never wins unless all entrants are)
+        :param count: int: number of parents to select
+        :return: np.ndarray (count,): index of each selected parent
+        """
+        entrants = rng.integers(len(fitness), size=(count, self.tournament_size))
+        scores = np.nan_to_num(fitness[entrants], nan=-np.inf)
+        return entrants[np.arange(count), np.argmax(scores, axis=1)]
+
+    def crossover(self, rng: np.random.Generator, parents_a: np.ndarray, parents_b: np.ndarray, n: int) -> np.ndarray:
+        """
+        Uniform crossover that preserves the permutation constraint: each node takes the item of a random parent,
+        and an item already used by an earlier node is replaced by the other parent's item (or, if that is used too,
+        by a random unused item).
+
+        :param rng: np.random.Generator
+        :param parents_a: int array (P, k)
+        :param parents_b: int array (P, k)
+        :param n: int: number of available items
+        :return: int array (P, k)
+        """
+        (p, k) = parents_a.shape
+        rows = np.arange(p)
+        take_a = rng.random((p, k)) < 0.5
+        first, second = np.where(take_a, parents_a, parents_b), np.where(take_a, parents_b, parents_a)
+        child = np.empty_like(parents_a)
+        used = np.zeros((p, n), dtype=bool)
+        for j in range(k):
+            item = first[:, j]
+            item = np.where(used[rows, item], second[:, j], item)
+            clash = used[rows, item]
+            if clash.any():
+                item = np.where(clash, self.__random_unused(rng, used), item)
+            child[:, j] = item
+            used[rows, item] = True
+        return child
+
+    def mutate(self, rng: np.random.Generator, genes: np.ndarray, n: int, rate: float) -> np.ndarray:
+        """
+        Mutates each individual with probability rate, by swapping two nodes' items or (if any item is unused)
+        replacing one node's item by an unused one.
+
+        :param rng: np.random.Generator
+        :param genes: int array (P, k)
+        :param n: int: number of available items
+        :param rate: float
+        :return: int array (P, k) (copy)
+        """
+        genes = genes.copy()
+        (p, k) = genes.shape
+        if k == 0:
+            return genes
+        mutants = np.flatnonzero(rng.random(p) < rate)
+        if not len(mutants):
+            return genes
+        can_replace, can_swap = n > k, k >= 2
+        replace = rng.random(len(mutants)) < 0.5 if can_replace and can_swap else np.full(len(mutants), can_replace)
+        a = rng.integers(k, size=len(mutants))
+
+        swaps = mutants[~replace]
+        if len(swaps) and can_swap:
+            a_s = a[~replace]
+            b_s = rng.integers(k - 1, size=len(swaps))
+            b_s += b_s >= a_s  # any node but a
+            genes[swaps, a_s], genes[swaps, b_s] = genes[swaps, b_s], genes[swaps, a_s]
+
+        reps = mutants[replace]
+        if len(reps):
+            used = np.zeros((len(reps), n), dtype=bool)
+            used[np.arange(len(reps))[:, None], genes[reps]] = True
+            genes[reps, a[replace]] = self.__random_unused(rng, used)
+        return genes
+
+    def next_generation(self, rng: np.random.Generator, population: tuple, fitness: np.ndarray) -> tuple:
+        """
+        Breeds the next generation (same size): the best individuals (elites) are kept unchanged, and the others are
+        the mutated children of tournament-selected parents.
+
+        :param rng: np.random.Generator
+        :param population: tuple of 3 int arrays (P, k)
+        :param fitness: np.ndarray (P,)
+        :return: tuple of 3 int arrays (P, k)
+        """
+        size = len(fitness)
+        elites = np.argsort(-np.nan_to_num(fitness, nan=-np.inf), kind='stable')[:min(self.elites, size)]
+        count = size - len(elites)
+        parents_a, parents_b = self.tournament(rng, fitness, count), self.tournament(rng, fitness, count)
+        cross = rng.random(count) < self.crossover_rate
+        generation = []
+        for genes, n in zip(population, self.sizes):
+            children = genes[parents_a]
+            if cross.any():
+                children[cross] = self.crossover(rng, genes[parents_a[cross]], genes[parents_b[cross]], n)
+            children = self.mutate(rng, children, n, self.mutation_rate)
+            generation.append(np.concatenate([genes[elites], children]))
+        return tuple(generation)
+
+    @staticmethod
+    def __random_unused(rng, used):
+        """Random unused item for each row of used (bool (P, n)); rows with no unused item get an arbitrary item"""
+        keys = np.where(used, np.inf, rng.random(used.shape))
+        return np.argmin(keys, axis=1)
@@ -3,8 +3,11 @@ Calls the YOSYS library to generate the netlist, figures, and associated informa
 https://yosyshq.net/yosys/
 
 call_YOSYS() [see parameters below for customizing YOSYS output; note, changing parameters may cause problems]
+call_YOSYS_async(), yosys_command(), replace_techmap_diagram_labels(), replace_techmap_diagram_labels_async(),
+relabel_techmap_diagram()
 """
 
+import asyncio
 import subprocess
 import os
 import shutil
@@ -13,6 +16,44 @@ import re
 
 
 def call_YOSYS(in_path=None, out_path=None, v_name=None, ucf_name=None, choice=0, no_files=False):
+    commands = yosys_command(in_path, out_path, v_name, ucf_name, choice, no_files)
+    if commands is None:
+        return False
+    try:
+        command = f"yosys -p \"{commands[2]}\""
+        subprocess.call(command, shell=True)
+    except Exception as e:
+        error_message = f"Yosys output for {v_name} already exists, please double-check. \n{e}"
+        log.cf.error(error_message)
+        raise Exception(error_message)
+
+    return True
+
+
+async def call_YOSYS_async(in_path=None, out_path=None, v_name=None, ucf_name=None, choice=0, no_files=False):
+    """
+    As call_YOSYS, but YOSYS runs as an asyncio subprocess (the event loop is not blocked while it runs).
+    """
+    commands = yosys_command(in_path, out_path, v_name, ucf_name, choice, no_files)
+    if commands is None:
+        return False
+    try:
+        process = await asyncio.create_subprocess_exec(*commands)
+        await process.wait()
+    except Exception as e:
+        error_message = f"Yosys output for {v_name} already exists, please double-check. \n{e}"
+        log.cf.error(error_message)
+        raise Exception(error_message)
+
+    return True
+
+
+def yosys_command(in_path=None, out_path=None, v_name=None, ucf_name=None, choice=0, no_files=False):
+    """
+    Re-initializes the output folder and builds the YOSYS command (see call_YOSYS for the parameters).
+
+    :return: list[str] | None: YOSYS command line (program & arguments), or None if the folder could not be set up
+    """
     try:
         # Setting up the output directory
         new_out = os.path.join(out_path, v_name)
@@ -24,7 +65,7 @@ def call_YOSYS(in_path=None, out_path=None, v_name=None, ucf_name=None, choice=0
     except Exception as e:
         log.cf.error(
             f"YOSYS output folder for {v_name} could not be re-initialized, please double-check. \n{e}")
-        return False
+        return None
 
     log.cf.info(f'new_out: {new_out}')  # Log the new out_path
 
@@ -123,16 +164,8 @@ def call_YOSYS(in_path=None, out_path=None, v_name=None, ucf_name=None, choice=0
         ]
     ]
 
-    try:
-        commands = command_start + core_commands[choice] + command_end
-        command = f"yosys -p \"{'; '.join(commands)}\""
-        subprocess.call(command, shell=True)
-    except Exception as e:
-        error_message = f"Yosys output for {v_name} already exists, please double-check. \n{e}"
-        log.cf.error(error_message)
-        raise Exception(error_message)
-
-    return True
+    commands = command_start + core_commands[choice] + command_end
+    return ['yosys', '-p', '; '.join(commands)]
 
 
 def replace_techmap_diagram_labels(path: str, gate_labels: dict[str], in_labels: dict[str], out_labels: dict[str]):
@@ -143,6 +176,35 @@ def replace_techmap_diagram_labels(path: str, gate_labels: dict[str], in_labels:
     :param in_labels: dict[str]
     :param out_labels: dict[str]
     """
+    relabel_techmap_diagram(path, gate_labels, in_labels, out_labels)
+    os.system(f'dot -o{path}_tech-mapping.png -Tpng {path}_yosys.dot')
+    os.remove(f'{path}_yosys.pdf')
+    os.system(f'dot -o{path}_tech-mapping.pdf -Tpdf {path}_yosys.dot')
+
+
+async def replace_techmap_diagram_labels_async(path: str, gate_labels: dict[str], in_labels: dict[str],
+                                               out_labels: dict[str]):
+    """
+    As replace_techmap_diagram_labels, but dot runs as asyncio subprocesses (PNG & PDF at the same time).
+    """
+    relabel_techmap_diagram(path, gate_labels, in_labels, out_labels)
+    os.remove(f'{path}_yosys.pdf')
+
+    async def dot(fmt):
+        try:
+            process = await asyncio.create_subprocess_exec('dot', f'-o{path}_tech-mapping.{fmt}', f'-T{fmt}',
+                                                           f'{path}_yosys.dot')
+            await process.wait()
+        except OSError as e:  # NOTE: e.g. Graphviz not installed (the diagram is then skipped, as with os.system)
+            log.cf.warning(f'dot could not be run for the techmap diagram: {e}')
+
+    await asyncio.gather(dot('png'), dot('pdf'))
+
+
+def relabel_techmap_diagram(path: str, gate_labels: dict[str], in_labels: dict[str], out_labels: dict[str]):
+    """
+    Replaces the labels in the YOSYS .dot file with the parts of the design (see replace_techmap_diagram_labels).
+    """
     with open(f'{path}_yosys.dot', 'r') as dot_old:
         lines = dot_old.readlines()
         with open(f'{path}_yosys.dot', 'w') as dot_new:
@@ -161,7 +223,3 @@ def replace_techmap_diagram_labels(path: str, gate_labels: dict[str], in_labels:
                         line = re.sub(r'(?<=label=")(.*)(?=", )',
                                       f'{old_label[2]}\\\\nPRIMARY_OUTPUT\\\\n{new_label}', line)
                 dot_new.write(line)
-
-    os.system(f'dot -o{path}_tech-mapping.png -Tpng {path}_yosys.dot')
-    os.remove(f'{path}_yosys.pdf')
-    os.system(f'dot -o{path}_tech-mapping.pdf -Tpdf {path}_yosys.dot')
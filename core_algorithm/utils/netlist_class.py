@@ -1,5 +1,6 @@
 """
-Netlist Class (input: netlist JSON from YOSYS output): __sort_nodes(), __sort_gates(), is_valid_netlist()
+Netlist Class (input: netlist JSON from YOSYS output): __sort_nodes(), __sort_gates(), is_valid_netlist(),
+    is_fanout_free()
 """
 
 from core_algorithm.utils.cello_helpers import *
@@ -187,3 +188,18 @@ class Netlist:
             return False
 
         return True
+
+    def is_fanout_free(self):
+        """
+        Whether the netlist is a tree (or a forest, with several outputs): every gate drives exactly one gate input or
+        output port (input ports may drive several gates).  Such netlists can be assigned exactly by dynamic
+        programming (see TreeAssignment).
+        :return: bool
+        """
+        consumers = {}
+        for gate in self.gates.values():
+            for edge in gate['inputs'].values():
+                consumers[edge] = consumers.get(edge, 0) + 1
+        for _, edge in self.outputs:
+            consumers[edge] = consumers.get(edge, 0) + 1
+        return all(consumers.get(edge) == 1 for gate in self.gates.values() for edge in gate['output'].values())
@@ -0,0 +1,148 @@
+"""
+Helpers for running gate-assignment searches in worker processes (concurrent.futures.ProcessPoolExecutor).
+Each worker receives the BatchScorer (or CELLO3 object) once (pool initializer), then runs the tasks it is given; the
+parent process merges the results in submission order, so the outcome does not depend on which worker finishes first.
+
+resolve_workers(), shard_ranges(), init_worker(), search_shard(), anneal_start(), replica_sweep(), portfolio_run(),
+merge_best()
+"""
+
+import os
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from core_algorithm.utils.assignment_moves import AssignmentMoves, MetropolisChain
+from core_algorithm.utils.score_cache import ScoreCache
+
+_state = None  # BatchScorer or CELLO3 object shared by all tasks of the current worker process (set by init_worker)
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    :param workers: int: requested number of worker processes (0 or less: one per CPU core)
+    :return: int
+    """
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def shard_ranges(total: int, num_shards: int) -> list:
+    """
+    Splits ranks 0..total-1 into (at most) num_shards contiguous [start, stop) ranges of near-equal size.
+
+    :param total: int
+    :param num_shards: int
+    :return: list[tuple[int, int]]
+    """
+    num_shards = max(1, min(num_shards, total))
+    bounds = [total * s // num_shards for s in range(num_shards + 1)]
+    return [(bounds[s], bounds[s + 1]) for s in range(num_shards) if bounds[s] < bounds[s + 1]]
+
+
+def init_worker(state):
+    """Pool initializer: keeps the (pickled) BatchScorer or CELLO3 object for all tasks run by this worker."""
+    global _state
+    _state = state
+
+
+def search_shard(start: int, stop: int, batch_size: int, deadline: float = None):
+    """
+    Worker task: exhaustive search of one rank range (see BatchScorer.search_range).
+
+    :param deadline: float: time.monotonic() after which no more batches are scored (None: the whole range is)
+    :return: tuple[float, list[tuple[int, int, int]], int]: shard best score, ties, number of valid assignments
+    """
+    if deadline is None:
+        return _state.search_range(start, stop, batch_size)
+    results = []
+    for lo in range(start, stop, batch_size):
+        if time.monotonic() >= deadline:
+            break
+        results.append(_state.search_range(lo, min(lo + batch_size, stop), batch_size))
+    return merge_best(results)
+
+
+def anneal_start(seed: int, perms: tuple, netgraph, i: int, o: int, g: int, max_fun: int):
+    """
+    Worker task: one independent annealing run (see CELLO3.run_annealing), starting from a fresh best
+    score, best graphs, iteration count, score cache, and plateau count.
+
+    :return: tuple[float, list, int, str, tuple[int, int]]: best score, best graphs, number of designs scored,
+        reason for termination, and score cache (hits, misses)
+    """
+    cello = _state
+    cello.best_score, cello.best_graphs, cello.iter_count = 0, [], 0
+    cello.score_cache = ScoreCache(cello.score_cache.maxsize)
+    cello.limits.new_run()  # NOTE: the deadline is shared by all runs
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):  # concurrent progress bars would interleave
+        reason = cello.run_annealing(perms, netgraph, i, o, g, max_fun, seed)
+    return (cello.best_score, cello.best_graphs, cello.iter_count, reason,
+            (cello.score_cache.hits, cello.score_cache.misses))
+
+
+def replica_sweep(assignment: tuple, t: float, steps: int, seed: int):
+    """
+    Worker task: steps Metropolis moves of one replica (parallel tempering) at temperature t, starting from its
+    current assignment (see MetropolisChain).
+
+    :return: tuple[tuple, float, dict]: final assignment, its score, and all designs scored in this sweep
+        ((i_perm, o_perm, g_perm) -> score)
+    """
+    scorer = _state
+    moves = AssignmentMoves(scorer.i_list, scorer.o_list, scorer.g_list)
+    chain = MetropolisChain(scorer, moves, np.random.default_rng(seed), assignment)
+    scored = {chain.design: chain.score}
+    for _ in range(steps):
+        step = chain.step(t, scored.get)
+        if step is None:
+            break
+        (design, score, new) = step
+        if new:
+            scored[design] = score
+    return chain.current, chain.score, scored
+
+
+def portfolio_run(algorithm: str, seed: int, lists: tuple, nodes: tuple, netgraph, iter_: int, max_fun: int,
+                  start_design: tuple = None):
+    """
+    Worker task: one run of a portfolio strategy (see CELLO3.search_assign with the given 'algorithm' option), with
+    its own seed and a budget of max_fun designs, starting from start_design (if the search supports it; e.g. the
+    strategy's best design in the previous rounds) with a fresh best score, best graphs, iteration count, score cache,
+    and plateau count.  The run is single-process and not refined by tabu search.
+
+    :param lists: tuple[list, list, list]: available inputs, outputs, and gates
+    :param nodes: tuple[int, int, int]: number of input, output, and gate nodes
+    :param iter_: int: number of possible designs
+    :param start_design: tuple[tuple, tuple, tuple]: (i_perm, o_perm, g_perm) names (None: random start)
+    :return: tuple[float, list, int, float]: best score, best graphs, number of designs scored, and run time (s)
+    """
+    cello = _state
+    cello.algorithm, cello.seed, cello.total_iters = algorithm, seed, max_fun
+    cello.start_design = start_design
+    cello.exhaustive, cello.anneal_starts, cello.workers, cello.tabu_steps = False, 1, 1, 0
+    cello.best_score, cello.best_graphs, cello.iter_count = 0, [], 0
+    cello.score_cache = ScoreCache(cello.score_cache.maxsize)
+    cello.limits.new_run()  # NOTE: the deadline is shared by all runs
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        cello.search_assign(*lists, *nodes, netgraph, iter_)
+    return cello.best_score, cello.best_graphs, cello.iter_count, time.perf_counter() - start
+
+
+def merge_best(results, min_score: float = 0):
+    """
+    Merges (best score, ties, count) results, in the order given, into the overall best score and ties.
+
+    :param results: iterable of tuple[float, list, int]
+    :param min_score: float
+    :return: tuple[float, list, int]
+    """
+    best, ties, count = min_score, [], 0
+    for (shard_best, shard_ties, shard_count) in results:
+        count += shard_count
+        if shard_best > best:
+            best, ties = shard_best, []
+        if shard_best == best:
+            ties.extend(shard_ties)
+    return best, ties, count
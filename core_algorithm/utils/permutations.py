@@ -0,0 +1,105 @@
+"""
+Maps integer ranks to k-permutations of a list (and back) without materializing the permutation space, so that
+e.g. 10 of 18 gate groups (~1.8e11 permutations) can be searched without building billions of tuples first.
+Ranks follow the order of itertools.permutations(items, k), so rank r gives the same permutation as
+list(itertools.permutations(items, k))[r].
+
+Class: PermutationIndexer: unrank() [or indexer[rank]], rank(), unrank_array()
+"""
+
+import math
+
+import numpy as np
+
+
+class PermutationIndexer:
+    """
+    Lazy, indexable view of all k-permutations of items (ranks are arbitrary-precision Python ints).
+
+    e.g. g_perms = PermutationIndexer(g_list, g)
+         g_perms[12345]                  # -> ('P1_PhlF', 'S4_SrpR', ...)
+         g_perms.rank(g_perms[12345])    # -> 12345
+
+    Attributes: items, k, size
+    """
+
+    def __init__(self, items, k: int):
+        self.items = tuple(items)
+        self.k = k
+        self.size = math.perm(len(self.items), k) if 0 <= k <= len(self.items) else 0
+        """number of k-permutations (may be larger than sys.maxsize; use instead of len())"""
+        self.__index = {item: j for j, item in enumerate(self.items)}
+        # number of ways to complete a permutation after choosing its first p+1 items
+        self.__blocks = [math.perm(len(self.items) - p - 1, k - p - 1) for p in range(k)] if self.size else []
+
+    def unrank(self, rank: int) -> tuple:
+        """
+        Returns the permutation at a rank, in O(n*k) for n items.
+
+        :param rank: int: 0 <= rank < size
+        :return: tuple
+        """
+        rank = int(rank)
+        if not 0 <= rank < self.size:
+            raise IndexError(f'Permutation rank {rank} out of range (size {self.size})')
+        remaining = list(self.items)
+        perm = []
+        for block in self.__blocks:
+            digit, rank = divmod(rank, block)
+            perm.append(remaining.pop(digit))
+        return tuple(perm)
+
+    def rank(self, perm) -> int:
+        """
+        Returns the rank of a permutation (inverse of unrank).
+
+        :param perm: sequence of k distinct items
+        :return: int
+        """
+        if len(perm) != self.k:
+            raise ValueError(f'Expected a permutation of length {self.k}, got {len(perm)}')
+        used = []
+        rank = 0
+        for item, block in zip(perm, self.__blocks):
+            j = self.__index[item]
+            if j in used:
+                raise ValueError(f'Item {item} repeated in permutation {perm}')
+            rank += (j - sum(1 for u in used if u < j)) * block
+            used.append(j)
+        return rank
+
+    def unrank_array(self, ranks) -> np.ndarray:
+        """
+        Vectorized unrank for a batch of ranks (must fit in int64), returning item indexes instead of items.
+
+        :param ranks: int array (N,)
+        :return: np.ndarray (N, k): index (in items) of each element of each permutation
+        """
+        ranks = np.asarray(ranks, dtype=np.int64).copy()
+        if ranks.size and (ranks.min() < 0 or ranks.max() >= self.size):
+            raise IndexError(f'Permutation rank out of range (size {self.size})')
+        used = np.zeros((len(ranks), len(self.items)), dtype=bool)
+        out = np.empty((len(ranks), self.k), dtype=np.int64)
+        for p, block in enumerate(self.__blocks):
+            digit, ranks = np.divmod(ranks, block)
+            # index of the (digit+1)-th unused item in each row
+            j = np.argmax(np.cumsum(~used, axis=1) > digit[:, None], axis=1)
+            out[:, p] = j
+            used[np.arange(len(j)), j] = True
+        return out
+
+    def __getitem__(self, rank):
+        return self.unrank(rank)
+
+    def __len__(self):
+        return self.size  # NOTE: raises OverflowError if size > sys.maxsize
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __iter__(self):
+        for rank in range(self.size):
+            yield self.unrank(rank)
+
+    def __repr__(self):
+        return f'PermutationIndexer({len(self.items)} items, k={self.k}, size={self.size:,})'
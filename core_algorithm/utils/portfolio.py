@@ -0,0 +1,87 @@
+"""
+Portfolio of gate-assignment searches, raced against each other on a shared budget of scored designs.
+The race runs in rounds (successive halving): in each round, every strategy still in the race runs with an equal share
+of the round's budget; afterwards, the worse half of the strategies (by best score so far) is cancelled, so the leaders
+get a growing share of the remaining budget, and the last strategy left gets all of it.  Rounds are synchronous: a
+strategy is only cancelled once all runs of the round are done (see CELLO3.portfolio_assign for what a strategy keeps
+from one round to the next).
+
+Class: PortfolioRace: shares(), record(), eliminate(), leader(), done()
+"""
+
+import math
+
+
+class PortfolioRace:
+    """
+    Budget allocation and bookkeeping of a portfolio race (the searches themselves are run by the caller).
+
+    Attributes: strategies, remaining, round, history, best
+    """
+
+    def __init__(self, strategies: list, budget: int):
+        """
+        :param strategies: list[str]: names of the strategies (e.g. CELLO3 'algorithm' options), in order of
+            preference for ties
+        :param budget: int: total number of designs all strategies may score
+        """
+        if not strategies:
+            raise ValueError('Portfolio needs at least one strategy')
+        self.strategies = list(dict.fromkeys(strategies))
+        """strategies still in the race, in order of preference"""
+        self.remaining = budget
+        """designs left to score"""
+        self.round = 0
+        self.history = {s: [] for s in self.strategies}
+        """per strategy: (elapsed seconds, best score so far, designs scored so far) after each of its runs"""
+        self.best = {s: 0.0 for s in self.strategies}
+        """best score of each strategy (over all its runs)"""
+        self.__scored = {s: 0 for s in self.strategies}
+        self.__reached = {s: math.inf for s in self.strategies}  # time at which each strategy reached its best score
+
+    def shares(self) -> dict:
+        """
+        :return: dict[str, int]: budget of each strategy for the next round (the remaining budget, split over the
+            rounds still needed to get down to one strategy, then equally between the strategies)
+        """
+        rounds = math.ceil(math.log2(len(self.strategies))) + 1
+        budget = self.remaining // rounds
+        n = len(self.strategies)
+        return {s: budget // n + (1 if k < budget % n else 0) for k, s in enumerate(self.strategies)}
+
+    def record(self, strategy: str, best_score: float, scored: int, elapsed: float):
+        """
+        Records the result of one run of a strategy.
+
+        :param strategy: str
+        :param best_score: float: best score of the run
+        :param scored: int: number of designs the run scored (taken from the remaining budget)
+        :param elapsed: float: seconds since the start of the race
+        """
+        self.remaining = max(0, self.remaining - scored)
+        self.__scored[strategy] += scored
+        if best_score > self.best[strategy]:
+            self.best[strategy], self.__reached[strategy] = best_score, elapsed
+        self.history[strategy].append((elapsed, self.best[strategy], self.__scored[strategy]))
+
+    def eliminate(self) -> list:
+        """
+        Ends a round: cancels the worse half of the strategies (ranked by best score, then by how early they reached
+        it, then by preference).
+
+        :return: list[str]: the strategies cancelled
+        """
+        self.round += 1
+        ranked = sorted(self.strategies, key=lambda s: (-self.best[s], self.__reached[s], self.strategies.index(s)))
+        keep = set(ranked[:math.ceil(len(ranked) / 2)])
+        cancelled = [s for s in self.strategies if s not in keep]
+        self.strategies = [s for s in self.strategies if s in keep]
+        return cancelled
+
+    def leader(self) -> str:
+        """:return: str: strategy with the best score so far (earliest to reach it if tied)"""
+        return min(self.best, key=lambda s: (-self.best[s], self.__reached[s]))
+
+    def done(self) -> bool:
+        """:return: bool: whether the budget is exhausted (too small for another round)"""
+        return sum(self.shares().values()) == 0
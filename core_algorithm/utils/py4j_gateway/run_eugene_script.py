@@ -9,11 +9,34 @@ https://github.com/CIDARLAB/miniEugene-core
 """
 
 import logging
+import os
 import re
 import itertools
 
 from core_algorithm.utils import log
 
+_gateway = None  # (pid, JavaGateway): connection to the JVM, kept open between calls (one per process)
+
+
+def mini_eugene_gateway(reconnect: bool = False):
+    """
+    Returns this process's connection to the JVM running miniEugene, connecting on first use (a connection inherited
+    from a parent process, e.g. by a forked worker, is not reused).
+
+    :param reconnect: bool: drop the current connection first (e.g. after the JVM was restarted)
+    :return: JavaGateway
+    """
+    global _gateway
+    from py4j.java_gateway import JavaGateway, GatewayParameters
+    if reconnect or _gateway is None or _gateway[0] != os.getpid():
+        if _gateway is not None and _gateway[0] == os.getpid():
+            _gateway[1].close()
+        # Suppress (useless) console output
+        logging.getLogger("py4j").setLevel(logging.INFO)
+        # Connect to JVM and setup to convert to Java-friendly containers
+        _gateway = (os.getpid(), JavaGateway(gateway_parameters=GatewayParameters(auto_convert=True)))
+    return _gateway[1]
+
 
 def call_mini_eugene(rules: list[str], orders_count: int = 100):
     """
@@ -31,13 +54,9 @@ def call_mini_eugene(rules: list[str], orders_count: int = 100):
     :param orders_count: -1 to find ALL valid permutations (may be prohibitively long)
     """
 
-    from py4j.java_gateway import JavaGateway, GatewayParameters
-    # Suppress (useless) console output
-    logging.getLogger("py4j").setLevel(logging.INFO)
+    from py4j.protocol import Py4JNetworkError
     # from py4j.java_collections import ListConverter
-
-    # Connect to JVM and setup to convert to Java-friendly containers
-    gateway = JavaGateway(gateway_parameters=GatewayParameters(auto_convert=True))
+    gateway = mini_eugene_gateway()
     miniEugeneInstance = gateway.entry_point
     # java_rules = ListConverter().convert(rules, addition_app._gateway_client)  # convert to Java container explicitly
     # gateway.jvm.java.util.Collections.sort(java_rules)
@@ -80,7 +99,11 @@ def call_mini_eugene(rules: list[str], orders_count: int = 100):
     # print('Rules: ', rules)
     # print('\nPart_count: ', part_count)
     # print('\nOrders_count: ', orders_count)
-    java_part_orders = miniEugeneInstance.miniPermute(rules, part_count, orders_count)  # FIXME: Add device rule loop
+    try:
+        java_part_orders = miniEugeneInstance.miniPermute(rules, part_count, orders_count)  # FIXME: Add device rule loop
+    except Py4JNetworkError:  # NOTE: the kept connection may be stale (e.g. JVM restarted): reconnect once
+        miniEugeneInstance = mini_eugene_gateway(reconnect=True).entry_point
+        java_part_orders = miniEugeneInstance.miniPermute(rules, part_count, orders_count)
     # java_part_orders_2 = miniEugeneInstance.miniPermute(rules, part_count, orders_count)
     rules.reverse()
     # java_part_orders_rev = miniEugeneInstance.miniPermute(rules, part_count, orders_count)
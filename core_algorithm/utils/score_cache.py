@@ -0,0 +1,67 @@
+"""
+Bounded LRU cache of circuit scores, keyed by the assignment (input, output, and gate permutations).
+Dual annealing floors its continuous coordinates to permutation indices, so its local searches often land on an
+assignment that has already been scored; those are then looked up here instead of being re-scored.
+
+Class: ScoreCache: get(), put(), info()
+"""
+
+from collections import OrderedDict
+
+
+class ScoreCache:
+    """
+    Least-recently-used map of assignment key -> circuit score, holding at most maxsize entries (0 disables caching).
+
+    Attributes: maxsize, hits, misses, evictions
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        """max number of cached scores (oldest entries are evicted first)"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__scores = OrderedDict()
+
+    def get(self, key):
+        """
+        Returns the cached score for the assignment (and counts a hit/miss).
+
+        :param key: hashable assignment, e.g. (i_perm, o_perm, g_perm)
+        :return: float | None
+        """
+        score = self.__scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        """
+        Stores the score of an assignment.
+
+        :param key: hashable assignment
+        :param score: float
+        """
+        if self.maxsize <= 0:
+            return
+        self.__scores[key] = score
+        self.__scores.move_to_end(key)
+        if len(self.__scores) > self.maxsize:
+            self.__scores.popitem(last=False)
+            self.evictions += 1
+
+    def info(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f'{self.hits / lookups:.1%}' if lookups else 'n/a'
+        return (f'Score cache: {self.hits:,} hits, {self.misses:,} misses (hit rate {rate}), '
+                f'{self.evictions:,} evictions, {len(self)}/{self.maxsize:,} entries')
+
+    def __contains__(self, key):
+        return key in self.__scores
+
+    def __len__(self):
+        return len(self.__scores)
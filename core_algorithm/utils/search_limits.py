@@ -0,0 +1,63 @@
+"""
+Stopping conditions shared by all gate-assignment searches, besides their budget of total_iters designs: a wall-clock
+deadline, and a plateau (a number of designs scored without a better one).
+
+Class: SearchLimits: start(), new_run(), update(), remaining(), reason()
+SearchLimitReached
+"""
+
+import time
+
+
+class SearchLimitReached(Exception):
+    """Raised (e.g. by CELLO3.prep_assign_for_scoring) to stop a search once one of its limits is reached."""
+
+
+class SearchLimits:
+    """
+    Deadline and plateau of a search.  The deadline is absolute (time.monotonic, which is system-wide), so it also
+    holds in worker processes that received a copy of the object; the plateau is counted separately in each process
+    (see new_run).
+
+    Attributes: time_limit, patience, deadline, stale
+    """
+
+    def __init__(self, time_limit: float = None, patience: int = 0):
+        """
+        :param time_limit: float: max wall time (seconds) from start(); None: no limit
+        :param patience: int: max number of designs scored without a better one; 0: no limit
+        """
+        self.time_limit = time_limit
+        self.patience = patience
+        self.deadline = None
+        """time.monotonic() at which the search must stop (None: no deadline)"""
+        self.stale = 0
+        """number of designs scored since the last better one"""
+
+    def start(self):
+        """Starts the clock (and the plateau count)."""
+        self.deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        self.stale = 0
+
+    def new_run(self):
+        """Restarts the plateau count (e.g. for an independent run of a multi-start search), keeping the deadline."""
+        self.stale = 0
+
+    def update(self, scored: int, improved: bool):
+        """
+        :param scored: int: number of designs just scored
+        :param improved: bool: whether the best score improved
+        """
+        self.stale = 0 if improved else self.stale + scored
+
+    def remaining(self):
+        """:return: float | None: seconds left before the deadline (None: no deadline)"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def reason(self):
+        """:return: str | None: why the search must stop (None: it may go on)"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return f'time limit reached ({self.time_limit} s)'
+        if 0 < self.patience <= self.stale:
+            return f'no better design in the last {self.stale:,} designs scored (patience {self.patience:,})'
+        return None
@@ -0,0 +1,156 @@
+"""
+Content-addressed cache of the stages of a Cello run (logic synthesis, gate assignment, and post-processing).
+Each stage is keyed by a hash of its inputs (file contents, options, and the keys of the stages it depends on); an
+entry holds the files the stage created or changed in the output folder, and the (pickled) result the next stages
+need.  When a stage is run again with the same key, its files are copied back and its result is returned instead.
+
+Class: StageCache: key(), run(), run_async(), contains()
+file_digest()
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+from core_algorithm.utils import log
+
+
+def file_digest(path: str) -> str:
+    """
+    :param path: str
+    :return: str: SHA-256 of the file's bytes (hex)
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class StageCache:
+    """
+    Stage entries are stored in cache_dir/<stage>/<key>/ (the stage's files under files/, and result.pkl), and are
+    written to a temporary folder first, so a run interrupted while storing an entry never leaves a partial one.
+
+    Attributes: cache_dir, out_dir, hits, misses
+    """
+
+    def __init__(self, cache_dir: str, out_dir: str):
+        """
+        :param cache_dir: str: folder of the cache (created if needed; may be shared by several output folders)
+        :param out_dir: str: output folder of the run (where stages write their files)
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.out_dir = os.path.abspath(out_dir)
+        self.hits = []
+        """stages whose files & result were restored from the cache"""
+        self.misses = []
+        """stages that were run (and stored)"""
+
+    @staticmethod
+    def key(stage: str, *inputs) -> str:
+        """
+        :param stage: str: name of the stage
+        :param inputs: bytes, str, or JSON-serializable values (e.g. options, file digests, keys of earlier stages)
+        :return: str: SHA-256 of the stage name and inputs (hex)
+        """
+        sha = hashlib.sha256(stage.encode())
+        for value in inputs:
+            data = value if isinstance(value, bytes) else json.dumps(value, sort_keys=True, default=repr).encode()
+            sha.update(len(data).to_bytes(8, 'little'))
+            sha.update(data)
+        return sha.hexdigest()
+
+    def contains(self, stage: str, key: str) -> bool:
+        """:return: bool: whether an entry is stored for the stage & key"""
+        return os.path.isfile(os.path.join(self.__entry(stage, key), 'result.pkl'))
+
+    def run(self, stage: str, key, func, outputs: tuple = None):
+        """
+        Runs a stage, or restores it from the cache.
+
+        :param stage: str
+        :param key: str | None: key of the stage (None: the stage is run and not stored, e.g. an unseeded search)
+        :param func: callable(): runs the stage (writing its files to out_dir) and returns its result (picklable)
+        :param outputs: tuple[str]: fnmatch patterns (relative to out_dir) of the files the stage may write; None: all
+            files changed while it ran (only valid if no other stage runs at the same time)
+        :return: the result of func (or of the stored run)
+        """
+        if key is not None and self.contains(stage, key):
+            return self.__hit(stage, key)
+        before = self.__snapshot()
+        result = func()
+        self.__miss(stage, key, result, before, outputs)
+        return result
+
+    async def run_async(self, stage: str, key, func, outputs: tuple = None):
+        """
+        As run(), for a stage run by a coroutine function (e.g. one awaiting external tools).
+
+        :param func: async callable(): runs the stage and returns its result (picklable)
+        """
+        if key is not None and self.contains(stage, key):
+            return self.__hit(stage, key)
+        before = self.__snapshot()
+        result = await func()
+        self.__miss(stage, key, result, before, outputs)
+        return result
+
+    def __hit(self, stage, key):
+        result = self.__restore(stage, key)
+        self.hits.append(stage)
+        log.cf.info(f'(Stage {stage!r} restored from cache: {key[:12]})')
+        return result
+
+    def __miss(self, stage, key, result, before, outputs):
+        """Stores the files changed since the snapshot before (matching outputs, if any), and the result."""
+        self.misses.append(stage)
+        if key is not None:
+            after = self.__snapshot()
+            changed = [f for f, stat in after.items() if before.get(f) != stat and
+                       (outputs is None or any(fnmatch.fnmatch(f, pattern) for pattern in outputs))]
+            self.__store(stage, key, changed, result)
+
+    def __entry(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def __snapshot(self) -> dict:
+        """relative path -> (size, mtime) of all files in out_dir"""
+        files = {}
+        for root, _, names in os.walk(self.out_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files[os.path.relpath(path, self.out_dir)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def __store(self, stage, key, files, result):
+        entry = self.__entry(stage, key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f'.{key[:12]}-', dir=os.path.dirname(entry))
+        try:
+            for f in files:
+                os.makedirs(os.path.dirname(os.path.join(tmp, 'files', f)), exist_ok=True)
+                shutil.copy2(os.path.join(self.out_dir, f), os.path.join(tmp, 'files', f))
+            with open(os.path.join(tmp, 'result.pkl'), 'wb') as pkl:
+                pickle.dump(result, pkl)
+            os.replace(tmp, entry)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            if not self.contains(stage, key):  # NOTE: else stored meanwhile by another run (with the same content)
+                log.cf.warning(f'Stage {stage!r} not cached: {e}')
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def __restore(self, stage, key):
+        entry = self.__entry(stage, key)
+        files = os.path.join(entry, 'files')
+        for root, _, names in os.walk(files):
+            for name in names:
+                target = os.path.join(self.out_dir, os.path.relpath(os.path.join(root, name), files))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(root, name), target)
+        with open(os.path.join(entry, 'result.pkl'), 'rb') as pkl:
+            return pickle.load(pkl)
@@ -0,0 +1,114 @@
+"""
+Dependency graph of the stages of a Cello run that follow the gate assignment (results, Eugene, DNA design, SBOL,
+plots, ...), run on a thread pool (or as asyncio tasks): each stage starts as soon as the stages it depends on are
+done, so independent branches (e.g. the response plots and the miniEugene/SBOL branch) overlap.
+
+Class: StageGraph: add(), order(), run(), run_async()
+PLOT_LOCK
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+PLOT_LOCK = threading.Lock()
+"""held while drawing with matplotlib.pyplot, whose current figure is shared by all threads"""
+
+
+class StageGraph:
+    """
+    Stages (callables) and their dependencies.  A stage is called with the results of the stages it depends on (in the
+    order they were given), and its own result is passed on to the stages depending on it.
+
+    Attributes: stages, results
+    """
+
+    def __init__(self):
+        self.stages = {}
+        """name: (func, names of the stages it depends on), in order of addition"""
+        self.results = {}
+        """name: result of each stage done"""
+
+    def add(self, name: str, func, after: tuple = ()):
+        """
+        :param name: str
+        :param func: callable(*results of the stages in after)
+        :param after: tuple[str]: stages that must be done first (added before this one)
+        """
+        if name in self.stages:
+            raise ValueError(f'Stage {name!r} already added')
+        missing = [dep for dep in after if dep not in self.stages]
+        if missing:
+            raise ValueError(f'Stage {name!r} depends on unknown stage(s) {missing}')
+        self.stages[name] = (func, tuple(after))
+
+    def order(self) -> list:
+        """:return: list[str]: stages in order of addition (a valid sequential order, since deps are added first)"""
+        return list(self.stages)
+
+    def run(self, workers: int = 1) -> dict:
+        """
+        Runs all stages.  If a stage raises an exception, no more stages are started, and the exception (of the first
+        failed stage, in order of addition) is raised once the running ones are done.
+
+        :param workers: int: max number of stages run at the same time (1: one after another, in order of addition)
+        :return: dict: name: result of each stage
+        """
+        if workers <= 1:
+            for name, (func, after) in self.stages.items():
+                self.results[name] = func(*(self.results[dep] for dep in after))
+            return self.results
+
+        pending = dict(self.stages)
+        running = {}  # future: name
+        errors = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                if not errors:
+                    for name, (func, after) in list(pending.items()):
+                        if len(running) < workers and all(dep in self.results for dep in after):
+                            running[pool.submit(func, *(self.results[dep] for dep in after))] = name
+                            del pending[name]
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors[name] = future.exception()
+                    else:
+                        self.results[name] = future.result()
+        if errors:
+            raise errors[min(errors, key=self.order().index)]
+        return self.results
+
+    async def run_async(self, executor=None) -> dict:
+        """
+        Runs all stages as asyncio tasks: coroutine functions are awaited, and other stages are run in the executor
+        (so they do not block the event loop).  If a stage raises an exception, the stages depending on it are not
+        run, and the exception (of the first failed stage, in order of addition) is raised once the others are done.
+
+        :param executor: concurrent.futures.Executor: for the (blocking) stages; None: the loop's default executor
+        :return: dict: name: result of each stage
+        """
+        loop = asyncio.get_running_loop()
+        tasks = {}
+
+        async def run(name, func, after):
+            args = [await tasks[dep] for dep in after]
+            if inspect.iscoroutinefunction(func):
+                result = await func(*args)
+            else:
+                result = await loop.run_in_executor(executor, functools.partial(func, *args))
+            self.results[name] = result
+            return result
+
+        for name, (func, after) in self.stages.items():
+            tasks[name] = asyncio.ensure_future(run(name, func, after))
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return self.results
@@ -0,0 +1,94 @@
+"""
+Tabu search over gate assignments, to refine the design found by another search (e.g. annealing).
+Each step scores the whole neighbourhood of the current assignment (every swap and replace move, see AssignmentMoves)
+as one batch, and moves to the best neighbour that is not tabu, even if it is worse.  Undoing a recent move is tabu
+(for tenure steps), unless it would give a better design than any found so far (aspiration).
+
+Class: TabuSearch: run()
+"""
+
+import time
+
+import numpy as np
+
+from core_algorithm.utils.assignment_moves import AssignmentMoves, KINDS
+
+
+class TabuSearch:
+    """
+    Steepest-ascent tabu search, stopped after patience steps without a better design, after time_limit seconds, or
+    when every neighbour is tabu.
+
+    Attributes: tenure, patience, time_limit, steps, scored, reason
+    """
+
+    def __init__(self, scorer, moves: AssignmentMoves, tenure: int = 7, patience: int = 100,
+                 time_limit: float = None):
+        self.scorer = scorer
+        self.moves = moves
+        self.tenure = tenure
+        """number of steps during which a node cannot be given back a sensor/device/group it was moved away from"""
+        self.patience = patience
+        """max number of steps without a better design"""
+        self.time_limit = time_limit
+        """max wall time (seconds); None: no limit"""
+        self.steps = 0
+        self.scored = 0
+        """number of designs scored (neighbours of all steps)"""
+        self.reason = None
+        """reason for termination"""
+
+    def run(self, assignment: tuple, score: float = None):
+        """
+        :param assignment: tuple of 3 int arrays: start (e.g. best design of a previous search)
+        :param score: float: score of the start (None: scored here)
+        :return: tuple[float, list[tuple]]: best score, and all designs ((i_perm, o_perm, g_perm) of names) found
+            with that score (the start included)
+        """
+        if score is None:
+            score = float(self.scorer.score_assignments(*assignment)[0])
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        tabu = {}  # (kind, node, item): last step at which giving the item back to the node is tabu
+        current, best, best_designs = assignment, score, [self.moves.names(assignment)]
+        since_best = 0
+        self.reason = f'{self.patience:,} steps without a better design'
+        while since_best < self.patience:
+            if deadline is not None and time.perf_counter() > deadline:
+                self.reason = f'time limit ({self.time_limit} s)'
+                break
+            moves = self.moves.all_moves(current)
+            if not moves:
+                self.reason = 'no neighbouring designs'
+                break
+            neighbours = [self.moves.apply(current, move) for move in moves]
+            scores = self.scorer.score_assignments(*(np.stack([n[t] for n in neighbours]) for t in range(3)))
+            scores = np.nan_to_num(scores, nan=-np.inf)
+            self.scored += len(scores)
+
+            allowed = np.array([not self.__is_tabu(tabu, neighbour, move)
+                                for move, neighbour in zip(moves, neighbours)])
+            allowed |= scores > best  # aspiration
+            if not allowed.any():
+                self.reason = 'all neighbouring designs are tabu'
+                break
+            k = int(np.argmax(np.where(allowed, scores, -np.inf)))
+            self.steps += 1
+            since_best += 1
+            if scores[k] > best:
+                best, best_designs, since_best = float(scores[k]), [], 0
+            for m in np.flatnonzero(scores == best):
+                design = self.moves.names(neighbours[m])
+                if design not in best_designs:
+                    best_designs.append(design)
+
+            # the nodes' previous sensors/devices/groups are tabu for them
+            for kind, node in self.moves.changed_nodes(moves[k]):
+                tabu[(kind, node, int(current[KINDS.index(kind)][node]))] = self.steps + self.tenure
+            current = neighbours[k]
+        return best, best_designs
+
+    def __is_tabu(self, tabu, neighbour, move):
+        """Whether the move gives one of its nodes a sensor/device/group it was recently moved away from"""
+        t = KINDS.index(move[1])
+        return any(tabu.get((kind, node, int(neighbour[t][node])), 0) > self.steps
+                   for kind, node in self.moves.changed_nodes(move))
@@ -0,0 +1,271 @@
+"""
+Exact gate assignment by dynamic programming, for fanout-free (tree) netlists: every gate drives exactly one gate or
+output (inputs may drive several gates).  Each gate's subtree is solved once, bottom-up, keeping only its Pareto-optimal
+partial assignments: for each input assignment and set of gate groups used in the subtree, the assignments whose
+values (over the truth table rows) are not dominated by another's.
+
+As each gate response decreases (and each output response increases) with its input (see unsupported_reason in
+branch_and_bound), the circuit score is monotone in the value of every node in every row: increasing if the node's path
+to the output goes through an even number of gates and the output is ON in that row, etc.  A dominated partial
+assignment can therefore be replaced by the one dominating it in any complete design without lowering its score.
+
+Class: TreeAssignment: solve()
+tree_unsupported_reason()
+"""
+
+import itertools
+
+import numpy as np
+
+from core_algorithm.utils.batch_scoring import BatchScorer
+from core_algorithm.utils.branch_and_bound import BOUND_TOLERANCE, unsupported_reason
+
+MAX_GROUPS = 63  # sets of gate groups are kept as int64 bit masks
+PAIRS_PER_BATCH = 1 << 20  # max pairs of partial assignments compared at once by the Pareto filter
+
+
+def tree_unsupported_reason(scorer: BatchScorer):
+    """
+    :param scorer: BatchScorer
+    :return: str | None: why the netlist/UCF cannot be solved by TreeAssignment (None if it can)
+    """
+    consumers = np.zeros(scorer.num_gates, dtype=int)
+    for _, _, prevs in scorer.order:
+        for kind, j in prevs:
+            if kind == 'gate':
+                consumers[j] += 1
+    for k in scorer.output_prevs:
+        if k >= 0:
+            consumers[k] += 1
+    if (consumers != 1).any() or (np.array(scorer.output_prevs) < 0).any():
+        return 'netlist is not fanout-free (a gate drives several gates/outputs)'
+    if len(scorer.g_list) > MAX_GROUPS:
+        return f'more than {MAX_GROUPS} gate groups'
+    names = scorer.i_list + scorer.o_list + scorer.g_list
+    if len(set(names)) != len(names):
+        return 'sensor, output device, and gate group names are not distinct'
+    return unsupported_reason(scorer)
+
+
+def _join(left: np.ndarray, right: np.ndarray):
+    """
+    All pairs of positions with equal keys.
+
+    :param left: int array (A,)
+    :param right: int array (B,)
+    :return: tuple[np.ndarray, np.ndarray]: indices into left and right of each pair
+    """
+    order = np.argsort(right, kind='stable')
+    start = np.searchsorted(right[order], left, 'left')
+    counts = np.searchsorted(right[order], left, 'right') - start
+    a = np.repeat(np.arange(len(left)), counts)
+    offsets = np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return a, order[np.repeat(start, counts) + offsets]
+
+
+class TreeAssignment:
+    """
+    Bottom-up dynamic programming over the gates of a fanout-free netlist.  The partial assignments of a subtree are
+    kept as arrays: input assignment (index into i_perms), bit mask of the gate groups used, values (rows), and group of
+    each gate (-1 outside the subtree).  All input assignments are solved together, as one batch.
+
+    Attributes: i_perms, preference, states, scored
+    """
+
+    def __init__(self, scorer: BatchScorer):
+        reason = tree_unsupported_reason(scorer)
+        if reason is not None:
+            raise ValueError(f'Tree assignment not supported: {reason}')
+        self.scorer = scorer
+        self.i_perms = np.array(list(itertools.permutations(range(len(scorer.i_list)), scorer.num_in)),
+                                dtype=np.int64).reshape(-1, scorer.num_in)
+        """all input assignments (indices into i_list)"""
+
+        # +1: the circuit score increases with the gate's value in that row, -1: decreases
+        self.preference = [None] * scorer.num_gates
+        for j, k in enumerate(scorer.output_prevs):
+            on = scorer.on_rows[j]
+            self.preference[k] = np.where(on, 1.0, -1.0) if on.any() and not on.all() else np.ones(scorer.num_rows)
+        for k, _, prevs in reversed(scorer.order):  # NOTE: a gate's consumer comes after it in the evaluation order
+            for kind, j in prevs:
+                if kind == 'gate':
+                    self.preference[j] = -self.preference[k]
+        self.states = 0
+        """number of (Pareto-optimal) partial assignments kept, over all subtrees"""
+        self.scored = 0
+        """number of complete assignments scored"""
+
+    def solve(self, max_states: int = 2_000_000, batch_size: int = 65536, progress=None):
+        """
+        :param max_states: int: max number of partial assignments of a subtree (before removing the dominated ones);
+            ValueError is raised if exceeded (too many designs for the dynamic programming, e.g. many input sensors)
+        :param batch_size: int: number of complete assignments scored per call of the BatchScorer
+        :param progress: callable(best score, scored) | None: called after each subtree and before each batch of
+            complete assignments; the search stops (with the best designs scored so far, if any) if it returns True
+        :return: tuple[float, list[tuple[np.ndarray, np.ndarray, np.ndarray]]]: best score, and all complete
+            assignments with that score that are made of Pareto-optimal partial assignments (-inf and [] if stopped
+            before any was scored)
+        """
+        sc = self.scorer
+        n = len(sc.g_list)
+        num_perms = len(self.i_perms)
+        in_values = [np.where(sc.in_io[j][None, :], sc.sensor_high[self.i_perms[:, j]][:, None],
+                              sc.sensor_low[self.i_perms[:, j]][:, None]) for j in range(sc.num_in)]
+        subtrees = {}
+        for k, gate_type, prevs in sc.order:
+            # Input composition: sum of the inputs' values, over all compatible partial assignments of the inputs
+            pid = np.arange(num_perms)
+            mask = np.zeros(num_perms, dtype=np.int64)
+            x = np.zeros((num_perms, sc.num_rows))
+            groups = np.full((num_perms, sc.num_gates), -1, dtype=np.int64)
+            for kind, j in (prevs if gate_type == 'NOR' else prevs[:1]):
+                if kind == 'in':
+                    x = x + in_values[j][pid]
+                    continue
+                c_pid, c_mask, c_values, c_groups = subtrees.pop(j)
+                a, b = _join(pid, c_pid)
+                if len(a) > max_states:
+                    raise ValueError(f'Tree assignment: more than {max_states:,} partial assignments for a subtree')
+                disjoint = (mask[a] & c_mask[b]) == 0
+                a, b = a[disjoint], b[disjoint]
+                pid, mask, x = pid[a], mask[a] | c_mask[b], x[a] + c_values[b]
+                groups = np.where(c_groups[b] >= 0, c_groups[b], groups[a])
+
+            # Gate: each group not used in the subtree yet
+            s, group = np.nonzero(((mask[:, None] >> np.arange(n)) & 1) == 0)
+            if len(s) > max_states:
+                raise ValueError(f'Tree assignment: more than {max_states:,} partial assignments for a subtree')
+            values = sc.gate_response(group, x[s])
+            groups = groups[s]
+            groups[:, k] = group
+            pid, mask = pid[s], mask[s] | (np.int64(1) << group)
+            if k in sc.output_prevs:
+                low, high = self.__output_range(values, sc.on_rows[sc.output_prevs.index(k)])
+                keep = self.__pareto_2d(pid, mask, np.stack([low, np.zeros(len(low)) if high is None else -high], 1))
+            else:
+                keep = self.__pareto(pid, mask, values * self.preference[k])
+            subtrees[k] = pid[keep], mask[keep], values[keep], groups[keep]
+            self.states += int(keep.sum())
+            if progress is not None and progress(-np.inf, self.scored):
+                return -np.inf, []
+
+        # Outputs: the subtrees of all outputs (compatible input assignments, distinct groups), with each assignment
+        # of output devices.  The scores estimated from the output ranges (equal to the scores, as the output responses
+        # increase with their input) select the best candidates, which are then scored exactly.
+        roots = [subtrees[k] for k in sc.output_prevs]
+        pid, mask, _, groups = roots[0]
+        rows = [np.arange(len(pid))]  # per output: partial assignment of its subtree
+        for c_pid, c_mask, _, c_groups in roots[1:]:
+            a, b = _join(pid, c_pid)
+            disjoint = (mask[a] & c_mask[b]) == 0
+            a, b = a[disjoint], b[disjoint]
+            pid, mask, groups = pid[a], mask[a] | c_mask[b], np.where(c_groups[b] >= 0, c_groups[b], groups[a])
+            rows = [r[a] for r in rows] + [b]
+        o_perms = np.array(list(itertools.permutations(range(len(sc.o_list)), sc.num_out)),
+                           dtype=np.int64).reshape(-1, sc.num_out)
+        estimates = np.full((len(pid), len(o_perms)), np.inf)
+        for j, ((_, _, values, _), r) in enumerate(zip(roots, rows)):
+            estimates = np.minimum(estimates, self.__output_scores(values[r], sc.on_rows[j])[:, o_perms[:, j]])
+        estimates = np.nan_to_num(estimates, nan=-np.inf)
+        s, o = np.nonzero(estimates >= estimates.max(initial=-np.inf) * (1 - BOUND_TOLERANCE))
+        order = np.argsort(-estimates[s, o], kind='stable')  # NOTE: best estimates first, in case the search stops
+        s, o = s[order], o[order]
+
+        best, ties = -np.inf, []
+        for lo in range(0, len(s), batch_size):
+            if progress is not None and progress(best, self.scored):
+                break
+            c = slice(lo, lo + batch_size)
+            candidates = (self.i_perms[pid[s[c]]], o_perms[o[c]], groups[s[c]])
+            scores = sc.score_assignments(*candidates)
+            self.scored += len(scores)
+            valid = ~np.isnan(scores)
+            if not valid.any():
+                continue
+            batch_best = float(scores[valid].max())
+            if batch_best > best:
+                best, ties = batch_best, []
+            if batch_best == best:
+                ties.extend(tuple(a[m] for a in candidates) for m in np.flatnonzero(scores == best))
+        return best, ties
+
+    @staticmethod
+    def __output_range(values, on):
+        """
+        The output score only depends on the driving gate's lowest ON and highest OFF values (or on its highest value
+        if the output is always ON or always OFF), as the output response increases with it.
+
+        :return: tuple[np.ndarray, np.ndarray | None]: (N,) min ON and max OFF values (None if always ON/OFF)
+        """
+        if on.all() or not on.any():
+            return values.max(axis=1), None
+        return values[:, on].min(axis=1), values[:, ~on].max(axis=1)
+
+    def __output_scores(self, values, on):
+        """
+        :param values: np.ndarray (N, rows): values of the gate driving the output
+        :param on: bool array (rows,)
+        :return: np.ndarray (N, devices): output score with each device (as in BatchScorer.evaluate)
+        """
+        low, high = self.__output_range(values, on)
+        ends = np.stack([low, low if high is None else high], axis=1)
+        scores = []
+        for d in range(len(self.scorer.o_list)):
+            min_on, max_off = self.scorer.output_response(np.full(len(ends), d), ends).T
+            if high is None:
+                scores.append(min_on)
+            else:
+                scores.append(np.where(max_off == 0, 0, min_on / np.where(max_off == 0, 1, max_off)))
+        return np.stack(scores, axis=1).reshape(len(ends), -1)
+
+    @staticmethod
+    def __keys(pid, mask):
+        """Dense id of the (input assignment, set of groups) of each partial assignment"""
+        bits = int(mask.max(initial=0)).bit_length()
+        if int(pid.max(initial=0)).bit_length() + bits < 63:  # NOTE: one int64 key (much faster to sort)
+            return np.unique((pid << bits) | mask, return_inverse=True)[1].reshape(-1)
+        return np.unique(np.stack([pid, mask], axis=1), axis=0, return_inverse=True)[1].reshape(-1)
+
+    @classmethod
+    def __pareto(cls, pid, mask, better):
+        """
+        Partial assignments not dominated by another one with the same input assignment and set of groups (at least as
+        good in every row, better in one).  Equal ones are all kept, as they may lead to tied designs.
+
+        :param better: np.ndarray (N, rows): values, with the sign of each row set so that larger is better
+        :return: np.ndarray (N,): bool, whether each partial assignment is kept
+        """
+        keys = cls.__keys(pid, mask)
+        better = np.nan_to_num(better, nan=-np.inf)
+        a, b = _join(keys, keys)
+        dominated = np.zeros(len(keys), dtype=bool)
+        for lo in range(0, len(a), PAIRS_PER_BATCH):
+            pa, pb = a[lo:lo + PAIRS_PER_BATCH], b[lo:lo + PAIRS_PER_BATCH]
+            ge = better[pb] >= better[pa]
+            dominated[pa[ge.all(axis=1) & ~(better[pb] <= better[pa]).all(axis=1)]] = True
+        return ~dominated
+
+    @classmethod
+    def __pareto_2d(cls, pid, mask, better):
+        """
+        As __pareto, for two objectives (e.g. the output range), by sorting instead of comparing all pairs: sorted by
+        key, then by both objectives (descending), a partial assignment is dominated iff an earlier one with the same
+        key has a larger first objective and at least its second, or the same first and a larger second.
+        """
+        keys = cls.__keys(pid, mask)
+        better = np.nan_to_num(better, nan=-np.inf)
+        first = np.unique(better[:, 0], return_inverse=True)[1].reshape(-1)
+        second = np.unique(better[:, 1], return_inverse=True)[1].reshape(-1)
+        order = np.lexsort((-second, -first, keys))
+        keys, first, second = keys[order], first[order], second[order]
+        # runs of equal (key, first): the first element of each run has its largest second objective
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (first[1:] != first[:-1])])
+        run = np.cumsum(np.r_[False, (keys[1:] != keys[:-1]) | (first[1:] != first[:-1])])
+        # largest second objective over the earlier runs of the same key (segmented running max: offset by key)
+        span = second.max(initial=0) + 1
+        run_max = np.maximum.accumulate(second[starts] + keys[starts] * span)
+        earlier = np.r_[-1, run_max[:-1]][run] - keys * span  # < 0: no earlier run with this key
+        dominated = (earlier >= second) | (second < second[starts][run])
+        keep = np.empty(len(keys), dtype=bool)
+        keep[order] = ~dominated
+        return keep
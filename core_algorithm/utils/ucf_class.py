@@ -1,13 +1,17 @@
 """
 Class to query, parse, and otherwise interface with the User Constraint Files (UCFs) specified by the user.
 
-UCF Class: __count_collections(), __collection_names(), __parse_helpers(),
+UCF Class: __count_collections(), __collection_names(), paths(), file_paths(), __parse_helpers(),
           list_collection_parameters(), query_top_level_collection()
+UCFLibrary Class: compiled index of the sensors, gate groups, gates, and output devices (built once per UCF)
+cached_ucf(): UCF parsed once per process (e.g. by the workers of a batch of jobs)
 """
 
 import os
+from dataclasses import dataclass, field
 from core_algorithm.utils.cello_helpers import *
 from core_algorithm.utils.log import *
+from core_algorithm.utils.equations import compile_equation
 
 
 # Work in progress
@@ -33,6 +37,8 @@ class UCF:
                                      self.__collection_names(self.UCFmain)}  # Main UCF collection counts
         else:
             self.collection_count = {'broken UCF': 0}
+        # Compiled once here so that circuit scoring does not have to re-query the UCF collections every iteration
+        self.library = UCFLibrary(self.UCFmain, self.UCFin, self.UCFout) if self.valid else None
 
     def __count_collection(self, c_name):
         internal_nodes = 0
@@ -45,16 +51,27 @@ class UCF:
     def __collection_names(UCF_choice):
         return list(set([c['collection'] for c in UCF_choice]))
 
+    def paths(self) -> list[str]:
+        """
+        :return: list[str]: paths of the main, input, and output UCF files
+        """
+        return self.file_paths(self.filepath, self.ucf_file, self.in_file, self.out_file)
+
+    @staticmethod
+    def file_paths(filepath, ucf_file, in_file, out_file) -> list[str]:
+        """
+        :return: list[str]: paths of the main, input, and output UCF files (names with or without .json)
+        """
+        return [os.path.join(filepath, f'{f}{".json" if not f.endswith(".json") else ""}')
+                for f in (ucf_file, in_file, out_file)]
+
     def __parse_helper(self):
         # filepath = os.path.join(*self.filepath.split('/'))
         # # Communication Molecule filepaths
         # u = os.path.join(self.filepath, self.ucf_file)
         # i = os.path.join(self.filepath, self.in_file)
         # o = os.path.join(self.filepath, self.out_file)
-        u = os.path.join(self.filepath, f'{self.ucf_file}{".json" if not self.ucf_file.endswith(".json") else ""}')
-        i = os.path.join(self.filepath, f'{self.in_file}{".json" if not self.in_file.endswith(".json") else ""}')
-        o = os.path.join(self.filepath, f'{self.out_file}{".json" if not self.out_file.endswith(".json") else ""}')
-        paths = [u, i, o]
+        paths = self.paths()
         out = []
         for f in paths:
             with open(f, 'r') as ucf:
@@ -117,3 +134,107 @@ class UCF:
             if c['collection'] == c_name:
                 matches.append(c)
         return matches
+
+
+_ucf_cache = {}  # (file paths, (size, mtime) of the files): UCF
+
+
+def cached_ucf(filepath, ucf_file, in_file, out_file) -> UCF:
+    """
+    Returns the UCF parsed earlier in this process from the same files, if they have not changed since (the UCF object
+    is shared, so it must be treated as read-only); otherwise parses them.
+
+    :param filepath: str: folder of the UCF files
+    :param ucf_file: str
+    :param in_file: str
+    :param out_file: str
+    :return: UCF
+    """
+    paths = tuple(UCF.file_paths(filepath, ucf_file, in_file, out_file))
+    try:
+        stamps = tuple((os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths)
+    except OSError:
+        return UCF(filepath, ucf_file, in_file, out_file)  # NOTE: reports the missing file(s)
+    if (paths, stamps) not in _ucf_cache:
+        _ucf_cache[(paths, stamps)] = UCF(filepath, ucf_file, in_file, out_file)
+    return _ucf_cache[(paths, stamps)]
+
+
+@dataclass
+class LibraryModel:
+    """
+    Parameters and equations of a single sensor, gate, or output device, as used in circuit scoring.
+    (Equations are kept as UCF strings; see equations.compile_equation for the compiled callables.)
+
+    Attributes: name, group, params, functions, equations, variables
+    """
+
+    name: str = ""
+    """name of the sensor/gate/device (i.e. the model name without the '_model' suffix)"""
+    group: str = ""
+    """gate group (gates only)"""
+    params: dict = field(default_factory=dict)
+    """parameter name: value (from the 'parameters' block of the model)"""
+    functions: dict = field(default_factory=dict)
+    """function type (e.g. 'response_function'): function name (from the 'functions' block of the model)"""
+    equations: dict = field(default_factory=dict)
+    """function type: equation string (only for functions that have an equation)"""
+    variables: dict = field(default_factory=dict)
+    """function type: 'variables' list of the function (only for functions that have variables)"""
+
+
+class UCFLibrary:
+    """
+    Compiled index of the UCF, UCF-in, and UCF-out models, built once when the UCF is loaded.
+    Maps each input sensor, gate group, gate, and output device straight to its parameters and equations.
+
+    Attributes: sensors{}, gates{}, gate_groups{}, outputs{}
+    """
+
+    def __init__(self, ucf_main, ucf_in, ucf_out):
+        self.sensors: dict[str, LibraryModel] = self.__index_models(ucf_in)
+        """sensor name: LibraryModel"""
+        self.outputs: dict[str, LibraryModel] = self.__index_models(ucf_out)
+        """output device name: LibraryModel"""
+        self.gates: dict[str, LibraryModel] = {}
+        """gate name: LibraryModel"""
+        self.gate_groups: dict[str, list[LibraryModel]] = {}
+        """gate group: [LibraryModel] (in UCF order)"""
+
+        gate_models = self.__index_models(ucf_main)
+        for gate in UCF.query_top_level_collection(ucf_main, 'gates'):
+            model = gate_models.get(gate['name'])
+            if model is None:
+                log.cf.warning(f"Cannot find model for gate {gate['name']} in UCF...")
+                continue
+            model.group = gate['group']
+            self.gates[model.name] = model
+            self.gate_groups.setdefault(model.group, []).append(model)
+
+    @staticmethod
+    def __index_models(ucf):
+        """
+        Returns dict of model name (without '_model' suffix): LibraryModel, with the equations resolved.
+
+        :param ucf: list: UCF, UCF-in, or UCF-out collections
+        :return: dict[str, LibraryModel]
+        """
+        functions = {f['name']: f for f in UCF.query_top_level_collection(ucf, 'functions')}
+        models = {}
+        for m in UCF.query_top_level_collection(ucf, 'models'):
+            name = m['name'][:-6] if m['name'].endswith('_model') else m['name']
+            model = LibraryModel(name=name,
+                                 params={p['name']: p['value'] for p in m.get('parameters', [])},
+                                 functions=dict(m.get('functions', {})))
+            for func_type, func_name in model.functions.items():
+                if func_name in functions:
+                    if 'equation' in functions[func_name]:
+                        model.equations[func_type] = functions[func_name]['equation']
+                        try:  # parsed, safety-checked, and compiled once here; nodes then reuse the cached callable
+                            compile_equation(model.equations[func_type])
+                        except (SyntaxError, ValueError) as e:
+                            log.cf.error(f"Invalid equation for {func_name} in UCF: {model.equations[func_type]}\n{e}")
+                    if 'variables' in functions[func_name]:
+                        model.variables[func_type] = functions[func_name]['variables']
+            models[name] = model
+        return models
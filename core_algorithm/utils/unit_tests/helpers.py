@@ -0,0 +1,54 @@
+"""
+Shared test data for the gate assignment search tests (not collected by pytest: no test_ prefix).
+
+CONSTRAINTS, NETLIST
+make_scorer(), make_cello()
+"""
+
+import os
+from types import SimpleNamespace
+from core_algorithm.utils.batch_scoring import *
+
+CONSTRAINTS = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'library', 'constraints')
+# sc2 netlist: out1 = NOR(in1, NOT(in2)), out2 = NOT(in2)
+NETLIST = SimpleNamespace(inputs=[('in1', 2), ('in2', 3)], outputs=[('out1', 4), ('out2', 5)],
+                          gates={'79': {'type': 'NOT', 'inputs': {'A': 3}, 'output': {'Y': 5}},
+                                 '80': {'type': 'NOR', 'inputs': {'A': 2, 'B': 5}, 'output': {'Y': 4}}})
+
+
+def make_scorer(ucf_name, netlist=NETLIST, num_sensors=None):
+    """
+    :param ucf_name: str: e.g. 'Eco2C1G5T1'
+    :param netlist: SimpleNamespace(inputs, outputs, gates)
+    :param num_sensors: int: only the first sensors of the UCF (None: all)
+    :return: BatchScorer: over the UCF's sensors, devices, and gate groups
+    """
+    ucf = UCF(CONSTRAINTS, f'{ucf_name}.UCF', f'{ucf_name}.input', f'{ucf_name}.output')
+    netgraph = GraphParser(netlist.inputs, netlist.outputs, netlist.gates)
+    i_list = [s['name'] for s in ucf.query_top_level_collection(ucf.UCFin, 'input_sensors')][:num_sensors]
+    o_list = [d['name'] for d in ucf.query_top_level_collection(ucf.UCFout, 'output_devices')]
+    g_list = sorted(set(g['group'] for g in ucf.query_top_level_collection(ucf.UCFmain, 'gates')))
+    return BatchScorer(ucf.library, netgraph, i_list, o_list, g_list)
+
+
+def make_cello(ucf_name, netlist=NETLIST, limits=None):
+    """
+    :param ucf_name: str: e.g. 'Eco2C1G5T1'
+    :param netlist: SimpleNamespace(inputs, outputs, gates)
+    :param limits: SearchLimits (None: no limits), started here
+    :return: CELLO3: without its stages run, with the attributes used by the gate-assignment searches
+    """
+    from core_algorithm.celloAlgo import CELLO3
+    from core_algorithm.utils.score_cache import ScoreCache
+    from core_algorithm.utils.search_limits import SearchLimits
+
+    cello = CELLO3.__new__(CELLO3)
+    cello.ucf = UCF(CONSTRAINTS, f'{ucf_name}.UCF', f'{ucf_name}.input', f'{ucf_name}.output')
+    cello.rnl, cello.verbose, cello.print_iters, cello.vectorized = netlist, False, False, False
+    cello.best_score, cello.best_graphs, cello.iter_count, cello.start_design = 0, [], 0, None
+    cello.population, cello.elites, cello.mutation_rate, cello.convergence = 16, 2, 0.3, 10
+    cello.samples, cello.elite_fraction, cello.smoothing, cello.beam_width = 16, 0.25, 0.7, 64
+    cello.cooling, cello.temperature = 'geometric', (1.0, 0.01)
+    cello.score_cache, cello.limits = ScoreCache(100), limits or SearchLimits()
+    cello.limits.start()
+    return cello
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from core_algorithm.utils.assignment_moves import *
+
+
+# Test that moves keep assignments valid (no name used twice) and report the nodes they change
+def test_random_moves():
+    moves = AssignmentMoves(['a_in', 'b_in', 'c_in'], ['x_out', 'y_out'], ['G1', 'G2', 'G3', 'G4'])
+    rng = np.random.default_rng(1)
+    assignment = moves.random_assignment(rng, 2, 1, 3)
+    for _ in range(100):
+        move = moves.random_move(rng, assignment)
+        new = moves.apply(assignment, move)
+        names = moves.names(new)
+        assert len(set(names[0] + names[1] + names[2])) == 6
+        changed = [(kind, j) for kind, old, idx in zip(KINDS, assignment, new) for j in range(len(idx))
+                   if old[j] != idx[j]]
+        assert sorted(changed) == sorted(set(moves.changed_nodes(move)))
+        assignment = new
+
+
+def test_temperature():
+    assert temperature('geometric', 1.0, 0.01, 0.5) == pytest.approx(0.1)
+    assert temperature('linear', 1.0, 0.0, 0.25) == pytest.approx(0.75)
+    assert temperature('logarithmic', 1.0, 0.01, 1.0) == pytest.approx(0.01)
+    with pytest.raises(ValueError):
+        temperature('cubic', 1.0, 0.01, 0.5)
@@ -0,0 +1,110 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import pytest
+from config import CONSTRAINTS_DIR
+import core_algorithm.utils.batch_runner as batch_runner
+from core_algorithm.utils.batch_runner import *
+from core_algorithm.utils.ucf_class import cached_ucf
+
+
+# Test that JSON (with defaults) and CSV manifests give the same jobs
+def test_load_manifest(tmp_path):
+    manifest = {'defaults': {'timeout': 600, 'options': {'seed': 1, 'log_overwrite': True}},
+                'jobs': [{'verilog': 'and.v', 'ucf': 'Eco1C2G2T2'},
+                         {'verilog': 'and', 'ucf': 'Eco1C2G2T2.UCF', 'name': 'and_seed2', 'options': {'seed': 2}}]}
+    (tmp_path / 'jobs.json').write_text(json.dumps(manifest))
+    (tmp_path / 'jobs.csv').write_text('verilog,ucf,options,timeout,name\n'
+                                       'and.v,Eco1C2G2T2,"{""seed"": 1, ""log_overwrite"": true}",600,\n'
+                                       'and,Eco1C2G2T2.UCF,"{""seed"": 2, ""log_overwrite"": true}",600,and_seed2\n')
+    jobs = load_manifest(str(tmp_path / 'jobs.json'))
+    assert jobs == load_manifest(str(tmp_path / 'jobs.csv'))
+    assert (jobs[0].name, jobs[0].ucf, jobs[0].input, jobs[0].timeout) == \
+           ('and+Eco1C2G2T2', 'Eco1C2G2T2.UCF', 'Eco1C2G2T2.input', 600)
+    assert jobs[1].options == {'seed': 2, 'log_overwrite': True}
+
+
+# Test that a failed job is reported in the summary (the batch going on), and that UCFs are parsed once per process
+def test_run_batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    jobs = [BatchJob('missing_verilog', 'Eco1C2G2T2', options={'log_overwrite': True})]
+    results = run_batch(jobs, 'summary.json', str(tmp_path), CONSTRAINTS_DIR, str(tmp_path / 'out'), workers=1,
+                        timeout=60, poll=0.05)
+    assert results[0]['status'] == 'FAILED' and 'logic synthesis' in results[0]['error']
+    summary = json.loads((tmp_path / 'summary.json').read_text())
+    assert summary['counts']['FAILED'] == 1 and summary['jobs'][0]['name'] == 'missing_verilog+Eco1C2G2T2'
+
+    ucf = cached_ucf(CONSTRAINTS_DIR, 'Eco1C2G2T2.UCF', 'Eco1C2G2T2.input', 'Eco1C2G2T2.output')
+    assert ucf.valid and ucf is cached_ucf(CONSTRAINTS_DIR, 'Eco1C2G2T2.UCF', 'Eco1C2G2T2.input', 'Eco1C2G2T2.output')
+
+
+def slow_run_job(job, verilogs_path, constraints_path, out_path):
+    """Stand-in for run_job: the 'slow' job starts a child process (as yosys would) and outlives its time limit."""
+    if job.verilog == 'slow':
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        with open(os.path.join(out_path, 'slow.pids'), 'w') as f:
+            f.write(f'{os.getpid()} {child.pid}')
+        time.sleep(60)
+    return {'status': 'SUCCESS', 'pid': os.getpid()}
+
+
+def is_running(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'  # NOTE: zombies are dead (not reaped yet)
+    except FileNotFoundError:
+        return False
+
+
+# Test that a job over its time limit ends as TIMEOUT, its worker and the processes it started are killed, and the
+# next job runs on a replacement worker
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork' or not os.path.isdir('/proc'),
+                    reason='workers must inherit the patched run_job (fork), and /proc is used to check processes')
+def test_timeout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch_runner, 'run_job', slow_run_job)
+    jobs = [BatchJob('slow', 'Eco1C2G2T2', timeout=1), BatchJob('fast', 'Eco1C2G2T2')]
+    start = time.monotonic()
+    results = run_batch(jobs, 'summary.json', str(tmp_path), CONSTRAINTS_DIR, str(tmp_path), workers=1, poll=0.05)
+    assert time.monotonic() - start < 30
+    assert results[0]['status'] == 'TIMEOUT' and 'time limit' in results[0]['error']
+    worker, child = map(int, (tmp_path / 'slow.pids').read_text().split())
+    assert results[1]['status'] == 'SUCCESS' and results[1]['pid'] != worker
+    deadline = time.monotonic() + 10
+    while is_running(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not is_running(worker) and not is_running(child)
+    assert json.loads((tmp_path / 'summary.json').read_text())['counts'] == \
+           {'SUCCESS': 1, 'FAILED': 0, 'TIMEOUT': 1, 'PENDING': 0}
+
+
+def borderline_run_job(job, verilogs_path, constraints_path, out_path):
+    """Stand-in for run_job: the 'edge' jobs end just after their time limit."""
+    if job.verilog == 'edge':
+        time.sleep(job.timeout * 1.5)
+    return {'status': 'SUCCESS', 'pid': os.getpid()}
+
+
+# Test that a job ending between its time limit check and the kill of its worker gets exactly one result (TIMEOUT),
+# even if the worker already sent it, and that the batch goes on with the next jobs
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patched run_job')
+def test_timeout_race(tmp_path, monkeypatch):
+    kill = batch_runner._kill
+
+    def late_kill(process):
+        time.sleep(0.2)  # NOTE: the job ends before its worker is killed
+        kill(process)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(batch_runner, 'run_job', borderline_run_job)
+    monkeypatch.setattr(batch_runner, '_kill', late_kill)
+    jobs = [BatchJob('edge', 'Eco1C2G2T2', timeout=0.1, name=f'edge{k}') for k in range(4)] + \
+           [BatchJob('fast', 'Eco1C2G2T2', name=f'fast{k}') for k in range(4)]
+    results = run_batch(jobs, 'summary.json', str(tmp_path), CONSTRAINTS_DIR, str(tmp_path), workers=1, poll=0.02)
+    assert [result['status'] for result in results] == ['TIMEOUT'] * 4 + ['SUCCESS'] * 4
+    summary = json.loads((tmp_path / 'summary.json').read_text())
+    assert [job['status'] for job in summary['jobs']] == [result['status'] for result in results]
+    assert summary['counts'] == {'SUCCESS': 4, 'FAILED': 0, 'TIMEOUT': 4, 'PENDING': 0}
@@ -0,0 +1,63 @@
+import itertools
+import numpy as np
+import pytest
+from core_algorithm.celloAlgo import CELLO3
+from core_algorithm.utils.batch_scoring import *
+from core_algorithm.utils.unit_tests.helpers import CONSTRAINTS, NETLIST
+
+
+def scalar_scorer(ucf):
+    cello = CELLO3.__new__(CELLO3)
+    cello.ucf, cello.rnl, cello.verilog_name = ucf, NETLIST, 'sc2'
+    cello.verbose, cello.print_iters = False, False
+    return cello
+
+
+# Test BatchScorer against score_circuit (one UCF with tandem factors, one with Hill output functions)
+@pytest.mark.parametrize('ucf_name', ['Eco1C2G2T2', 'Eco2C1G5T1'])
+def test_matches_score_circuit(ucf_name):
+    ucf = UCF(CONSTRAINTS, f'{ucf_name}.UCF', f'{ucf_name}.input', f'{ucf_name}.output')
+    netgraph = GraphParser(NETLIST.inputs, NETLIST.outputs, NETLIST.gates)
+    i_list = [s['name'] for s in ucf.query_top_level_collection(ucf.UCFin, 'input_sensors')]
+    o_list = [d['name'] for d in ucf.query_top_level_collection(ucf.UCFout, 'output_devices')]
+    g_list = sorted(set(g['group'] for g in ucf.query_top_level_collection(ucf.UCFmain, 'gates')))
+    i_perms, o_perms, g_perms = [list(itertools.permutations(lst, 2)) for lst in [i_list, o_list, g_list]]
+    scorer = BatchScorer(ucf.library, netgraph, i_list, o_list, g_list, i_perms, o_perms, g_perms)
+
+    x = np.array(list(itertools.product(range(len(i_perms)), range(len(o_perms)), range(len(g_perms)))))[::7]
+    scores = scorer.score(x)
+    cello = scalar_scorer(ucf)
+    for (i, o, g), score in zip(x, scores):
+        graph = CELLO3.build_assign_graph(i_perms[i], o_perms[o], g_perms[g], netgraph)
+        assert score == pytest.approx(cello.score_circuit(graph)[0], rel=1e-9)
+
+
+def test_invalid_assignment():
+    ucf = UCF(CONSTRAINTS, 'Eco1C2G2T2.UCF', 'Eco1C2G2T2.input', 'Eco1C2G2T2.output')
+    netgraph = GraphParser(NETLIST.inputs, NETLIST.outputs, NETLIST.gates)
+    i_list = [s['name'] for s in ucf.query_top_level_collection(ucf.UCFin, 'input_sensors')]
+    o_list = [d['name'] for d in ucf.query_top_level_collection(ucf.UCFout, 'output_devices')]
+    g_list = sorted(set(g['group'] for g in ucf.query_top_level_collection(ucf.UCFmain, 'gates')))
+    scorer = BatchScorer(ucf.library, netgraph, i_list, o_list, g_list)
+    scores = scorer.score_assignments([[0, 1], [0, 0]], [[0, 1], [0, 1]], [[0, 1], [0, 1]])
+    assert not np.isnan(scores[0]) and np.isnan(scores[1])  # same sensor used for both inputs
+
+
+# Test incremental re-evaluation (only nodes downstream of a move) against full scoring, along a random walk
+def test_incremental_evaluate():
+    from core_algorithm.utils.assignment_moves import AssignmentMoves
+    ucf = UCF(CONSTRAINTS, 'Eco2C1G5T1.UCF', 'Eco2C1G5T1.input', 'Eco2C1G5T1.output')
+    netgraph = GraphParser(NETLIST.inputs, NETLIST.outputs, NETLIST.gates)
+    i_list = [s['name'] for s in ucf.query_top_level_collection(ucf.UCFin, 'input_sensors')]
+    o_list = [d['name'] for d in ucf.query_top_level_collection(ucf.UCFout, 'output_devices')]
+    g_list = sorted(set(g['group'] for g in ucf.query_top_level_collection(ucf.UCFmain, 'gates')))
+    scorer = BatchScorer(ucf.library, netgraph, i_list, o_list, g_list)
+    moves = AssignmentMoves(i_list, o_list, g_list)
+    rng = np.random.default_rng(0)
+    assignment = moves.random_assignment(rng, 2, 2, 2)
+    values = scorer.evaluate(*assignment)
+    for _ in range(50):
+        move = moves.random_move(rng, assignment)
+        assignment = moves.apply(assignment, move)
+        values = scorer.evaluate(*assignment, values, moves.changed_nodes(move))
+        assert values['score'][0] == scorer.score_assignments(*assignment)[0]
@@ -0,0 +1,56 @@
+import math
+import numpy as np
+import pytest
+from core_algorithm.utils.beam_search import *
+from core_algorithm.utils.batch_scoring import GraphParser
+from core_algorithm.utils.branch_and_bound import BranchAndBound
+from core_algorithm.utils.search_limits import SearchLimits
+from core_algorithm.utils.unit_tests.helpers import NETLIST, make_cello, make_scorer
+
+
+# Test that a wide enough beam finds the best score of branch and bound (exact), with valid designs scored as reported
+@pytest.mark.parametrize('ucf_name', ['Eco2C1G3T1', 'Eco2C1G5T1'])
+def test_wide_beam_matches_branch_and_bound(ucf_name):
+    scorer = make_scorer(ucf_name)
+    best, ties = BeamSearch(scorer, width=64).search()
+    assert best == BranchAndBound(scorer).search()[0]
+    assert len(ties) > 0
+    for tie in ties:
+        assert all(len(set(idx)) == len(idx) for idx in tie)
+        assert scorer.score_assignments(*(np.array([idx]) for idx in tie))[0] == best
+
+
+# Test that the number of assignments evaluated grows with the beam width only (not with the search space)
+def test_scored_bounded_by_width():
+    scored = []
+    for num_sensors in (4, None):  # 4 of the 7 sensors, then all of them
+        scorer = make_scorer('Eco2C1G3T1', num_sensors=num_sensors)
+        beam = BeamSearch(scorer, width=4)
+        beam.search()
+        outputs = math.perm(len(scorer.o_list), scorer.num_out)
+        assert beam.scored <= scorer.num_gates * 4 * len(scorer.g_list) + 4 * outputs
+        scored.append(beam.scored)
+    assert scored[0] == scored[1]
+
+
+# Test that a stopped search still completes its best partial assignment (greedily) into a valid design
+def test_progress_stop():
+    scorer = make_scorer('Eco2C1G3T1')
+    full, stopped = BeamSearch(scorer, width=16), BeamSearch(scorer, width=16)
+    full.search()
+    best, ties = stopped.search(progress=lambda best, scored: True)
+    assert stopped.scored < full.scored and best > 0 and len(ties) > 0
+    assert scorer.score_assignments(*(np.array([idx]) for idx in ties[0]))[0] == best
+
+
+# Test that patience does not cut the beam short (no complete design is scored before the last step)
+def test_patience_not_used():
+    scorer = make_scorer('Eco1C2G2T2')
+    lists = (scorer.i_list, scorer.o_list, scorer.g_list)
+    netgraph = GraphParser(NETLIST.inputs, NETLIST.outputs, NETLIST.gates)
+    scores = []
+    for limits in (None, SearchLimits(patience=20)):
+        cello = make_cello('Eco1C2G2T2', limits=limits)
+        cello.beam_search_assign(*lists, 2, 2, 2, netgraph, math.perm(len(lists[2]), 2))
+        scores.append(cello.best_score)
+    assert scores[1] == scores[0] > 0
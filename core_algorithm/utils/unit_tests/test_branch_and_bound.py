@@ -0,0 +1,32 @@
+import itertools
+import numpy as np
+import pytest
+from core_algorithm.utils.branch_and_bound import *
+from core_algorithm.utils.batch_scoring import *
+from core_algorithm.utils.unit_tests.helpers import make_scorer
+
+
+# Test that branch and bound finds the same best score and designs as scoring every assignment
+@pytest.mark.parametrize('ucf_name', ['Eco2C1G3T1', 'Eco2C1G5T1'])
+def test_matches_exhaustive(ucf_name):
+    scorer = make_scorer(ucf_name)
+    designs = [np.array(list(itertools.permutations(range(len(lst)), 2)))
+               for lst in (scorer.i_list, scorer.o_list, scorer.g_list)]
+    grid = np.array(list(itertools.product(*(range(len(d)) for d in designs))))
+    scores = scorer.score_assignments(*(d[grid[:, t]] for t, d in enumerate(designs)))
+    best = np.nanmax(scores)
+
+    bnb = BranchAndBound(scorer)
+    score, ties = bnb.search(chunk_size=8)
+    assert score == best
+    expected = sorted(tuple(tuple(d[grid[m, t]]) for t, d in enumerate(designs)) for m in np.flatnonzero(scores == best))
+    assert sorted(tuple(tuple(idx) for idx in tie) for tie in ties) == expected
+    assert bnb.scored < len(grid)
+
+
+# Test that non-monotone responses (tandem promoters) are rejected
+def test_unsupported_tandem():
+    scorer = make_scorer('Eco1C2G2T2')
+    assert 'tandem' in unsupported_reason(scorer)
+    with pytest.raises(ValueError):
+        BranchAndBound(scorer)
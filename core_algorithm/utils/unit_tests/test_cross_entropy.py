@@ -0,0 +1,25 @@
+import numpy as np
+from core_algorithm.utils.cross_entropy import *
+
+
+# Test that every sample is a valid assignment (no item used twice by nodes of the same kind)
+def test_samples_are_valid():
+    sampler = CrossEntropySampler((3, 2, 9), (2, 1, 6))
+    population = sampler.sample(np.random.default_rng(0), 500)
+    for genes, n in zip(population, (3, 2, 9)):
+        assert ((genes >= 0) & (genes < n)).all()
+        assert all(len(set(row)) == len(row) for row in genes.tolist())
+
+
+# Test that the distribution concentrates on the elite design
+def test_update_converges_to_elite():
+    sampler = CrossEntropySampler((4, 3, 6), (2, 1, 3), elite_fraction=0.1, smoothing=0.7)
+    rng = np.random.default_rng(1)
+    target = (np.array([2, 0]), np.array([1]), np.array([5, 3, 0]))
+    for _ in range(30):
+        population = sampler.sample(rng, 200)
+        fitness = -sum((genes != t).sum(axis=1) for genes, t in zip(population, target)).astype(float)
+        sampler.update(population, fitness)
+    assert sampler.converged()
+    assert all((probs.argmax(axis=1) == t).all() for probs, t in zip(sampler.probs, target))
+    assert all(np.allclose(probs.sum(axis=1), 1) for probs in sampler.probs)
@@ -0,0 +1,44 @@
+import pickle
+import pytest
+from core_algorithm.utils.equations import *
+
+
+# Test UCF Equation Compilation
+def test_hill_response():
+    hill = compile_equation('ymin + (ymax - ymin) / (1.0 + (x / K)^n)')
+    assert hill.variables == ('ymin', 'ymax', 'x', 'K', 'n')
+    assert hill(x=0.5, ymin=0.1, ymax=3.0, K=0.2, n=2.0, alpha=7) == pytest.approx(0.5)  # extra params ignored
+    assert compile_equation('ymin + (ymax - ymin) / (1.0 + (x / K)^n)') is hill  # compiled only once
+
+
+def test_sensor_state():
+    sensor = compile_equation('$STATE * (ymax - ymin) + ymin')
+    assert sensor.variables == ('STATE', 'ymax', 'ymin')
+    assert sensor(STATE=1, ymax=2.8, ymin=0.0034) == pytest.approx(2.8)
+    assert sensor(STATE=0, ymax=2.8, ymin=0.0034) == pytest.approx(0.0034)
+
+
+# Test that min/max take any number of operands (element-wise on arrays) without overwriting any of them
+def test_min_max():
+    import numpy as np
+    assert compile_equation('max(a, b, c)')(a=1.0, b=3.0, c=2.0) == 3.0
+    assert compile_equation('min(a, b, c) + min(x)')(a=1.0, b=3.0, c=2.0, x=5.0) == 6.0
+    c = np.array([2.0, 0.0])
+    assert list(compile_equation('max(a, b, c)')(a=np.array([1.0, 1.0]), b=np.array([0.0, 0.5]), c=c)) == [2.0, 1.0]
+    assert list(c) == [2.0, 0.0]
+
+
+def test_missing_variable():
+    with pytest.raises(TypeError):
+        compile_equation('c * x')(x=1.0)
+
+
+def test_unsafe_equations():
+    for unsafe in ['__import__("os")', 'x.real', 'x[0]', 'lambda: 1', '"text"', 'open(x)']:
+        with pytest.raises(ValueError):
+            compile_equation(unsafe)
+
+
+def test_pickle():
+    eq = compile_equation('x1 + t1 * x2')
+    assert pickle.loads(pickle.dumps(eq))(x1=1, x2=2, t1=0.5) == 2
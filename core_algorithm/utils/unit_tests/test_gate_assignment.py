@@ -0,0 +1,30 @@
+import pytest
+from core_algorithm.utils.gate_assignment import *
+
+
+# Test EvalPlan (netlist compiled into a levelized evaluation order)
+def test_eval_plan_levels():
+    # out1 = NOR(in1, NOT(in2)), out2 = NOT(in2)   (gates listed out of order)
+    netgraph = GraphParser([('in1', 2), ('in2', 3)], [('out1', 4), ('out2', 5)],
+                           {'80': {'type': 'NOR', 'inputs': {'A': 2, 'B': 5}, 'output': {'Y': 4}},
+                            '79': {'type': 'NOT', 'inputs': {'A': 3}, 'output': {'Y': 5}}})
+    plan = netgraph.plan
+    assert plan.prevs == [(), (), (0, 3), (1,), (2,), (3,)]  # same order as the NOR gate's input wires
+    assert plan.gate_order == [3, 2]
+    assert plan.levels[2:4] == [2, 1]
+    assert plan.on_rows[0].tolist() == [False, True, False, False]
+    assert plan.on_rows[1].tolist() == [True, False, True, False]
+    graph = AssignGraph(netgraph.inputs, netgraph.outputs, netgraph.gates, plan)
+    assert graph.find_prev(netgraph.outputs[0]) is netgraph.gates[0]
+    assert graph.find_prev(netgraph.gates[0]) == [netgraph.inputs[0], netgraph.gates[1]]
+
+
+def test_eval_plan_feedback():
+    # SR latch: two cross-coupled NOR gates
+    netgraph = GraphParser([('S', 2), ('R', 3)], [('Q', 4)],
+                           {'1': {'type': 'NOR', 'inputs': {'A': 2, 'B': 5}, 'output': {'Y': 4}},
+                            '2': {'type': 'NOR', 'inputs': {'A': 3, 'B': 4}, 'output': {'Y': 5}}})
+    assert netgraph.plan.feedback == [2, 3]
+    assert netgraph.plan.io is None
+    with pytest.raises(RecursionError):
+        AssignGraph(netgraph.inputs, netgraph.outputs, netgraph.gates).topological_order()
@@ -0,0 +1,32 @@
+import numpy as np
+from core_algorithm.utils.genetic_search import *
+
+
+def is_valid(population, sizes):
+    return all(((genes >= 0) & (genes < n)).all() and all(len(set(row)) == len(row) for row in genes.tolist())
+               for genes, n in zip(population, sizes))
+
+
+# Test that crossover and mutation keep every child a valid assignment (no item used twice)
+def test_children_are_valid():
+    ga = GeneticOperators((3, 2, 9), elites=2, mutation_rate=0.5)
+    rng = np.random.default_rng(0)
+    population = ga.random_population(rng, 64, (2, 1, 6))
+    assert is_valid(population, ga.sizes)
+    for _ in range(20):
+        fitness = rng.random(64)
+        fitness[3] = np.nan
+        population = ga.next_generation(rng, population, fitness)
+        assert [len(genes) for genes in population] == [64, 64, 64]
+        assert is_valid(population, ga.sizes)
+
+
+def test_elitism():
+    ga = GeneticOperators((12, 7, 8), elites=3)
+    rng = np.random.default_rng(1)
+    population = ga.random_population(rng, 20, (2, 2, 8))
+    fitness = np.arange(20.0)
+    children = ga.next_generation(rng, population, fitness)
+    for genes, new in zip(population, children):
+        assert (new[:3] == genes[[19, 18, 17]]).all()
+
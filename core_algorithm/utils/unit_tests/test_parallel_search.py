@@ -0,0 +1,14 @@
+from core_algorithm.utils.parallel_search import *
+
+
+# Test sharding & merging of parallel search results
+def test_shard_ranges():
+    assert shard_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert shard_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert shard_ranges(0, 4) == []
+
+
+def test_merge_best():
+    results = [(5.0, [(0, 0, 1)], 10), (7.0, [(0, 1, 0)], 10), (7.0, [(1, 0, 0), (1, 0, 2)], 10), (6.0, [], 10)]
+    assert merge_best(results) == (7.0, [(0, 1, 0), (1, 0, 0), (1, 0, 2)], 40)
+    assert merge_best([], min_score=3.0) == (3.0, [], 0)
@@ -0,0 +1,26 @@
+import itertools
+import numpy as np
+import pytest
+from core_algorithm.utils.permutations import *
+
+
+# Test PermutationIndexer (same order as itertools.permutations)
+def test_matches_itertools():
+    items = ['a', 'b', 'c', 'd', 'e']
+    for k in range(len(items) + 1):
+        perms = PermutationIndexer(items, k)
+        expected = list(itertools.permutations(items, k))
+        assert perms.size == len(expected)
+        assert list(perms) == expected
+        assert [perms.rank(p) for p in expected] == list(range(len(expected)))
+        assert [tuple(items[j] for j in row) for row in perms.unrank_array(np.arange(perms.size))] == expected
+
+
+def test_large_space():
+    perms = PermutationIndexer([f'group{j}' for j in range(18)], 10)  # ~1.8e11 permutations, never materialized
+    assert perms.size == 18 * 17 * 16 * 15 * 14 * 13 * 12 * 11 * 10 * 9
+    rank = perms.size - 1
+    assert perms[rank] == tuple(f'group{j}' for j in range(17, 7, -1))
+    assert perms.rank(perms[rank]) == rank
+    with pytest.raises(IndexError):
+        perms.unrank(perms.size)
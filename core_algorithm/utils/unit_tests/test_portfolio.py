@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from core_algorithm.utils.batch_scoring import GraphParser
+from core_algorithm.utils.parallel_search import init_worker, portfolio_run
+from core_algorithm.utils.portfolio import *
+from core_algorithm.utils.unit_tests.helpers import NETLIST, make_cello, make_scorer
+
+
+# Test that the budget is split over the rounds needed to get down to one strategy, and the worse half is cancelled
+def test_successive_halving():
+    race = PortfolioRace(['a', 'b', 'c', 'd'], 1_200)
+    assert race.shares() == {'a': 100, 'b': 100, 'c': 100, 'd': 100}  # 3 rounds: 4, 2, then 1 strategy
+    for strategy, best in zip('abcd', (1.0, 3.0, 2.0, 3.0)):
+        race.record(strategy, best, 100, elapsed=1.0 if strategy == 'b' else 2.0)
+    assert race.eliminate() == ['a', 'c']
+    assert race.leader() == 'b'  # reached the best score first
+    assert race.shares() == {'b': 200, 'd': 200}
+    race.record('b', 2.0, 150, elapsed=3.0)  # a worse run does not lower the strategy's best score
+    race.record('d', 4.0, 200, elapsed=3.5)
+    assert race.eliminate() == ['b']
+    assert race.shares() == {'d': 450}  # including the budget the runs did not use
+    assert race.history['b'] == [(1.0, 3.0, 100), (3.0, 3.0, 250)]
+    race.record('d', 4.0, 450, elapsed=5.0)
+    assert race.done()
+
+
+def test_no_strategies():
+    with pytest.raises(ValueError):
+        PortfolioRace([], 100)
+
+
+
+# Test that a strategy's run starts from the design it is given (its best one so far): with a budget of one design,
+# that design is the one scored
+@pytest.mark.parametrize('algorithm', ['dual_annealing', 'discrete_annealing', 'genetic', 'cross_entropy'])
+def test_run_starts_from_design(algorithm):
+    scorer = make_scorer('Eco2C1G3T1')
+    cello = make_cello('Eco2C1G3T1')
+    init_worker(cello)
+
+    lists = (scorer.i_list, scorer.o_list, scorer.g_list)
+    design = (tuple(lists[0][-2:]), tuple(lists[1][:2]), tuple(lists[2][1:3]))
+    expected = scorer.score_assignments(*(np.array([[lst.index(n) for n in names]])
+                                          for lst, names in zip(lists, design)))[0]
+    netgraph = GraphParser(NETLIST.inputs, NETLIST.outputs, NETLIST.gates)
+    best_score, _, scored, _ = portfolio_run(algorithm, 1, lists, (2, 2, 2), netgraph, 10_000, 1, design)
+    assert scored == 1 and best_score == pytest.approx(expected)
@@ -0,0 +1,19 @@
+from core_algorithm.utils.score_cache import *
+
+
+# Test ScoreCache (LRU)
+def test_lru_eviction():
+    cache = ScoreCache(maxsize=2)
+    cache.put(('a',), 1.0)
+    cache.put(('b',), 2.0)
+    assert cache.get(('a',)) == 1.0  # 'a' now most recently used
+    cache.put(('c',), 3.0)
+    assert ('b',) not in cache and ('a',) in cache and ('c',) in cache
+    assert cache.get(('b',)) is None
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+
+
+def test_disabled():
+    cache = ScoreCache(maxsize=0)
+    cache.put(('a',), 1.0)
+    assert cache.get(('a',)) is None and len(cache) == 0
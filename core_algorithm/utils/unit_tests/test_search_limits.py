@@ -0,0 +1,28 @@
+import time
+from core_algorithm.utils.search_limits import *
+
+
+# Test the plateau count (reset by better designs and new runs) and the deadline
+def test_patience():
+    limits = SearchLimits(patience=10)
+    limits.start()
+    limits.update(6, improved=False)
+    assert limits.reason() is None
+    limits.update(3, improved=True)
+    limits.update(9, improved=False)
+    assert limits.reason() is None
+    limits.update(1, improved=False)
+    assert 'patience' in limits.reason()
+    limits.new_run()
+    assert limits.reason() is None
+
+
+def test_time_limit():
+    limits = SearchLimits(time_limit=0.05)
+    assert limits.reason() is None  # NOTE: the clock starts with start()
+    limits.start()
+    assert 0 < limits.remaining() <= 0.05
+    time.sleep(0.06)
+    assert 'time limit' in limits.reason()
+    assert limits.remaining() == 0
+    assert SearchLimits().remaining() is None
@@ -0,0 +1,61 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+import app.server
+from app.server import CelloServer, Handler
+from core_algorithm.utils.batch_runner import BatchJob
+
+
+# Test that a job posted with "stream" gets its events as NDJSON (queued ... done), and can be queried after
+def test_stream_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cello = CelloServer(verilogs_path=str(tmp_path), out_path=str(tmp_path / 'out'), workers=1)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.cello = cello
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_port}'
+    try:
+        body = json.dumps({'verilog': 'missing_verilog', 'ucf': 'Eco1C2G2T2', 'options': {'log_overwrite': True},
+                           'stream': True}).encode()
+        with urllib.request.urlopen(urllib.request.Request(f'{url}/jobs', body), timeout=60) as response:
+            events = [json.loads(line) for line in response]
+        assert events[0]['event'] == 'queued' and events[-1]['event'] == 'done'  # NOTE: 'running' may be skipped
+        assert events[-1]['result']['status'] == 'FAILED'
+        with urllib.request.urlopen(f'{url}/jobs/{events[0]["id"]}', timeout=10) as response:
+            job = json.load(response)
+        assert job['status'] == 'FAILED' and job['verilog'] == 'missing_verilog'
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        cello.close()
+
+
+def crashing_run_job(job, verilogs_path, constraints_path, out_path):
+    """Stand-in for run_job: the 'crash' job kills its worker process; the others wait a bit."""
+    if job.verilog == 'crash':
+        os._exit(1)
+    time.sleep(0.2)
+    return {'status': 'SUCCESS', 'pid': os.getpid()}
+
+
+# Test that a worker dying fails its own job only: the pool is replaced, and the jobs queued behind it are run again
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patched run_job')
+def test_worker_death(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app.server, 'run_job', crashing_run_job)
+    cello = CelloServer(verilogs_path=str(tmp_path), out_path=str(tmp_path / 'out'), workers=1)
+    try:
+        ids = [cello.submit(BatchJob(verilog, 'Eco1C2G2T2')) for verilog in ('and', 'crash', 'nand', 'xor')]
+        for job_id in ids:
+            list(cello.events(job_id, timeout=30))
+        jobs = [cello.job(job_id) for job_id in ids]
+        assert [job['status'] for job in jobs] == ['SUCCESS', 'FAILED', 'SUCCESS', 'SUCCESS']
+        assert 'BrokenProcessPool' in jobs[1]['result']['error']
+        assert jobs[0]['result']['pid'] != jobs[2]['result']['pid']  # NOTE: run on the replacement pool
+    finally:
+        cello.close()
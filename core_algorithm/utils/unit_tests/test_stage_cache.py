@@ -0,0 +1,39 @@
+import os
+from core_algorithm.utils.stage_cache import *
+
+
+def write_stage(out, calls):
+    calls.append(1)
+    with open(os.path.join(out, 'design.csv'), 'w') as f:
+        f.write('score,42')
+    return {'score': 42.0}
+
+
+# Test that a stage's files and result are stored, then restored (without running it) in another output folder
+def test_run_restores(tmp_path):
+    out1, out2 = tmp_path / 'out1', tmp_path / 'out2'
+    out1.mkdir()
+    out2.mkdir()
+    (out1 / 'input.txt').write_text('not created by the stage')
+    key = StageCache.key('design', 'abc', {'seed': 1})
+    assert key == StageCache.key('design', 'abc', {'seed': 1}) != StageCache.key('design', 'abc', {'seed': 2})
+
+    calls = []
+    cache = StageCache(tmp_path / 'cache', out1)
+    assert cache.run('design', key, lambda: write_stage(str(out1), calls)) == {'score': 42.0}
+    assert cache.misses == ['design'] and cache.contains('design', key)
+
+    cache = StageCache(tmp_path / 'cache', out2)
+    assert cache.run('design', key, lambda: write_stage(str(out2), calls)) == {'score': 42.0}
+    assert cache.hits == ['design'] and len(calls) == 1
+    assert os.listdir(out2) == ['design.csv']
+
+
+# Test that a stage without a key is run every time, and not stored
+def test_run_without_key(tmp_path):
+    calls = []
+    cache = StageCache(tmp_path / 'cache', tmp_path)
+    for _ in range(2):
+        cache.run('techmap', None, lambda: write_stage(str(tmp_path), calls))
+    assert len(calls) == 2 and cache.hits == []
+    assert not os.path.exists(tmp_path / 'cache' / 'techmap')
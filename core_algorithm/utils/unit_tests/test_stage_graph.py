@@ -0,0 +1,61 @@
+import threading
+import pytest
+from core_algorithm.utils.stage_graph import *
+
+
+def diamond(log, barrier=None):
+    graph = StageGraph()
+    graph.add('eugene', lambda: log.append('eugene') or 'helpers')
+    graph.add('table', lambda: log.append('table') or 'tb')
+    graph.add('dna', lambda helpers: (barrier.wait() if barrier else None, log.append('dna'), helpers + '>orders')[-1],
+              after=('eugene',))
+    graph.add('plots', lambda tb: (barrier.wait() if barrier else None, log.append('plots'), tb + '>plots')[-1],
+              after=('table',))
+    graph.add('sbol', lambda orders, helpers: orders + '+' + helpers, after=('dna', 'eugene'))
+    return graph
+
+
+# Test that stages get the results of their dependencies, in order (sequentially) and concurrently
+def test_run():
+    log = []
+    results = diamond(log).run(workers=1)
+    assert log == ['eugene', 'table', 'dna', 'plots']
+    assert results['sbol'] == 'helpers>orders+helpers' and results['plots'] == 'tb>plots'
+
+    # NOTE: both branches must be running at the same time to get past the barrier
+    results = diamond([], threading.Barrier(2, timeout=5)).run(workers=4)
+    assert results['sbol'] == 'helpers>orders+helpers' and results['plots'] == 'tb>plots'
+
+
+# Test that a failed stage stops its dependents and is raised, and that unknown dependencies are rejected
+def test_errors():
+    graph = StageGraph()
+    graph.add('eugene', lambda: 1 / 0)
+    graph.add('dna', lambda helpers: helpers, after=('eugene',))
+    graph.add('plots', lambda: 'plots')
+    with pytest.raises(ZeroDivisionError):
+        graph.run(workers=4)
+    assert 'dna' not in graph.results
+    with pytest.raises(ValueError):
+        graph.add('sbol', lambda: None, after=('miniEugene',))
+
+
+# Test that coroutine stages are awaited and blocking stages run in the executor, with the same results as run()
+def test_run_async():
+    import asyncio
+
+    async def dot(helpers):
+        await asyncio.sleep(0.01)
+        return helpers + '>diagram'
+
+    graph = diamond([])
+    graph.add('diagram', dot, after=('eugene',))
+    results = asyncio.run(graph.run_async())
+    assert results['sbol'] == 'helpers>orders+helpers' and results['diagram'] == 'helpers>diagram'
+
+    graph = StageGraph()
+    graph.add('eugene', lambda: 1 / 0)
+    graph.add('dna', dot, after=('eugene',))
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(graph.run_async())
+    assert graph.results == {}
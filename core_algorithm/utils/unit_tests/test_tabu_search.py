@@ -0,0 +1,28 @@
+import numpy as np
+from core_algorithm.utils.assignment_moves import AssignmentMoves
+from core_algorithm.utils.branch_and_bound import BranchAndBound
+from core_algorithm.utils.tabu_search import *
+from core_algorithm.utils.unit_tests.helpers import make_scorer
+
+
+# Test that the neighbourhood has every swap and replace move (and only valid ones)
+def test_all_moves():
+    moves = AssignmentMoves(['a_in', 'b_in', 'c_in'], ['x_out', 'y_out'], ['G1', 'G2', 'G3', 'G4'])
+    assignment = moves.indices((('a_in', 'b_in'), ('y_out',), ('G3', 'G1', 'G4')))
+    neighbourhood = moves.all_moves(assignment)
+    assert len(neighbourhood) == (1 + 2 * 1) + (0 + 1 * 1) + (3 + 3 * 1)
+    designs = {moves.names(moves.apply(assignment, move)) for move in neighbourhood}
+    assert len(designs) == len(neighbourhood)
+    assert all(len(set(d[0] + d[1] + d[2])) == 6 for d in designs)
+
+
+# Test that tabu search from a random design reaches the optimum of a small design space
+def test_reaches_optimum():
+    scorer = make_scorer('Eco2C1G3T1')
+    moves = AssignmentMoves(scorer.i_list, scorer.o_list, scorer.g_list)
+    start = moves.random_assignment(np.random.default_rng(0), 2, 2, 2)
+    tabu = TabuSearch(scorer, moves, tenure=7, patience=50)
+    best, designs = tabu.run(start)
+    assert best == BranchAndBound(scorer).search()[0]
+    assert all(scorer.score_assignments(*moves.indices(d))[0] == best for d in designs)
+    assert tabu.steps > 0 and 'without a better design' in tabu.reason
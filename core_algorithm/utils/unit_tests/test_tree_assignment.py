@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+import pytest
+from core_algorithm.utils.branch_and_bound import BranchAndBound
+from core_algorithm.utils.tree_assignment import *
+from core_algorithm.utils.unit_tests.helpers import NETLIST, make_scorer
+
+# 'and' netlist (a tree): out = NOR(NOT(in1), NOT(in2))
+TREE_NETLIST = SimpleNamespace(inputs=[('in1', 2), ('in2', 3)], outputs=[('out', 4)],
+                               gates={'5': {'type': 'NOT', 'inputs': {'A': 2}, 'output': {'Y': 5}},
+                                      '6': {'type': 'NOT', 'inputs': {'A': 3}, 'output': {'Y': 6}},
+                                      '7': {'type': 'NOR', 'inputs': {'A': 5, 'B': 6}, 'output': {'Y': 4}}})
+
+
+# Test that the dynamic programming finds the best score (and tied designs) of branch and bound, which is exact
+@pytest.mark.parametrize('ucf_name', ['Eco2C1G3T1', 'SC1C1G1T1'])
+def test_matches_branch_and_bound(ucf_name):
+    scorer = make_scorer(ucf_name, TREE_NETLIST)
+    best, ties = TreeAssignment(scorer).solve()
+    expected, expected_ties = BranchAndBound(scorer).search()
+    assert best == expected
+    assert {tuple(tuple(a) for a in tie) for tie in ties} <= {tuple(tuple(a) for a in tie) for tie in expected_ties}
+    assert len(ties) > 0
+
+
+# Test that netlists with a gate driving several gates/outputs are rejected
+def test_not_fanout_free():
+    assert NETLIST.gates['79']['output']['Y'] == 5  # drives out2 and gate 80
+    assert 'fanout-free' in tree_unsupported_reason(make_scorer('Eco2C1G3T1'))
+
+
+# Test that a stopped search returns the best designs scored so far (none if stopped during the dynamic programming)
+def test_progress_stop():
+    scorer = make_scorer('Eco2C1G3T1', TREE_NETLIST)
+    assert TreeAssignment(scorer).solve(progress=lambda best, scored: True) == (-float('inf'), [])
+    tree = TreeAssignment(scorer)
+    best, ties = tree.solve(batch_size=1, progress=lambda best, scored: scored >= 1)
+    assert tree.scored == 1 and best == TreeAssignment(scorer).solve()[0] and len(ties) == 1